@@ -34,24 +34,19 @@ def generate_market_data(days=30, interval=1, volatility=0.01, seed=42):
                        (market_close.minute - market_open.minute))
     candles_per_day = minutes_per_day // interval
     
-    # Generate timestamps
+    # Generate timestamps: every weekday in the window, from market open in interval steps
     start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
-    timestamps = []
-    
-    for day in range(days):
-        current_date = start_date + timedelta(days=day)
-        # Skip weekends
-        if current_date.weekday() >= 5:  # 5 = Saturday, 6 = Sunday
-            continue
-        
-        for candle in range(candles_per_day):
-            candle_time = datetime.combine(
-                current_date.date(),
-                market_open
-            ) + timedelta(minutes=candle * interval)
-            
-            if candle_time.time() <= market_close:
-                timestamps.append(candle_time)
+    trading_days = pd.date_range(start=start_date, periods=days, freq='D')
+    trading_days = trading_days[trading_days.weekday < 5]  # Skip weekends (5 = Saturday, 6 = Sunday)
+
+    open_offset = pd.Timedelta(hours=market_open.hour, minutes=market_open.minute)
+    close_offset = pd.Timedelta(hours=market_close.hour, minutes=market_close.minute)
+    candle_offsets = open_offset + pd.to_timedelta(np.arange(candles_per_day) * interval, unit='min')
+    candle_offsets = candle_offsets[candle_offsets <= close_offset]
+
+    timestamps = pd.DatetimeIndex(
+        (trading_days.values[:, np.newaxis] + candle_offsets.values[np.newaxis, :]).ravel()
+    )
     
     # Generate price data
     num_candles = len(timestamps)
@@ -5,13 +5,14 @@ This module provides utilities for running backtests in parallel using multiproc
 """
 
 import multiprocessing
+from multiprocessing import shared_memory
 from pathlib import Path
 import logging
-import copy
 from typing import Dict, Any, List, Tuple, Optional, Union
 import pandas as pd
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import psutil
 
 from strategies.ema_ha import EMAHeikinAshiStrategy
 from utils.logger import setup_logger
@@ -19,6 +20,92 @@ from utils.logger import setup_logger
 # Set up logger
 logger = setup_logger(name="backtest.parallel", log_level=logging.INFO)
 
+# Market data copied out of shared memory, and the strategy configuration, in each worker process
+_shared_data = None
+_shared_config = None
+
+def physical_cpu_count() -> int:
+    """
+    Number of physical CPU cores, falling back to the logical count when it can't be determined
+
+    Backtests are CPU-bound, so hyper-threaded siblings add contention rather than throughput.
+    """
+    return psutil.cpu_count(logical=False) or multiprocessing.cpu_count()
+
+def _share_data(data: pd.DataFrame) -> Tuple[Optional[shared_memory.SharedMemory], Dict[str, Any]]:
+    """
+    Copy market data into a shared memory block so workers read it from there instead of unpickling it
+
+    Args:
+        data: Market data with numeric columns
+
+    Returns:
+        Tuple of (shared memory block, description passed to _attach_shared_data). The block is
+        None when the data has object columns and the DataFrame itself is passed instead.
+    """
+    if any(dtype == object for dtype in data.dtypes) or data.index.dtype == object:
+        return None, {'data': data}
+
+    arrays = [data.index.values] + [data[column].to_numpy() for column in data.columns]
+
+    # Keep every array 8-byte aligned within the block
+    offsets = []
+    size = 0
+    for array in arrays:
+        offsets.append(size)
+        size += -(-array.nbytes // 8) * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    layout = []
+    for array, offset in zip(arrays, offsets):
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=offset)[:] = array
+        layout.append((array.dtype.str, array.shape, offset))
+
+    return shm, {
+        'name': shm.name,
+        'layout': layout,
+        'columns': list(data.columns),
+        'index_name': data.index.name,
+        'index_tz': getattr(data.index, 'tz', None),
+        'attrs': dict(data.attrs)
+    }
+
+def _attach_shared_data(shared: Dict[str, Any], config: Dict[str, Any]) -> None:
+    """
+    Worker initializer: rebuild the market data DataFrame from the parent's shared memory block
+
+    The worker keeps its own copy of the data and closes the block straight away, so it holds no
+    mapping for the life of the process.
+
+    Args:
+        shared: Description returned by _share_data
+        config: Strategy configuration, received once per worker instead of with every task
+    """
+    global _shared_data, _shared_config
+
+    _shared_config = config
+
+    if 'data' in shared:
+        _shared_data = shared['data']
+        return
+
+    shm = shared_memory.SharedMemory(name=shared['name'])
+    try:
+        # Copy each array out, so no view of the buffer outlives the handle
+        arrays = [
+            np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset).copy()
+            for dtype, shape, offset in shared['layout']
+        ]
+    finally:
+        shm.close()
+
+    index = pd.Index(arrays[0], name=shared['index_name'])
+    if shared['index_tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(shared['index_tz'])
+
+    _shared_data = pd.DataFrame(dict(zip(shared['columns'], arrays[1:])), index=index)
+    _shared_data.attrs.update(shared['attrs'])
+
 def run_single_backtest(params: Dict[str, Any]) -> Dict[str, Any]:
     """
     Run a single backtest with the given parameters
@@ -27,9 +114,8 @@ def run_single_backtest(params: Dict[str, Any]) -> Dict[str, Any]:
         params: Dictionary containing all parameters needed for the backtest
             - ema_short: Short EMA period
             - ema_long: Long EMA period
-            - config: Strategy configuration
-            - data: Market data
-            - initial_capital: Initial capital for backtest
+            - config: Strategy configuration (defaults to the config shared with this worker process)
+            - data: Market data (defaults to the data shared with this worker process)
             - trading_mode: Trading mode (BUY, SELL, SWING)
             - pattern: Candle pattern (None, 2, 3)
             - seed: Random seed for reproducibility (optional)
@@ -46,8 +132,8 @@ def run_single_backtest(params: Dict[str, Any]) -> Dict[str, Any]:
         # Extract parameters
         ema_short = params['ema_short']
         ema_long = params['ema_long']
-        config = params['config']
-        data = params['data']
+        config = params['config'] if 'config' in params else _shared_config
+        data = params['data'] if 'data' in params else _shared_data
         trading_mode = params['trading_mode']
         pattern = params['pattern']
 
@@ -103,7 +189,7 @@ def run_parallel_backtests(config: Dict[str, Any], data: pd.DataFrame,
         data: Market data
         trading_modes: List of trading modes to test
         candle_patterns: List of candle patterns to test
-        max_workers: Maximum number of worker processes (default: number of CPU cores)
+        max_workers: Maximum number of worker processes (default: number of physical CPU cores)
         seed: Random seed for reproducibility
 
     Returns:
@@ -114,7 +200,7 @@ def run_parallel_backtests(config: Dict[str, Any], data: pd.DataFrame,
 
     # Determine number of workers
     if max_workers is None:
-        max_workers = multiprocessing.cpu_count()
+        max_workers = physical_cpu_count()
 
     # Create list of parameter combinations
     backtest_params = []
@@ -127,12 +213,10 @@ def run_parallel_backtests(config: Dict[str, Any], data: pd.DataFrame,
                 # Use the same seed generation logic as in deterministic.py
                 combination_seed = seed + (hash(f"{ema_short}_{ema_long}_{mode}_{pattern}") % 1000000)
 
+                # Market data and config reach the workers once, when they start, not per task
                 params = {
                     'ema_short': ema_short,
                     'ema_long': ema_long,
-                    'config': config,
-                    'data': data,
-                    'initial_capital': config['backtest']['initial_capital'],
                     'trading_mode': mode,
                     'pattern': pattern,
                     'seed': combination_seed  # Pass the unique seed to each worker
@@ -143,29 +227,31 @@ def run_parallel_backtests(config: Dict[str, Any], data: pd.DataFrame,
     total_combinations = len(backtest_params)
     logger.info(f"Running {total_combinations} backtest combinations in parallel with {max_workers} workers")
 
-    # Run backtests in parallel
+    # Run backtests in parallel, dispatching tasks in chunks of several combinations per worker round trip
     results = []
-    completed = 0
+    chunksize = max(1, total_combinations // (max_workers * 4))
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_params = {executor.submit(run_single_backtest, params): params for params in backtest_params}
+    # Heikin Ashi and EMAs don't depend on mode or pattern, so compute them once here rather than in every task
+    if 'HA_Open' not in data.columns or 'HA_Close' not in data.columns:
+        ema_periods = [period for pair in config['strategy']['ema_pairs'] for period in pair]
+        data = EMAHeikinAshiStrategy.precompute_indicators(data, ema_periods)
 
-        # Process results as they complete
-        for future in as_completed(future_to_params):
-            params = future_to_params[future]
-            pattern_desc = "No Pattern" if params['pattern'] == 'None' else f"{params['pattern']}-candle pattern"
+    # Put the market data in shared memory once; workers copy it out and take the config when they start
+    shm, shared = _share_data(data)
 
-            try:
-                result = future.result()
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_shared_data,
+                                 initargs=(shared, config)) as executor:
+            # run_single_backtest returns an error result instead of raising, so one failure can't stop the map
+            for completed, result in enumerate(executor.map(run_single_backtest, backtest_params, chunksize=chunksize), start=1):
                 results.append(result)
 
-                # Update progress
-                completed += 1
-                logger.info(f"Completed {completed}/{total_combinations} tests ({completed/total_combinations*100:.1f}%): "
-                           f"EMA {params['ema_short']}/{params['ema_long']} with {params['trading_mode']} mode and {pattern_desc}")
-
-            except Exception as e:
-                logger.error(f"Exception in backtest for EMA {params['ema_short']}/{params['ema_long']} with {params['trading_mode']} mode and {pattern_desc}: {e}")
+                # Update progress every 10 combinations and at the end
+                if completed % 10 == 0 or completed == total_combinations:
+                    logger.info(f"Completed {completed}/{total_combinations} tests ({completed/total_combinations*100:.1f}%)")
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
 
     return results
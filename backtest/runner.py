@@ -88,7 +88,8 @@ def main():
     for ema_short, ema_long in config['strategy']['ema_pairs']:
         strategy = EMAHeikinAshiStrategy(ema_short, ema_long, config)  # Pass config here
         results, trades = strategy.backtest(data, initial_capital=config['backtest']['initial_capital'])
-        save_results(results, trades, "NIFTY", ema_short, ema_long, data.attrs)
+        save_results(results, trades, "NIFTY", ema_short, ema_long, data.attrs,
+                     trade_formats=config.get('output', {}).get('format'))
         all_results.append(results)
 
     # Print summary table
@@ -9,16 +9,144 @@ import pandas as pd
 import numpy as np
 import yaml
 from pathlib import Path
+import copy
 import json
+from collections import deque
 import os
+import threading
+import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Any, Union, Optional, Tuple
 import logging
+from numba import njit
 from utils.logger import setup_logger
 
 # Set up logger
 logger = setup_logger(name="backtest.utils", log_level=logging.INFO)
 
+# Parse YAML with the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+    logger.info("libyaml is not available; using the pure-Python YAML loader")
+
+# Parse market data CSVs with pandas' multithreaded pyarrow engine when pyarrow is installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# Trade file formats save_results can write; parquet needs pyarrow
+TRADE_FORMATS = ('csv', 'parquet')
+
+# Absolute paths of the directories save_results has already created this process
+_ensured_dirs = set()
+_ensured_dirs_lock = threading.Lock()
+
+def ensure_dir(path: Union[str, Path]) -> Path:
+    """
+    Create a directory (and its parents) once per process
+
+    Later calls for the same path skip the mkdir syscall.
+
+    Args:
+        path: Directory to create
+
+    Returns:
+        The directory as a Path
+    """
+    path = Path(path)
+    key = os.path.abspath(path)
+    if key not in _ensured_dirs:
+        with _ensured_dirs_lock:
+            if key not in _ensured_dirs:
+                path.mkdir(parents=True, exist_ok=True)
+                _ensured_dirs.add(key)
+    return path
+
+def _atomic_write_text(path: Union[str, Path], text: str) -> None:
+    """
+    Write text to a uniquely named temp file beside path, then swap it into place
+
+    Each writer gets its own temp file, so concurrent writers of the same path never
+    replace each other's half-written file; the last os.replace wins.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'x') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Don't leave the temp file behind when the write or the swap fails
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _read_config_sidecar(cache_path: str, mtime_ns: int, size: int) -> Optional[Any]:
+    """Return the JSON sidecar's config if it was written for this exact YAML, else None"""
+    try:
+        with open(cache_path, 'r') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # An older YAML restored over a newer sidecar must not be served from it, so the
+    # sidecar has to name the YAML's exact modification time and size
+    if (not isinstance(payload, dict) or payload.get('yaml_mtime_ns') != mtime_ns
+            or payload.get('yaml_size') != size):
+        return None
+    return payload.get('config')
+
+def _write_config_sidecar(cache_path: str, config: Any, mtime_ns: int, size: int) -> None:
+    """Write the parsed config as a JSON sidecar stamped with the YAML's stat, replacing it atomically"""
+    # Only configs that survive a JSON round-trip unchanged can be served from the sidecar
+    try:
+        serialized = json.dumps(config)
+        if json.loads(serialized) != config:
+            return
+        payload = json.dumps({'yaml_mtime_ns': mtime_ns, 'yaml_size': size, 'config': config})
+        _atomic_write_text(cache_path, payload)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not write config cache {cache_path}: {e}")
+
+@lru_cache(maxsize=32)
+def _load_yaml_cached(config_path: str, mtime_ns: int, size: int) -> Any:
+    """
+    Parse a YAML file, caching the result per absolute path, modification time and size
+
+    The modification time and size are part of the cache key only, so an edited
+    file is parsed again on the next call. Across processes the parse is shared
+    through a '<config>.cache.json' sidecar, used only when it records exactly this
+    modification time and size. Callers must not mutate the returned object.
+    """
+    cache_path = f"{config_path}.cache.json"
+    config = _read_config_sidecar(cache_path, mtime_ns, size)
+    if config is not None:
+        return config
+
+    with open(config_path, 'r') as f:
+        config = yaml.load(f, Loader=YamlLoader)
+    _write_config_sidecar(cache_path, config, mtime_ns, size)
+    return config
+
+def _read_config_file(config_path: str) -> Any:
+    """
+    Return the caller's own copy of a YAML file's cached parse, without checking its contents
+
+    The file is parsed only when its modification time or size changed.
+    """
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"Configuration file not found: {config_path}")
+
+    abs_path = os.path.abspath(config_path)
+    stat = os.stat(abs_path)
+    return copy.deepcopy(_load_yaml_cached(abs_path, stat.st_mtime_ns, stat.st_size))
+
 def load_config(config_path: str = 'config/config.yaml') -> Dict[str, Any]:
     """
     Load configuration from yaml file
@@ -34,11 +162,8 @@ def load_config(config_path: str = 'config/config.yaml') -> Dict[str, Any]:
         yaml.YAMLError: If the config file has invalid YAML syntax
     """
     try:
-        if not os.path.exists(config_path):
-            raise FileNotFoundError(f"Configuration file not found: {config_path}")
-
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # Parse only when the file changed; callers get their own copy of the cached dict
+        config = _read_config_file(config_path)
 
         # Validate essential configuration keys
         required_keys = ['strategy', 'backtest', 'data']
@@ -59,6 +184,17 @@ def load_config(config_path: str = 'config/config.yaml') -> Dict[str, Any]:
         logger.error(f"Unexpected error loading configuration: {e}")
         raise
 
+def _read_market_csv(file_path: Union[str, Path]) -> pd.DataFrame:
+    """Read a market data CSV, using the pyarrow engine when it is available"""
+    if CSV_ENGINE == 'pyarrow':
+        try:
+            return pd.read_csv(file_path, engine='pyarrow')
+        except ValueError:
+            # pyarrow raises ArrowInvalid for empty or malformed files; re-read with the
+            # C parser so callers see the usual pandas EmptyDataError/ParserError
+            logger.debug(f"pyarrow could not parse {file_path}, retrying with the C parser")
+    return pd.read_csv(file_path)
+
 def load_data(file_path: Union[str, Path]) -> pd.DataFrame:
     """
     Load market data from CSV file and ensure it's sorted by datetime
@@ -80,7 +216,7 @@ def load_data(file_path: Union[str, Path]) -> pd.DataFrame:
         logger.info(f"Loading market data from {file_path}")
 
         # Read CSV file
-        df = pd.read_csv(file_path)
+        df = _read_market_csv(file_path)
 
         if df.empty:
             raise ValueError(f"Data file is empty: {file_path}")
@@ -95,7 +231,14 @@ def load_data(file_path: Union[str, Path]) -> pd.DataFrame:
         # Convert column names to lowercase for consistency
         df.columns = df.columns.str.lower()
 
-        # Convert date column to datetime
+        # Store volume as int32 when that is lossless; prices stay float64 because
+        # float32 would round them and shift stop-loss and P&L results
+        if 'volume' in df.columns and pd.api.types.is_integer_dtype(df['volume']):
+            int32_info = np.iinfo(np.int32)
+            if df['volume'].between(int32_info.min, int32_info.max).all():
+                df['volume'] = df['volume'].astype(np.int32)
+
+        # Convert date column to datetime (already parsed, and so a no-op, with pyarrow)
         df['date'] = pd.to_datetime(df['date'])
 
         logger.debug(f"Data before sorting - First row: {df['date'].iloc[0]}, Last row: {df['date'].iloc[-1]}")
@@ -147,7 +290,10 @@ def save_results(
     symbol: str,
     ema_short: int,
     ema_long: int,
-    data_attrs: Dict[str, Any]
+    data_attrs: Dict[str, Any],
+    trade_formats: Optional[List[str]] = None,
+    trading_mode: Optional[str] = None,
+    pattern: Optional[Union[int, str]] = None
 ) -> Tuple[Path, Path]:
     """
     Save backtest results and trades with date range information
@@ -159,21 +305,37 @@ def save_results(
         ema_short: Short EMA period
         ema_long: Long EMA period
         data_attrs: Data attributes containing date range information
+        trade_formats: Trade file formats to write ('csv' and/or 'parquet'), defaults to ['csv']
+        trading_mode: Trading mode of the run, added to the filenames when given
+        pattern: Candle pattern of the run (2, 3 or 'None'), added to the filenames when given.
+            Runs that differ only in mode or pattern can then save at the same time.
 
     Returns:
-        Tuple of (results_file_path, trades_file_path)
+        Tuple of (results_file_path, trades_file_path), where the trades file is
+        the first format written
 
     Raises:
         IOError: If there's an error writing the files
+        ValueError: If an unknown trade format is requested
+        ImportError: If parquet output is requested without pyarrow installed
     """
     try:
+        trade_formats = trade_formats or ['csv']
+        unknown_formats = set(trade_formats) - set(TRADE_FORMATS)
+        if unknown_formats:
+            raise ValueError(f"Unknown trade output format(s): {sorted(unknown_formats)}")
+
         # Create results directory if it doesn't exist
-        results_dir = Path('data/results')
-        results_dir.mkdir(parents=True, exist_ok=True)
+        results_dir = ensure_dir('data/results')
 
-        # Create filename with timestamp
+        # Create filename with the run's mode and pattern, if given, and a timestamp
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{symbol}_EMA_{ema_short}_{ema_long}_{timestamp}"
+        name_parts = [symbol, 'EMA', str(ema_short), str(ema_long)]
+        if trading_mode is not None:
+            name_parts.append(str(trading_mode))
+        if pattern is not None:
+            name_parts.append('nopattern' if str(pattern) == 'None' else f"{pattern}candle")
+        filename = '_'.join(name_parts + [timestamp])
 
         # Add date range information to results
         results.update({
@@ -185,20 +347,29 @@ def save_results(
             }
         })
 
-        # Save results
+        # Save results: serialize once, write in one call, then swap the file into place
         results_file = results_dir / f"{filename}_results.json"
-        with open(results_file, 'w') as f:
-            json.dump(results, f, indent=4)
-
-        # Save trades
-        trades_file = results_dir / f"{filename}_trades.csv"
-        trades_df = pd.DataFrame(trades)
-        trades_df.to_csv(trades_file, index=False)
+        _atomic_write_text(results_file, json.dumps(results, indent=4))
+
+        # Save trades in each requested format
+        trade_files = []
+        for trade_format in trade_formats:
+            trades_file = results_dir / f"{filename}_trades.{trade_format}"
+            if trade_format == 'parquet':
+                # Columnar, typed and zstd-compressed; string columns are dictionary encoded
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                pq.write_table(pa.Table.from_pylist(trades), str(trades_file),
+                               compression='zstd', use_dictionary=True)
+            else:
+                pd.DataFrame(trades).to_csv(trades_file, index=False)
+            trade_files.append(trades_file)
 
         logger.info(f"Results saved to {results_file}")
-        logger.info(f"Trades saved to {trades_file}")
+        for trades_file in trade_files:
+            logger.info(f"Trades saved to {trades_file}")
 
-        return results_file, trades_file
+        return results_file, trade_files[0]
 
     except IOError as e:
         logger.error(f"Error saving results: {e}")
@@ -207,9 +378,89 @@ def save_results(
         logger.error(f"Unexpected error saving results: {e}")
         raise
 
+@njit(cache=True)
+def _metrics_kernel(pnl: np.ndarray, initial_capital: float) -> Tuple[int, float, float, float]:
+    """
+    Numba-compiled single pass over the trade pnl values
+
+    Tracks the equity and its running peak as it goes, so the drawdown needs
+    no equity, peak or drawdown arrays.
+
+    Returns:
+        Tuple of (winning_trades, gross_profit, gross_loss, max_drawdown_pct)
+    """
+    equity = initial_capital
+    peak = initial_capital
+    max_drawdown = 0.0
+    winning_trades = 0
+    gross_profit = 0.0
+    gross_loss = 0.0
+
+    for i in range(pnl.shape[0]):
+        x = pnl[i]
+        if x > 0:
+            winning_trades += 1
+            gross_profit += x
+        else:
+            gross_loss += x
+        equity += x
+        if equity > peak:
+            peak = equity
+        if peak > 0:
+            drawdown = (peak - equity) / peak
+            if drawdown > max_drawdown:
+                max_drawdown = drawdown
+
+    return winning_trades, gross_profit, -gross_loss, max_drawdown * 100
+
+
+# Compile the kernel at import so the first metrics call doesn't pay the JIT cost
+_metrics_kernel(np.zeros(1, dtype=np.float64), 1.0)
+
+
+def windowed_max_drawdown(equity: np.ndarray, window: int) -> float:
+    """
+    Largest drawdown (in percent) from the highest equity within the last ``window`` points
+
+    The window max is kept in a monotonic deque of indices, so the whole scan is
+    O(N) however long the window is. A window at least as long as the curve gives
+    the usual full-history drawdown.
+
+    Args:
+        equity: Equity curve, starting with the initial capital
+        window: Number of earlier points each point is compared against
+
+    Returns:
+        Maximum windowed drawdown percentage
+
+    Raises:
+        ValueError: If window is not positive
+    """
+    if window < 1:
+        raise ValueError(f"Drawdown window must be positive, got {window}")
+
+    candidates = deque()
+    max_drawdown = 0.0
+    for i, value in enumerate(equity.tolist()):
+        # Drop points the new value dominates, then points that left the window
+        while candidates and equity[candidates[-1]] <= value:
+            candidates.pop()
+        candidates.append(i)
+        while candidates[0] < i - window:
+            candidates.popleft()
+
+        window_max = equity[candidates[0]]
+        if window_max > 0:
+            max_drawdown = max(max_drawdown, (window_max - value) / window_max)
+
+    return float(max_drawdown * 100)
+
+
 def calculate_performance_metrics(
     trades: List[Dict[str, Any]],
-    initial_capital: float
+    initial_capital: float,
+    pnl_array: Optional[np.ndarray] = None,
+    drawdown_window: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Calculate comprehensive performance metrics from trade list
@@ -221,9 +472,16 @@ def calculate_performance_metrics(
     Args:
         trades: List of trade dictionaries
         initial_capital: Initial capital amount
+        pnl_array: Optional precomputed array (or sequence) of the trades' pnl values, in trade
+            order; must hold one value per trade
+        drawdown_window: Optional number of trades to look back for the drawdown peak,
+            defaults to the full trade history
 
     Returns:
         Dictionary containing performance metrics
+
+    Raises:
+        ValueError: If pnl_array does not hold one value per trade
     """
     if not trades:
         return {
@@ -237,36 +495,29 @@ def calculate_performance_metrics(
             'avg_trade_duration': 0.0
         }
 
+    # Work on the pnl values as one array
+    if pnl_array is None:
+        pnl_array = np.array([t['pnl'] for t in trades], dtype=np.float64)
+    pnl_array = np.asarray(pnl_array, dtype=np.float64)
+    if len(pnl_array) != len(trades):
+        raise ValueError(f"pnl_array has {len(pnl_array)} values for {len(trades)} trades")
+    winning_trades, gross_profit, gross_loss, max_drawdown_pct = _metrics_kernel(
+        pnl_array, float(initial_capital))
+    if drawdown_window is not None:
+        equity_curve = initial_capital + np.concatenate(([0.0], np.cumsum(pnl_array)))
+        max_drawdown_pct = windowed_max_drawdown(equity_curve, drawdown_window)
+
     # Extract basic metrics
     total_trades = len(trades)
-    winning_trades = sum(1 for t in trades if t['pnl'] > 0)
     win_rate = winning_trades / total_trades if total_trades > 0 else 0
 
     # Calculate profit metrics
-    total_profit = sum(t['pnl'] for t in trades)
+    total_profit = float(pnl_array.sum())
     return_pct = (total_profit / initial_capital) * 100
 
     # Calculate profit factor
-    gross_profit = sum(t['pnl'] for t in trades if t['pnl'] > 0)
-    gross_loss = abs(sum(t['pnl'] for t in trades if t['pnl'] <= 0))
     profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
 
-    # Calculate drawdown
-    equity_curve = [initial_capital]
-    for trade in trades:
-        equity_curve.append(equity_curve[-1] + trade['pnl'])
-
-    peak = initial_capital
-    drawdowns = []
-
-    for equity in equity_curve:
-        if equity > peak:
-            peak = equity
-        drawdown_pct = (peak - equity) / peak * 100 if peak > 0 else 0
-        drawdowns.append(drawdown_pct)
-
-    max_drawdown_pct = max(drawdowns) if drawdowns else 0
-
     # Calculate average trade duration
     avg_duration = sum(t['duration'] for t in trades) / total_trades if total_trades > 0 else 0
 
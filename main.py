@@ -9,17 +9,18 @@ Version: 1.0.0
 import argparse
 import sys
 import os
-import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import logging
 from typing import Dict, Any, List, Tuple, Optional, Union
+import pandas as pd
 
 from strategies.ema_ha import EMAHeikinAshiStrategy
 from backtest.utils import load_data, save_results
 from utils.config_validator import validate_config
 from utils.logger import setup_logger
 from utils.excel_report import create_consolidated_report
-from backtest.parallel import run_parallel_backtests
+from backtest.parallel import run_parallel_backtests, physical_cpu_count
 from backtest.deterministic import DeterministicBacktest
 from utils.version import __version__
 from server.health_check import start_health_check_server
@@ -29,6 +30,9 @@ from utils.config_utils import get_config, get_config_value, get_symbol, get_tra
 # Set up logger
 logger = setup_logger(name="main", log_level=logging.INFO)
 
+# Market data loaded once by the parent process and shared with comparative-analysis workers
+_worker_data = None
+
 def parse_arguments() -> argparse.Namespace:
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -115,9 +119,17 @@ Example usage:
 
     return parser.parse_args()
 
+def _resolve_data_path(config: Dict[str, Any], data_path: Optional[Union[str, Path]], symbol: str) -> Union[str, Path]:
+    """Return the market data path, falling back to the configured data folder"""
+    if data_path:
+        return data_path
+    data_folder = config['data']['data_folder']
+    return Path(data_folder) / f"{symbol}_{config['data']['timeframe']}.csv"
+
 def run_strategy(config_path: Union[str, Path], data_path: Optional[Union[str, Path]]=None,
                symbol: str='NIFTY', output_dir: Optional[Union[str, Path]]=None,
-               mode: Optional[str]=None, candle_pattern: Optional[int]=None) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+               mode: Optional[str]=None, candle_pattern: Optional[int]=None,
+               data: Optional[pd.DataFrame]=None) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
     """
     Run the EMA Heikin Ashi strategy with the given configuration
 
@@ -128,7 +140,7 @@ def run_strategy(config_path: Union[str, Path], data_path: Optional[Union[str, P
         output_dir: Output directory for results (overrides config)
         mode: Trading mode (BUY, SELL, SWING) to override config
         candle_pattern: Number of consecutive candles required for pattern confirmation (2 or 3)
-        compare: Whether to run comparative analysis across all modes
+        data: Preloaded market data (skips loading from data_path)
     """
     try:
         # Load configuration
@@ -143,49 +155,55 @@ def run_strategy(config_path: Union[str, Path], data_path: Optional[Union[str, P
         log_level = getattr(logging, config.get('logging', {}).get('level', 'INFO'))
         logger.setLevel(log_level)
 
+        # Apply overrides to copies of the sections they touch, so the cached config
+        # returned by get_config is never modified
+        if mode or candle_pattern is not None:
+            strategy_config = dict(config.get('strategy', {}))
+            config = {**config, 'strategy': strategy_config}
+
         # Override trading mode if specified
         if mode:
-            if 'strategy' not in config:
-                config['strategy'] = {}
-            if 'trading' not in config['strategy']:
-                config['strategy']['trading'] = {}
-            config['strategy']['trading']['mode'] = [mode]
+            strategy_config['trading'] = {**strategy_config.get('trading', {}), 'mode': [mode]}
 
         # Override candle pattern if specified
         if candle_pattern is not None:  # Check for None explicitly
-            if 'strategy' not in config:
-                config['strategy'] = {}
-            if 'ha_patterns' not in config['strategy']:
-                config['strategy']['ha_patterns'] = {'enabled': True}
-            config['strategy']['ha_patterns']['enabled'] = True
-
             # Handle string values from command line
             if candle_pattern == 'None':
-                config['strategy']['ha_patterns']['confirmation_candles'] = [None]
+                confirmation_candles = [None]
             else:
                 # Convert string to int
-                config['strategy']['ha_patterns']['confirmation_candles'] = [int(candle_pattern)]
+                confirmation_candles = [int(candle_pattern)]
 
-        # Determine data path
-        if not data_path:
-            data_folder = config['data']['data_folder']
-            data_path = Path(data_folder) / f"{symbol}_{config['data']['timeframe']}.csv"
+            strategy_config['ha_patterns'] = {
+                **strategy_config.get('ha_patterns', {}),
+                'enabled': True,
+                'confirmation_candles': confirmation_candles
+            }
 
-        # Load market data
-        data = load_data(data_path)
+        # Load market data unless the caller already has it
+        if data is None:
+            data = load_data(_resolve_data_path(config, data_path, symbol))
 
         # Run backtest for each EMA pair
         all_results = []
         all_trades = []
+        ema_pairs = config['strategy']['ema_pairs']
+        batch_signals = None
 
-        for ema_short, ema_long in config['strategy']['ema_pairs']:
+        for ema_short, ema_long in ema_pairs:
             logger.info(f"Running backtest for EMA {ema_short}/{ema_long}")
 
             # Initialize strategy
             strategy = EMAHeikinAshiStrategy(ema_short, ema_long, config)
 
+            # Generate signals for all pairs at once when there are several
+            if batch_signals is None and len(ema_pairs) > 1:
+                batch_signals = strategy.generate_signals_batch(data, ema_pairs)
+            signals = batch_signals[(ema_short, ema_long)] if batch_signals is not None else None
+
             # Run backtest
-            results, trades = strategy.backtest(data, initial_capital=config['backtest']['initial_capital'])
+            results, trades = strategy.backtest(data, initial_capital=config['backtest']['initial_capital'],
+                                                signals=signals)
 
             # Save results
             if output_dir:
@@ -195,7 +213,10 @@ def run_strategy(config_path: Union[str, Path], data_path: Optional[Union[str, P
 
             results_dir.mkdir(parents=True, exist_ok=True)
 
-            save_results(results, trades, symbol, ema_short, ema_long, data.attrs)
+            # Parallel runs of other modes or patterns save in the same second, so name the files after both
+            save_results(results, trades, symbol, ema_short, ema_long, data.attrs,
+                         trade_formats=config.get('output', {}).get('format'),
+                         trading_mode=mode, pattern=candle_pattern)
 
             all_results.append(results)
             all_trades.append(trades)
@@ -256,6 +277,40 @@ def run_strategy(config_path: Union[str, Path], data_path: Optional[Union[str, P
 
         raise
 
+def _init_strategy_worker(data: pd.DataFrame) -> None:
+    """Store the parent's market data in a worker process"""
+    global _worker_data
+    _worker_data = data
+
+def _run_strategy_job(job: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+    """Run a single run_strategy job inside a worker process"""
+    return run_strategy(data=_worker_data, **job)
+
+def _run_strategy_jobs(jobs: List[Dict[str, Any]], sequential: bool=False) -> List[Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]]:
+    """
+    Run independent run_strategy jobs, in worker processes unless sequential
+
+    Args:
+        jobs: Keyword arguments for each run_strategy call
+        sequential: Whether to run the jobs one after another in this process
+
+    Returns:
+        List of (results, trades) tuples in the same order as jobs
+    """
+    if sequential or len(jobs) < 2:
+        return [run_strategy(**job) for job in jobs]
+
+    # Load the data once here instead of once per job
+    first_job = jobs[0]
+    config = get_config(first_job['config_path'])
+    data = load_data(_resolve_data_path(config, first_job.get('data_path'), first_job.get('symbol', 'NIFTY')))
+
+    max_workers = min(len(jobs), physical_cpu_count())
+    logger.info(f"Running {len(jobs)} strategy runs in parallel with {max_workers} workers")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_strategy_worker, initargs=(data,)) as executor:
+        return list(executor.map(_run_strategy_job, jobs))
+
 def run_all_combinations_analysis(config_path: Union[str, Path],
                               data_path: Optional[Union[str, Path]]=None,
                               symbol: str='NIFTY',
@@ -285,11 +340,13 @@ def run_all_combinations_analysis(config_path: Union[str, Path],
         config = get_config(config_path)
 
         # Load data once
-        if not data_path:
-            data_folder = config['data']['data_folder']
-            data_path = Path(data_folder) / f"{symbol}_{config['data']['timeframe']}.csv"
+        data_path = _resolve_data_path(config, data_path, symbol)
         data = load_data(data_path)
 
+        # Heikin Ashi and EMAs don't depend on mode or pattern, so compute them once for the sweep
+        ema_periods = [period for pair in config['strategy']['ema_pairs'] for period in pair]
+        data = EMAHeikinAshiStrategy.precompute_indicators(data, ema_periods)
+
         # Calculate total number of combinations
         total_combinations = len(trading_modes) * len(candle_patterns) * len(config['strategy']['ema_pairs'])
 
@@ -310,8 +367,8 @@ def run_all_combinations_analysis(config_path: Union[str, Path],
         use_parallel = not sequential
 
         if use_parallel:
-            # Determine number of workers (use 75% of available cores to avoid overloading the system)
-            max_workers = max(1, int(multiprocessing.cpu_count() * 0.75))
+            # Determine number of workers (use 75% of the physical cores to avoid overloading the system)
+            max_workers = max(1, int(physical_cpu_count() * 0.75))
             logger.info(f"Using {max_workers} worker processes for parallel backtesting")
 
             # Run backtests in parallel
@@ -407,7 +464,8 @@ def run_comparative_patterns_analysis(config_path: Union[str, Path],
                                   data_path: Optional[Union[str, Path]]=None,
                                   symbol: str='NIFTY',
                                   output_dir: Optional[Union[str, Path]]=None,
-                                  mode: Optional[str]=None) -> Tuple[Dict[int, List[Dict[str, Any]]], Dict[int, List[Dict[str, Any]]]]:
+                                  mode: Optional[str]=None,
+                                  sequential: bool=False) -> Tuple[Dict[int, List[Dict[str, Any]]], Dict[int, List[Dict[str, Any]]]]:
     """
     Run comparative analysis across all candle patterns
 
@@ -417,6 +475,7 @@ def run_comparative_patterns_analysis(config_path: Union[str, Path],
         symbol: Trading symbol
         output_dir: Output directory for results (overrides config)
         mode: Trading mode to use for all pattern tests
+        sequential: Whether to run the patterns one after another instead of in parallel
     """
     try:
         # Define patterns to compare
@@ -426,22 +485,24 @@ def run_comparative_patterns_analysis(config_path: Union[str, Path],
         all_pattern_results = {}
         all_pattern_trades = {}
 
-        # Run backtest for each pattern
-        for pattern in patterns:
-            print(f"\n{'='*50}")
-            print(f"Running backtest with {pattern}-candle pattern")
-            print(f"{'='*50}")
-
-            # Run strategy with this pattern
-            results, trades = run_strategy(
-                config_path=config_path,
-                data_path=data_path,
-                symbol=symbol,
-                output_dir=output_dir,
-                mode=mode,
-                candle_pattern=pattern
-            )
+        print(f"\n{'='*50}")
+        print(f"Running backtests with {', '.join(f'{pattern}-candle' for pattern in patterns)} patterns")
+        print(f"{'='*50}")
+
+        # Each pattern is an independent run of the strategy
+        jobs = [
+            {
+                'config_path': config_path,
+                'data_path': data_path,
+                'symbol': symbol,
+                'output_dir': output_dir,
+                'mode': mode,
+                'candle_pattern': pattern
+            }
+            for pattern in patterns
+        ]
 
+        for pattern, (results, trades) in zip(patterns, _run_strategy_jobs(jobs, sequential)):
             # Store results
             all_pattern_results[pattern] = results
             all_pattern_trades[pattern] = trades
@@ -506,7 +567,8 @@ def run_comparative_patterns_analysis(config_path: Union[str, Path],
 def run_comparative_analysis(config_path: Union[str, Path],
                            data_path: Optional[Union[str, Path]]=None,
                            symbol: str='NIFTY',
-                           output_dir: Optional[Union[str, Path]]=None) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]:
+                           output_dir: Optional[Union[str, Path]]=None,
+                           sequential: bool=False) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]:
     """
     Run comparative analysis across all trading modes
 
@@ -515,6 +577,7 @@ def run_comparative_analysis(config_path: Union[str, Path],
         data_path: Path to market data file (overrides config)
         symbol: Trading symbol
         output_dir: Output directory for results (overrides config)
+        sequential: Whether to run the modes one after another instead of in parallel
     """
     try:
         # Define modes to compare
@@ -524,22 +587,24 @@ def run_comparative_analysis(config_path: Union[str, Path],
         all_mode_results = {}
         all_mode_trades = {}
 
-        # Run backtest for each mode
-        for mode in modes:
-            print(f"\n{'='*50}")
-            print(f"Running backtest with {mode} mode")
-            print(f"{'='*50}")
-
-            # Run strategy with this mode
-            results, trades = run_strategy(
-                config_path=config_path,
-                data_path=data_path,
-                symbol=symbol,
-                output_dir=output_dir,
-                mode=mode,
-                candle_pattern=None
-            )
+        print(f"\n{'='*50}")
+        print(f"Running backtests with {', '.join(modes)} modes")
+        print(f"{'='*50}")
+
+        # Each mode is an independent run of the strategy
+        jobs = [
+            {
+                'config_path': config_path,
+                'data_path': data_path,
+                'symbol': symbol,
+                'output_dir': output_dir,
+                'mode': mode,
+                'candle_pattern': None
+            }
+            for mode in modes
+        ]
 
+        for mode, (results, trades) in zip(modes, _run_strategy_jobs(jobs, sequential)):
             # Store results
             all_mode_results[mode] = results
             all_mode_trades[mode] = trades
@@ -674,7 +739,8 @@ def main() -> int:
                     config_path=args.config,
                     data_path=args.data,
                     symbol=args.symbol,
-                    output_dir=args.output
+                    output_dir=args.output,
+                    sequential=sequential
                 )
                 # Flatten results
                 flat_results = []
@@ -690,7 +756,8 @@ def main() -> int:
                     data_path=args.data,
                     symbol=args.symbol,
                     output_dir=args.output,
-                    mode=args.mode
+                    mode=args.mode,
+                    sequential=sequential
                 )
                 # Flatten results
                 flat_results = []
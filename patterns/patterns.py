@@ -9,11 +9,31 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Tuple
 import logging
+from numba import njit
 from utils.logger import setup_logger
 
 # Set up logger
 logger = setup_logger(name="patterns.patterns", log_level=logging.INFO)
 
+@njit(cache=True)
+def _consecutive_kernel(candles: np.ndarray, length: int) -> np.ndarray:
+    """
+    Numba-compiled scan flagging candles that end a run of at least `length` True values in a candle direction mask
+    """
+    n = candles.shape[0]
+    out = np.empty(n, dtype=np.bool_)
+
+    run = 0
+    for i in range(n):
+        run = run + 1 if candles[i] else 0
+        out[i] = run >= length
+
+    return out
+
+
+# Compile the kernel at import so the first pattern filter doesn't pay the JIT cost
+_consecutive_kernel(np.zeros(2, dtype=np.bool_), 2)
+
 def detect_consecutive_candles(df: pd.DataFrame, pattern_type: str, length: int = 2) -> pd.Series:
     """
     Detect consecutive bullish or bearish Heikin Ashi candles.
@@ -32,42 +52,50 @@ def detect_consecutive_candles(df: pd.DataFrame, pattern_type: str, length: int
     if length not in [2, 3]:
         raise ValueError("length must be 2 or 3")
 
-    # Initialize result series
-    pattern = pd.Series(False, index=df.index)
-
     try:
-        # For bullish pattern (HA_Close > HA_Open)
-        if pattern_type == 'bullish':
-            bullish_candles = df['HA_Close'] > df['HA_Open']
+        ha_close = df['HA_Close'].to_numpy()
+        ha_open = df['HA_Open'].to_numpy()
+        candles = ha_close > ha_open if pattern_type == 'bullish' else ha_close < ha_open
 
-            if length == 2:
-                # Current and previous candle are bullish
-                pattern = bullish_candles & bullish_candles.shift(1)
-            elif length == 3:
-                # Current and two previous candles are bullish
-                pattern = bullish_candles & bullish_candles.shift(1) & bullish_candles.shift(2)
-
-        # For bearish pattern (HA_Close < HA_Open)
-        else:  # pattern_type == 'bearish'
-            bearish_candles = df['HA_Close'] < df['HA_Open']
-
-            if length == 2:
-                # Current and previous candle are bearish
-                pattern = bearish_candles & bearish_candles.shift(1)
-            elif length == 3:
-                # Current and two previous candles are bearish
-                pattern = bearish_candles & bearish_candles.shift(1) & bearish_candles.shift(2)
-
-        # Replace NaN with False (for the first few candles where shift creates NaN)
-        pattern = pattern.fillna(False)
-
-        return pattern
+        return pd.Series(_consecutive_kernel(candles, length), index=df.index)
 
     except Exception as e:
         logger.error(f"Error detecting consecutive {pattern_type} candles: {e}")
         # Return a series of False values in case of error
         return pd.Series(False, index=df.index)
 
+def _detect_candle_patterns(df: pd.DataFrame, length: int) -> Tuple[pd.Series, pd.Series]:
+    """
+    Detect consecutive bullish and bearish Heikin Ashi candles from a single HA_Close - HA_Open pass
+
+    Args:
+        df: DataFrame with HA_Open and HA_Close columns
+        length: Number of consecutive candles required (2 or 3)
+
+    Returns:
+        Tuple of (bullish, bearish) boolean Series
+    """
+    if length not in [2, 3]:
+        raise ValueError("length must be 2 or 3")
+
+    try:
+        # The sign of the body gives both candle directions; equal open and close is neither
+        body = df['HA_Close'].to_numpy() - df['HA_Open'].to_numpy()
+
+        bullish = _consecutive_kernel(body > 0, length)
+        bearish = _consecutive_kernel(body < 0, length)
+
+        return pd.Series(bullish, index=df.index), pd.Series(bearish, index=df.index)
+
+    except KeyError as e:
+        logger.error(f"Error detecting consecutive candles: {e}")
+        # Return series of False values when the Heikin Ashi columns are missing
+        return pd.Series(False, index=df.index), pd.Series(False, index=df.index)
+
+def _is_no_pattern(candle: Any) -> bool:
+    """Whether a confirmation candles entry is the no-pattern option, given as None or 'None'"""
+    return candle is None or candle == 'None'
+
 def apply_ha_pattern_filter(df: pd.DataFrame, config: Dict[str, Any], candle_pattern: int = None) -> pd.DataFrame:
     """
     Apply Heikin Ashi pattern filters to the DataFrame based on configuration.
@@ -91,7 +119,7 @@ def apply_ha_pattern_filter(df: pd.DataFrame, config: Dict[str, Any], candle_pat
         return df
 
     # Check if None is the active option (use basic HA without pattern filtering)
-    if len(confirmation_candles) == 1 and (confirmation_candles[0] is None or confirmation_candles[0] == 'None' or confirmation_candles[0] == "None"):
+    if len(confirmation_candles) == 1 and _is_no_pattern(confirmation_candles[0]):
         logger.info("Using basic Heikin Ashi conditions without additional pattern filtering")
         return df
 
@@ -115,15 +143,14 @@ def apply_ha_pattern_filter(df: pd.DataFrame, config: Dict[str, Any], candle_pat
         if isinstance(confirmation_candles, list) and len(confirmation_candles) > 0:
             # Get the first non-None value, or default to 2
             for candle in confirmation_candles:
-                if candle is not None and candle != 'None' and candle != "None":
+                if not _is_no_pattern(candle):
                     pattern_length = candle
                     break
         logger.info(f"Using default candle pattern length: {pattern_length}")
 
     try:
         # Detect patterns
-        df['Bullish_Pattern'] = detect_consecutive_candles(df, 'bullish', pattern_length)
-        df['Bearish_Pattern'] = detect_consecutive_candles(df, 'bearish', pattern_length)
+        df['Bullish_Pattern'], df['Bearish_Pattern'] = _detect_candle_patterns(df, pattern_length)
 
         logger.info(f"Applied Heikin Ashi pattern filter with {pattern_length}-candle confirmation")
 
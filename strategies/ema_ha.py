@@ -2,6 +2,8 @@ from typing import Dict, Tuple, List, Any, Optional, Union
 import pandas as pd
 import numpy as np
 import logging
+from enum import IntEnum
+from numba import njit
 from utils.logger import setup_logger
 from patterns.patterns import apply_ha_pattern_filter
 
@@ -9,6 +11,208 @@ from patterns.patterns import apply_ha_pattern_filter
 logger = setup_logger(name="ema_ha_strategy", log_level=logging.INFO)
 
 
+@njit(cache=True)
+def _ema_recurrence(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Numba-compiled EMA recurrence, equivalent to ``ewm(span=span, adjust=False).mean()``
+
+    NaN handling follows pandas (ignore_na=False): missing values carry the
+    previous average forward and decay its weight for the next observation.
+    """
+    n = values.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+
+    alpha = 2.0 / (span + 1.0)
+    old_wt_factor = 1.0 - alpha
+    weighted = values[0]
+    old_wt = 1.0
+    out[0] = weighted
+
+    for i in range(1, n):
+        cur = values[i]
+        is_observation = cur == cur
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = ((old_wt * weighted) + (alpha * cur)) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted
+
+    return out
+
+
+# Compile the kernel at import so the first backtest doesn't pay the JIT cost
+_ema_recurrence(np.zeros(2, dtype=np.float64), 2)
+
+
+@njit(cache=True)
+def _ha_open_recurrence(ha_close: np.ndarray, first_open: float) -> np.ndarray:
+    """
+    Numba-compiled Heikin Ashi open: the midpoint of the previous candle's HA open and HA close
+    """
+    n = ha_close.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+
+    out[0] = first_open
+    for i in range(1, n):
+        out[i] = (out[i-1] + ha_close[i-1]) / 2
+
+    return out
+
+
+# Compile the kernel at import so the first backtest doesn't pay the JIT cost
+_ha_open_recurrence(np.zeros(2, dtype=np.float64), 0.0)
+
+
+class ExitReason(IntEnum):
+    """Why a backtest trade was closed; the values are the exit codes written by _backtest_kernel"""
+    SIGNAL = 0
+    STOP_LOSS = 1
+    TRAILING_STOP = 2
+    FORCE_EXIT = 3
+
+
+# Exit reason names used in trades and results, indexed by ExitReason
+_EXIT_REASONS = ('Signal', 'StopLoss', 'TrailingStop', 'ForceExit')
+
+
+@njit(cache=True)
+def _backtest_kernel(prices: np.ndarray, signals: np.ndarray, time_of_day: np.ndarray,
+                     market_entry: int, force_exit: int, initial_capital: float,
+                     use_stop_loss: bool, stop_loss_pct: float,
+                     use_trailing_stop: bool, trailing_stop_pct: float):
+    """
+    Numba-compiled per-bar trading loop used by ``EMAHeikinAshiStrategy.backtest``
+
+    Times are nanoseconds since midnight. Positions are 1 (long) and -1 (short);
+    exit codes are ExitReason values.
+
+    Returns:
+        Tuple of (entry_idx, exit_idx, position, pnl, exit_code) arrays with one entry
+        per trade, the capital at the start of every bar, and the final capital
+    """
+    n = prices.shape[0]
+    entry_idx = np.empty(n, dtype=np.int64)
+    exit_idx = np.empty(n, dtype=np.int64)
+    trade_positions = np.empty(n, dtype=np.int8)
+    trade_pnls = np.empty(n, dtype=np.float64)
+    exit_codes = np.empty(n, dtype=np.int8)
+    capital_before = np.empty(n, dtype=np.float64)
+
+    n_trades = 0
+    position = 0
+    capital = initial_capital
+    entry_price = 0.0
+    entry_bar = 0
+    highest_price_since_entry = 0.0
+    lowest_price_since_entry = np.inf
+
+    for i in range(n):
+        current_price = prices[i]
+        capital_before[i] = capital
+
+        # Update trailing stop values if in a position
+        if position == 1:
+            if current_price > highest_price_since_entry:
+                highest_price_since_entry = current_price
+        elif position == -1:
+            if current_price < lowest_price_since_entry:
+                lowest_price_since_entry = current_price
+
+        # Check for stop loss or trailing stop if in a position
+        stop_loss_triggered = False
+        trailing_stop_triggered = False
+
+        if position != 0 and use_stop_loss:
+            if position == 1:
+                if current_price <= entry_price * (1 - stop_loss_pct / 100):
+                    stop_loss_triggered = True
+            elif current_price >= entry_price * (1 + stop_loss_pct / 100):
+                stop_loss_triggered = True
+
+        if position != 0 and use_trailing_stop and not stop_loss_triggered:
+            if position == 1:
+                trail_price = highest_price_since_entry * (1 - trailing_stop_pct / 100)
+                if current_price <= trail_price and highest_price_since_entry > entry_price:
+                    trailing_stop_triggered = True
+            else:
+                trail_price = lowest_price_since_entry * (1 + trailing_stop_pct / 100)
+                if current_price >= trail_price and lowest_price_since_entry < entry_price:
+                    trailing_stop_triggered = True
+
+        # Force exit first, then stops, then signal reversal
+        exit_code = -1
+        if position != 0:
+            if time_of_day[i] >= force_exit:
+                exit_code = ExitReason.FORCE_EXIT.value
+            elif stop_loss_triggered:
+                exit_code = ExitReason.STOP_LOSS.value
+            elif trailing_stop_triggered:
+                exit_code = ExitReason.TRAILING_STOP.value
+            elif (position == 1 and signals[i] == -1) or (position == -1 and signals[i] == 1):
+                exit_code = ExitReason.SIGNAL.value
+
+        if exit_code >= 0:
+            if position == 1:
+                pnl = (current_price - entry_price) * capital / entry_price
+            else:
+                pnl = (entry_price - current_price) * capital / entry_price
+
+            entry_idx[n_trades] = entry_bar
+            exit_idx[n_trades] = i
+            trade_positions[n_trades] = position
+            trade_pnls[n_trades] = pnl
+            exit_codes[n_trades] = exit_code
+            n_trades += 1
+
+            capital += pnl
+            position = 0
+
+            # Only a signal exit allows a new entry on the same bar
+            if exit_code != ExitReason.SIGNAL.value:
+                continue
+
+        # Check for new entries after market_entry time
+        if position == 0 and time_of_day[i] >= market_entry and time_of_day[i] < force_exit:
+            if signals[i] == 1:
+                position = 1
+                entry_price = current_price
+                entry_bar = i
+                highest_price_since_entry = current_price
+            elif signals[i] == -1:
+                position = -1
+                entry_price = current_price
+                entry_bar = i
+                lowest_price_since_entry = current_price
+
+    return (entry_idx[:n_trades], exit_idx[:n_trades], trade_positions[:n_trades],
+            trade_pnls[:n_trades], exit_codes[:n_trades], capital_before, capital)
+
+
+# Compile the kernel at import so the first backtest doesn't pay the JIT cost
+_backtest_kernel(np.zeros(2, dtype=np.float64), np.zeros(2, dtype=np.int8), np.zeros(2, dtype=np.int64),
+                 0, 1, 1.0, True, 1.0, True, 1.0)
+
+
+def _time_of_day_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return the wall-clock time of each timestamp as nanoseconds since midnight (microsecond precision)"""
+    seconds = (index.hour * 60 + index.minute) * 60 + index.second
+    return (seconds.to_numpy(dtype=np.int64) * 1_000_000 + index.microsecond.to_numpy(dtype=np.int64)) * 1000
+
+
+def _session_time_ns(session_time) -> int:
+    """Return a datetime.time as nanoseconds since midnight"""
+    seconds = (session_time.hour * 60 + session_time.minute) * 60 + session_time.second
+    return (seconds * 1_000_000 + session_time.microsecond) * 1000
+
+
 def try_format_timestamp(timestamp):
     """Try to format a timestamp to string, with fallback for non-convertible values."""
     try:
@@ -17,6 +221,13 @@ def try_format_timestamp(timestamp):
         # If conversion fails, return the string representation
         return str(timestamp)
 
+def format_timestamps(timestamps: np.ndarray) -> List[str]:
+    """Format an array of timestamps as strings in one call, falling back to try_format_timestamp."""
+    try:
+        return pd.DatetimeIndex(timestamps).strftime('%Y-%m-%d %H:%M:%S').tolist()
+    except (ValueError, TypeError):
+        return [try_format_timestamp(timestamp) for timestamp in timestamps]
+
 class EMAHeikinAshiStrategy:
     def __init__(self, ema_short: int, ema_long: int, config: Dict[str, Any] = None, seed: int = None, deterministic: bool = False):
         """
@@ -119,6 +330,7 @@ class EMAHeikinAshiStrategy:
             self.stop_loss_pct = risk_config.get('stop_loss_pct', 1.0)
             self.use_trailing_stop = risk_config.get('use_trailing_stop', False)
             self.trailing_stop_pct = risk_config.get('trailing_stop_pct', 0.5)
+            self.drawdown_window = risk_config.get('drawdown_window')
 
             # TODO: Implement max_trades_per_day and max_risk_per_trade features
             # max_trades_per_day would limit the number of trades per day
@@ -140,7 +352,8 @@ class EMAHeikinAshiStrategy:
     @staticmethod
     def calculate_ema(prices: pd.Series, period: int) -> pd.Series:
         """Calculate Exponential Moving Average"""
-        return prices.ewm(span=period, adjust=False).mean()
+        values = prices.to_numpy(dtype=np.float64, copy=False)
+        return pd.Series(_ema_recurrence(values, period), index=prices.index, name=prices.name)
 
     @staticmethod
     def calculate_heikin_ashi(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
@@ -160,19 +373,8 @@ class EMAHeikinAshiStrategy:
             # Calculate first HA Open value
             first_open = (df['open'].iloc[0] + df['close'].iloc[0]) / 2
 
-            # Pre-allocate HA Open array with the first value
-            ha_open_values = np.zeros(len(df))
-            ha_open_values[0] = first_open
-
-            # Get ha_close values as numpy array for faster computation
-            ha_close_values = ha_close.values
-
-            # Use numpy's cumulative operations for vectorized calculation
-            # This is much faster than a loop for large datasets
-            if len(df) > 1:
-                # Calculate the average of previous HA open and close for each position
-                for i in range(1, len(df)):
-                    ha_open_values[i] = (ha_open_values[i-1] + ha_close_values[i-1]) / 2
+            # HA Open depends on the previous candle, so run the recurrence in the compiled kernel
+            ha_open_values = _ha_open_recurrence(ha_close.to_numpy(dtype=np.float64), first_open)
 
             # Convert back to pandas Series
             ha_open = pd.Series(ha_open_values, index=df.index)
@@ -183,59 +385,168 @@ class EMAHeikinAshiStrategy:
             logger.error(f"Error calculating Heikin Ashi candles: {e}")
             raise
 
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Generate trading signals using EMA crossover and Heikin Ashi based on trading mode"""
-        # Calculate Heikin Ashi
-        df['HA_Open'], df['HA_Close'] = self.calculate_heikin_ashi(df)
+    @staticmethod
+    def precompute_indicators(df: pd.DataFrame, ema_periods: List[int]) -> pd.DataFrame:
+        """
+        Compute Heikin Ashi candles and EMAs once so a parameter sweep can reuse them
 
-        # Calculate EMAs
-        df['EMA_Short'] = self.calculate_ema(df['close'], self.ema_short)
-        df['EMA_Long'] = self.calculate_ema(df['close'], self.ema_long)
+        Args:
+            df: DataFrame with OHLC price data
+            ema_periods: EMA periods required by the sweep
 
-        # Initialize signals
-        df['Signal'] = 0
+        Returns:
+            DataFrame with HA_Open, HA_Close and one EMA_<period> column per period
+        """
+        ha_open, ha_close = EMAHeikinAshiStrategy.calculate_heikin_ashi(df)
+        indicators = {'HA_Open': ha_open, 'HA_Close': ha_close}
+        for period in sorted(set(ema_periods)):
+            indicators[f'EMA_{period}'] = EMAHeikinAshiStrategy.calculate_ema(df['close'], period)
 
-        # Apply Heikin Ashi pattern filter if enabled
-        df = apply_ha_pattern_filter(df, self.config)
+        return df.assign(**indicators)
+
+    def _get_ema(self, df: pd.DataFrame, period: int) -> pd.Series:
+        """Return the precomputed EMA column for a period, calculating it if absent"""
+        column = f'EMA_{period}'
+        if column in df.columns:
+            return df[column]
+        return self.calculate_ema(df['close'], period)
+
+    def _get_heikin_ashi(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return Heikin Ashi candles with any configured pattern confirmation columns
+
+        Uses precomputed HA_Open/HA_Close columns when present. The result is a new
+        frame, so pattern columns are never read from or written to the input.
+        """
+        if 'HA_Open' in df.columns and 'HA_Close' in df.columns:
+            ha_open, ha_close = df['HA_Open'], df['HA_Close']
+        else:
+            ha_open, ha_close = self.calculate_heikin_ashi(df)
+        ha = pd.DataFrame({'HA_Open': ha_open, 'HA_Close': ha_close}, index=df.index)
+        return apply_ha_pattern_filter(ha, self.config)
+
+    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Generate trading signals using EMA crossover and Heikin Ashi based on trading mode
+
+        The input DataFrame is not modified; a new frame with the indicator and
+        Signal columns added is returned.
+        """
+        # Heikin Ashi candles and pattern confirmation (reuses precomputed HA columns)
+        ha = self._get_heikin_ashi(df)
+
+        # Calculate EMAs
+        ema_short = self._get_ema(df, self.ema_short)
+        ema_long = self._get_ema(df, self.ema_long)
 
         # Always use Heikin Ashi conditions with EMA crossover
         # This is the basic signal generation that applies to all modes
         long_condition = (
-            (df['EMA_Short'] > df['EMA_Long']) &
-            (df['EMA_Short'].shift(1) <= df['EMA_Long'].shift(1)) &
-            (df['HA_Close'] > df['HA_Open'])  # Heikin Ashi bullish
+            (ema_short > ema_long) &
+            (ema_short.shift(1) <= ema_long.shift(1)) &
+            (ha['HA_Close'] > ha['HA_Open'])  # Heikin Ashi bullish
         )
 
         short_condition = (
-            (df['EMA_Short'] < df['EMA_Long']) &
-            (df['EMA_Short'].shift(1) >= df['EMA_Long'].shift(1)) &
-            (df['HA_Close'] < df['HA_Open'])  # Heikin Ashi bearish
+            (ema_short < ema_long) &
+            (ema_short.shift(1) >= ema_long.shift(1)) &
+            (ha['HA_Close'] < ha['HA_Open'])  # Heikin Ashi bearish
         )
 
         # Apply additional pattern filtering if pattern columns exist
         # The ha_patterns.py module will handle the None case and not add these columns
-        if 'Bullish_Pattern' in df.columns:
-            long_condition = long_condition & df['Bullish_Pattern']
+        if 'Bullish_Pattern' in ha.columns:
+            long_condition = long_condition & ha['Bullish_Pattern']
 
-        if 'Bearish_Pattern' in df.columns:
-            short_condition = short_condition & df['Bearish_Pattern']
+        if 'Bearish_Pattern' in ha.columns:
+            short_condition = short_condition & ha['Bearish_Pattern']
 
-        # Apply signals based on trading mode
+        # Apply signals based on trading mode; values are only -1/0/1 so int8 is enough
+        has_close = df['close'].notna()
+        signal = np.zeros(len(df), dtype=np.int8)
         if self.trading_mode in ['BUY', 'SWING']:
-            df.loc[long_condition & df['close'].notna(), 'Signal'] = 1
+            signal[(long_condition & has_close).to_numpy()] = 1
 
         if self.trading_mode in ['SELL', 'SWING']:
-            df.loc[short_condition & df['close'].notna(), 'Signal'] = -1
+            signal[(short_condition & has_close).to_numpy()] = -1
 
-        return df
+        new_columns = dict(ha.items())
+        new_columns.update({'EMA_Short': ema_short, 'EMA_Long': ema_long, 'Signal': signal})
+        return df.assign(**new_columns)
 
-    def backtest(self, df: pd.DataFrame, initial_capital: float = 25000) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    def generate_signals_batch(self, df: pd.DataFrame, ema_pairs: List[Tuple[int, int]]) -> Dict[Tuple[int, int], np.ndarray]:
+        """
+        Generate signals for several EMA pairs in one pass over the data
+
+        Heikin Ashi candles, pattern filters and each distinct EMA are computed once
+        into NumPy arrays, and every pair's signal is derived from slices of those
+        arrays without copying the DataFrame. The strategy's trading mode and pattern
+        configuration apply to all pairs.
+
+        Args:
+            df: DataFrame with OHLC price data (not modified)
+            ema_pairs: (short, long) EMA periods to generate signals for
+
+        Returns:
+            Dictionary mapping each (short, long) pair to an int8 array of -1/0/1 signals
+        """
+        n = len(df)
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        # Heikin Ashi and pattern confirmation are shared by all pairs
+        ha = self._get_heikin_ashi(df)
+
+        ha_open_values = ha['HA_Open'].to_numpy(dtype=np.float64)
+        ha_close_values = ha['HA_Close'].to_numpy(dtype=np.float64)
+        has_close = ~np.isnan(close)
+        long_filter = (ha_close_values > ha_open_values) & has_close
+        short_filter = (ha_close_values < ha_open_values) & has_close
+        if 'Bullish_Pattern' in ha.columns:
+            long_filter &= ha['Bullish_Pattern'].to_numpy(dtype=bool)
+        if 'Bearish_Pattern' in ha.columns:
+            short_filter &= ha['Bearish_Pattern'].to_numpy(dtype=bool)
+
+        # One column per distinct EMA period
+        pairs = [(int(short), int(long)) for short, long in ema_pairs]
+        periods = sorted({period for pair in pairs for period in pair})
+        column = {period: i for i, period in enumerate(periods)}
+        ema_matrix = np.empty((n, len(periods)), dtype=np.float64)
+        for period, i in column.items():
+            precomputed = f'EMA_{period}'
+            if precomputed in df.columns:
+                ema_matrix[:, i] = df[precomputed].to_numpy(dtype=np.float64)
+            else:
+                ema_matrix[:, i] = _ema_recurrence(close, period)
+
+        signals = {}
+        for short, long in pairs:
+            ema_short = ema_matrix[:, column[short]]
+            ema_long = ema_matrix[:, column[long]]
+
+            # Crossovers compare each bar with the previous one; the first bar has no predecessor
+            cross_up = np.zeros(n, dtype=bool)
+            cross_down = np.zeros(n, dtype=bool)
+            cross_up[1:] = (ema_short[1:] > ema_long[1:]) & (ema_short[:-1] <= ema_long[:-1])
+            cross_down[1:] = (ema_short[1:] < ema_long[1:]) & (ema_short[:-1] >= ema_long[:-1])
+
+            signal = np.zeros(n, dtype=np.int8)
+            if self.trading_mode in ['BUY', 'SWING']:
+                signal[cross_up & long_filter] = 1
+            if self.trading_mode in ['SELL', 'SWING']:
+                signal[cross_down & short_filter] = -1
+            signals[(short, long)] = signal
+
+        return signals
+
+    def backtest(self, df: pd.DataFrame, initial_capital: float = 25000,
+                 signals: Optional[np.ndarray] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """
         Run backtest with performance optimizations and risk management
 
         Args:
             df: DataFrame with market data
             initial_capital: Initial capital amount
+            signals: Precomputed signals for this EMA pair (from generate_signals_batch)
 
         Returns:
             Tuple of (results_dict, trades_list)
@@ -256,13 +567,18 @@ class EMAHeikinAshiStrategy:
                 random.seed(self.seed)
                 np.random.seed(self.seed)
 
-            # Generate signals
-            df = self.generate_signals(df)
+            # Generate signals unless they were computed for a batch of pairs
+            if signals is None:
+                df = self.generate_signals(df)
+            else:
+                df = df[['close']].assign(Signal=signals)
 
-            # Filter data to only include trading hours for faster processing
-            # Create a mask for trading hours
-            trading_hours_mask = [(t.time() >= self.market_open and t.time() <= self.market_close) for t in df.index]
-            df_trading = df[trading_hours_mask].copy()
+            # Filter data to only include trading hours for faster processing,
+            # comparing each bar's time of day to the session bounds as integers
+            time_of_day = _time_of_day_ns(df.index)
+            trading_hours_mask = ((time_of_day >= _session_time_ns(self.market_open)) &
+                                  (time_of_day <= _session_time_ns(self.market_close)))
+            df_trading = df[trading_hours_mask]
 
             if len(df_trading) == 0:
                 logger.warning("No data within trading hours")
@@ -274,242 +590,63 @@ class EMAHeikinAshiStrategy:
                     'return_pct': 0.0,
                 }, []
 
-            # Pre-allocate lists for better performance
-            # Use dictionaries of lists instead of list of dictionaries for better performance
-            trade_entry_times = []
-            trade_exit_times = []
-            trade_entry_prices = []
-            trade_exit_prices = []
-            trade_position_types = []
-            trade_pnls = []
-            trade_durations = []
-            trade_exit_reasons = []
-
-            # Pre-calculate time objects for comparison (faster than creating them in the loop)
-            market_entry_time = self.market_entry
-            force_exit_time = self.force_exit
-
-            # Trading state variables
-            position_type = None
-            capital = initial_capital
-            peak_capital = initial_capital
-            entry_price = 0
-            entry_time = None
-            current_month = None
-            month_start_capital = initial_capital
-
-            # For trailing stop
-            highest_price_since_entry = 0
-            lowest_price_since_entry = float('inf')
-
-            # For monthly returns tracking
-            monthly_returns = {}
-
             logger.info(f"Starting backtest with {len(df_trading)} candles in trading hours from {initial_capital} capital")
 
-            # Get numpy arrays for faster access in the loop
+            # Run the per-bar trading loop on NumPy arrays
+            prices = df_trading['close'].to_numpy(dtype=np.float64)
+            (entry_idx, exit_idx, trade_positions, pnl_values, exit_codes,
+             capital_before, capital) = _backtest_kernel(
+                prices,
+                df_trading['Signal'].to_numpy(dtype=np.int8),
+                time_of_day[trading_hours_mask],
+                _session_time_ns(self.market_entry),
+                _session_time_ns(self.force_exit),
+                float(initial_capital),
+                bool(self.use_stop_loss),
+                float(self.stop_loss_pct),
+                bool(self.use_trailing_stop),
+                float(self.trailing_stop_pct)
+            )
+            capital = float(capital)
+
+            # Monthly returns from the capital at the first bar of each month
+            month_ids = (df_trading.index.year * 12 + df_trading.index.month - 1).to_numpy()
+            month_starts = np.flatnonzero(np.r_[True, month_ids[1:] != month_ids[:-1]])
+            start_capital = capital_before[month_starts]
+            end_capital = np.append(capital_before[month_starts[1:]], capital)
+            monthly_returns = {}
+            for month_id, monthly_return in zip(month_ids[month_starts].tolist(),
+                                                ((end_capital - start_capital) / start_capital * 100).tolist()):
+                monthly_returns[f"{month_id // 12:04d}-{month_id % 12 + 1:02d}"] = monthly_return
+
+            # Convert the trade arrays to a list of dictionaries, formatting
+            # timestamps and computing durations (in minutes) for all trades at once
+            num_trades = len(pnl_values)
             dates = df_trading.index.values
-            times = np.array([d.time() for d in df_trading.index])
-            prices = df_trading['close'].values
-            signals = df_trading['Signal'].values
-
-            # Main backtest loop
-            for i in range(len(df_trading)):
-                current_time = times[i]
-                current_price = prices[i]
-                current_date = dates[i]
-
-                # Track monthly returns
-                try:
-                    this_month = pd.Timestamp(current_date).strftime('%Y-%m')
-                    if this_month != current_month:
-                        if current_month is not None:
-                            monthly_return = (capital - month_start_capital) / month_start_capital * 100
-                            monthly_returns[current_month] = monthly_return
-                        current_month = this_month
-                        month_start_capital = capital
-                except (ValueError, TypeError):
-                    # Handle conversion errors by using string representation
-                    try:
-                        this_month = str(current_date)[:7]  # Extract YYYY-MM from date string
-                        if this_month != current_month:
-                            if current_month is not None:
-                                monthly_return = (capital - month_start_capital) / month_start_capital * 100
-                                monthly_returns[current_month] = monthly_return
-                            current_month = this_month
-                            month_start_capital = capital
-                    except Exception as e:
-                        logger.warning(f"Could not process date for monthly returns: {e}")
-
-                # Update trailing stop values if in a position
-                if position_type == 'LONG':
-                    highest_price_since_entry = max(highest_price_since_entry, current_price)
-                elif position_type == 'SHORT':
-                    lowest_price_since_entry = min(lowest_price_since_entry, current_price)
-
-                # Check for stop loss or trailing stop if in a position
-                stop_loss_triggered = False
-                trailing_stop_triggered = False
-
-                if position_type and self.use_stop_loss:
-                    # Calculate stop loss price
-                    if position_type == 'LONG':
-                        stop_price = entry_price * (1 - self.stop_loss_pct/100)
-                        if current_price <= stop_price:
-                            stop_loss_triggered = True
-                    else:  # SHORT
-                        stop_price = entry_price * (1 + self.stop_loss_pct/100)
-                        if current_price >= stop_price:
-                            stop_loss_triggered = True
-
-                if position_type and self.use_trailing_stop and not stop_loss_triggered:
-                    # Calculate trailing stop price
-                    if position_type == 'LONG':
-                        trail_price = highest_price_since_entry * (1 - self.trailing_stop_pct/100)
-                        if current_price <= trail_price and highest_price_since_entry > entry_price:
-                            trailing_stop_triggered = True
-                    else:  # SHORT
-                        trail_price = lowest_price_since_entry * (1 + self.trailing_stop_pct/100)
-                        if current_price >= trail_price and lowest_price_since_entry < entry_price:
-                            trailing_stop_triggered = True
-
-                # Force exit at force_exit time
-                if position_type and current_time >= force_exit_time:
-                    exit_price = current_price
-                    # Calculate PnL based on position type
-                    pnl = (exit_price - entry_price) * capital / entry_price if position_type == 'LONG' else \
-                          (entry_price - exit_price) * capital / entry_price
-
-                    # Record trade
-                    trade_entry_times.append(entry_time)
-                    trade_exit_times.append(current_date)
-                    trade_entry_prices.append(float(entry_price))
-                    trade_exit_prices.append(float(exit_price))
-                    trade_position_types.append(position_type)
-                    trade_pnls.append(float(pnl))
-                    try:
-                        duration = float((pd.Timestamp(current_date) - entry_time).total_seconds() / 60)
-                    except (ValueError, TypeError):
-                        # Fallback to a default duration if conversion fails
-                        duration = 0.0
-                        logger.warning(f"Could not calculate trade duration for exit at {current_date}")
-                    trade_durations.append(duration)
-                    trade_exit_reasons.append('ForceExit')
-
-                    capital += pnl
-                    peak_capital = max(peak_capital, capital)
-                    position_type = None
-                    continue
-
-                # Check for stop loss or trailing stop exit
-                if stop_loss_triggered or trailing_stop_triggered:
-                    exit_price = current_price
-                    # Calculate PnL based on position type
-                    pnl = (exit_price - entry_price) * capital / entry_price if position_type == 'LONG' else \
-                          (entry_price - exit_price) * capital / entry_price
-
-                    exit_reason = 'StopLoss' if stop_loss_triggered else 'TrailingStop'
-
-                    # Record trade
-                    trade_entry_times.append(entry_time)
-                    trade_exit_times.append(current_date)
-                    trade_entry_prices.append(float(entry_price))
-                    trade_exit_prices.append(float(exit_price))
-                    trade_position_types.append(position_type)
-                    trade_pnls.append(float(pnl))
-                    try:
-                        duration = float((pd.Timestamp(current_date) - entry_time).total_seconds() / 60)
-                    except (ValueError, TypeError):
-                        # Fallback to a default duration if conversion fails
-                        duration = 0.0
-                        logger.warning(f"Could not calculate trade duration for exit at {current_date}")
-                    trade_durations.append(duration)
-                    trade_exit_reasons.append(exit_reason)
-
-                    capital += pnl
-                    peak_capital = max(peak_capital, capital)
-                    position_type = None
-                    continue
-
-                # Check for signal-based exits
-                if position_type:
-                    current_signal = signals[i]
-                    exit_condition = (
-                        (position_type == 'LONG' and current_signal == -1) or
-                        (position_type == 'SHORT' and current_signal == 1)
-                    )
-                    if exit_condition:
-                        exit_price = current_price
-                        # Calculate PnL based on position type
-                        pnl = (exit_price - entry_price) * capital / entry_price if position_type == 'LONG' else \
-                              (entry_price - exit_price) * capital / entry_price
-
-                        # Record trade
-                        trade_entry_times.append(entry_time)
-                        trade_exit_times.append(current_date)
-                        trade_entry_prices.append(float(entry_price))
-                        trade_exit_prices.append(float(exit_price))
-                        trade_position_types.append(position_type)
-                        trade_pnls.append(float(pnl))
-                        try:
-                            duration = float((pd.Timestamp(current_date) - entry_time).total_seconds() / 60)
-                        except (ValueError, TypeError):
-                            # Fallback to a default duration if conversion fails
-                            duration = 0.0
-                            logger.warning(f"Could not calculate trade duration for exit at {current_date}")
-                        trade_durations.append(duration)
-                        trade_exit_reasons.append('Signal')
-
-                        capital += pnl
-                        peak_capital = max(peak_capital, capital)
-                        position_type = None
-
-                # Check for new entries after market_entry time
-                if not position_type and current_time >= market_entry_time and current_time < force_exit_time:
-                    current_signal = signals[i]
-                    if current_signal == 1:
-                        position_type = 'LONG'
-                        entry_price = current_price
-                        try:
-                            entry_time = pd.Timestamp(current_date)
-                        except (ValueError, TypeError):
-                            # Fallback to using the current date as a string
-                            entry_time = str(current_date)
-                            logger.warning(f"Could not convert entry time {current_date} to Timestamp")
-                        highest_price_since_entry = current_price  # Reset for trailing stop
-
-                    elif current_signal == -1:
-                        position_type = 'SHORT'
-                        entry_price = current_price
-                        try:
-                            entry_time = pd.Timestamp(current_date)
-                        except (ValueError, TypeError):
-                            # Fallback to using the current date as a string
-                            entry_time = str(current_date)
-                            logger.warning(f"Could not convert entry time {current_date} to Timestamp")
-                        lowest_price_since_entry = current_price  # Reset for trailing stop
-
-            # Add final month's return
-            if current_month is not None:
-                monthly_return = (capital - month_start_capital) / month_start_capital * 100
-                monthly_returns[current_month] = monthly_return
-
-            # Convert trade data to list of dictionaries
-            num_trades = len(trade_entry_times)
-            trades = []
-
-            if num_trades > 0:
-                for i in range(num_trades):
-                    trades.append({
-                        'entry_time': try_format_timestamp(trade_entry_times[i]),
-                        'exit_time': try_format_timestamp(trade_exit_times[i]),
-                        'entry_price': trade_entry_prices[i],
-                        'exit_price': trade_exit_prices[i],
-                        'position_type': trade_position_types[i],
-                        'pnl': trade_pnls[i],
-                        'duration': trade_durations[i],
-                        'exit_reason': trade_exit_reasons[i]
-                    })
+            entry_times = dates[entry_idx]
+            exit_times = dates[exit_idx]
+            trade_entry_prices = prices[entry_idx].tolist()
+            trade_exit_prices = prices[exit_idx].tolist()
+            trade_position_types = ['LONG' if position == 1 else 'SHORT' for position in trade_positions.tolist()]
+            trade_exit_reasons = [_EXIT_REASONS[code] for code in exit_codes.tolist()]
+            trade_durations = ((exit_times - entry_times) / np.timedelta64(1, 'm')).tolist()
+            trades = [
+                {
+                    'entry_time': entry_time_str,
+                    'exit_time': exit_time_str,
+                    'entry_price': trade_entry_price,
+                    'exit_price': trade_exit_price,
+                    'position_type': trade_position_type,
+                    'pnl': trade_pnl,
+                    'duration': trade_duration,
+                    'exit_reason': trade_exit_reason
+                }
+                for (entry_time_str, exit_time_str, trade_entry_price, trade_exit_price,
+                     trade_position_type, trade_pnl, trade_duration, trade_exit_reason) in zip(
+                    format_timestamps(entry_times), format_timestamps(exit_times),
+                    trade_entry_prices, trade_exit_prices, trade_position_types,
+                    pnl_values.tolist(), trade_durations, trade_exit_reasons)
+            ]
 
             # Calculate metrics
             if not trades:
@@ -525,28 +662,33 @@ class EMAHeikinAshiStrategy:
             monthly_returns_arr = np.array(list(monthly_returns.values()))
 
             # Count exit reasons
-            exit_reasons = {}
-            for reason in trade_exit_reasons:
-                exit_reasons[reason] = exit_reasons.get(reason, 0) + 1
+            exit_counts = np.bincount(exit_codes, minlength=len(ExitReason))
+            exit_reasons = {_EXIT_REASONS[code]: count for code, count in enumerate(exit_counts.tolist()) if count}
 
             # Calculate drawdown
-            equity_curve = np.zeros(num_trades + 1)
+            equity_curve = np.empty(num_trades + 1, dtype=np.float64)
             equity_curve[0] = initial_capital
-            equity_curve[1:] = np.cumsum(trade_pnls) + initial_capital
-
-            # Calculate running maximum for drawdown calculation
-            running_max = np.maximum.accumulate(equity_curve)
-            drawdowns = (running_max - equity_curve) / running_max * 100
-            max_drawdown_pct = np.max(drawdowns) if len(drawdowns) > 0 else 0
+            np.cumsum(pnl_values, out=equity_curve[1:])
+            equity_curve[1:] += initial_capital
+
+            # Calculate drawdown from the running maximum, or from the highest
+            # equity within the configured number of trades
+            if self.drawdown_window is not None:
+                from backtest.utils import windowed_max_drawdown
+                max_drawdown_pct = windowed_max_drawdown(equity_curve, self.drawdown_window)
+            else:
+                running_max = np.maximum.accumulate(equity_curve)
+                drawdowns = (running_max - equity_curve) / running_max * 100
+                max_drawdown_pct = np.max(drawdowns) if len(drawdowns) > 0 else 0
 
             # Calculate win rate and profit metrics
-            winning_trades_mask = np.array(trade_pnls) > 0
+            winning_trades_mask = pnl_values > 0
             num_winning_trades = np.sum(winning_trades_mask)
             win_rate = num_winning_trades / num_trades if num_trades > 0 else 0
 
             # Calculate profit factor
-            winning_pnl_sum = np.sum(np.array(trade_pnls)[winning_trades_mask]) if num_winning_trades > 0 else 0
-            losing_pnl_sum = np.abs(np.sum(np.array(trade_pnls)[~winning_trades_mask])) if num_trades - num_winning_trades > 0 else 0
+            winning_pnl_sum = np.sum(pnl_values[winning_trades_mask]) if num_winning_trades > 0 else 0
+            losing_pnl_sum = np.abs(np.sum(pnl_values[~winning_trades_mask])) if num_trades - num_winning_trades > 0 else 0
             profit_factor = winning_pnl_sum / losing_pnl_sum if losing_pnl_sum > 0 else float('inf')
 
             # Get pattern length if available
@@ -5,6 +5,10 @@ Common test fixtures for the EMA-HA strategy tests.
 import pytest
 import pandas as pd
 import numpy as np
+import yaml
+
+# Dump test configs with the libyaml emitter when PyYAML was built with it
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
 
 def create_sample_config():
     """Create a sample configuration for testing."""
@@ -43,14 +47,15 @@ def create_sample_config():
 
 def create_sample_data():
     """Create sample market data for testing."""
+    rng = np.random.default_rng(0)
     dates = pd.date_range(start='2023-01-01', periods=100, freq='1min')
     data = pd.DataFrame({
         'date': dates,
-        'open': np.random.rand(100) * 100 + 100,
-        'high': np.random.rand(100) * 100 + 150,
-        'low': np.random.rand(100) * 100 + 50,
-        'close': np.random.rand(100) * 100 + 100,
-        'volume': np.random.randint(1000, 10000, 100)
+        'open': rng.random(100) * 100 + 100,
+        'high': rng.random(100) * 100 + 150,
+        'low': rng.random(100) * 100 + 50,
+        'close': rng.random(100) * 100 + 100,
+        'volume': rng.integers(1000, 10000, 100)
     })
     data.set_index('date', inplace=True)
     return data
@@ -7,46 +7,36 @@ import os
 import tempfile
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import yaml
 import json
 from pathlib import Path
 
-import os
-import sys
-
-# Add parent directory to path to import modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
 from strategies.ema_ha import EMAHeikinAshiStrategy
 from backtest.utils import load_config, load_data, save_results
 from utils.config_validator import validate_config
+from tests.fixtures import YamlDumper
 
 # Create sample data for testing
 def create_sample_data(periods=100):
     """Create sample market data for testing"""
-    start_date = datetime(2023, 1, 1, 9, 15)
-    dates = [start_date + timedelta(minutes=i) for i in range(periods)]
-
-    # Create a simple uptrend followed by a downtrend
-    close_prices = []
-    for i in range(periods):
-        if i < periods // 2:
-            # Uptrend with some noise
-            price = 100 + i * 0.5 + np.random.normal(0, 0.2)
-        else:
-            # Downtrend with some noise
-            price = 100 + (periods // 2) * 0.5 - (i - periods // 2) * 0.3 + np.random.normal(0, 0.2)
-        close_prices.append(price)
+    dates = pd.date_range(start='2023-01-01 09:15', periods=periods, freq='1min')
+
+    rng = np.random.default_rng(0)
+
+    # Create a simple uptrend followed by a downtrend, with some noise
+    i = np.arange(periods)
+    half = periods // 2
+    trend = np.where(i < half, i * 0.5, half * 0.5 - (i - half) * 0.3)
+    close_prices = 100 + trend + rng.normal(0, 0.2, periods)
 
     # Create OHLC data
     data = pd.DataFrame({
         'date': dates,
         'open': close_prices,
-        'high': [p + np.random.uniform(0.1, 0.5) for p in close_prices],
-        'low': [p - np.random.uniform(0.1, 0.5) for p in close_prices],
+        'high': close_prices + rng.uniform(0.1, 0.5, periods),
+        'low': close_prices - rng.uniform(0.1, 0.5, periods),
         'close': close_prices,
-        'volume': [np.random.randint(1000, 5000) for _ in range(periods)]
+        'volume': rng.integers(1000, 5000, periods)
     })
 
     return data
@@ -84,11 +74,19 @@ SAMPLE_CONFIG = {
     }
 }
 
+# Serialized once; the sample_config fixture parses it into a fresh nested copy per test
+SAMPLE_CONFIG_JSON = json.dumps(SAMPLE_CONFIG)
+
+@pytest.fixture
+def sample_config():
+    """Return an independent copy of SAMPLE_CONFIG that the test may modify"""
+    return json.loads(SAMPLE_CONFIG_JSON)
+
 @pytest.fixture
 def temp_config_file():
     """Create a temporary configuration file"""
     with tempfile.NamedTemporaryFile(suffix='.yaml', mode='w', delete=False, encoding='utf-8') as temp:
-        yaml.dump(SAMPLE_CONFIG, temp)
+        yaml.dump(SAMPLE_CONFIG, temp, Dumper=YamlDumper)
         temp_path = temp.name
 
     yield temp_path
@@ -169,15 +167,14 @@ def test_end_to_end_workflow(temp_config_file, temp_data_file, temp_results_dir)
             assert 'return_pct' in result
             assert 'max_drawdown_pct' in result
 
-def test_different_trading_modes_integration(temp_data_file):
+def test_different_trading_modes_integration(temp_data_file, sample_config):
     """Test integration with different trading modes"""
     data = load_data(temp_data_file)
 
     # Test all trading modes
     for mode in ['BUY', 'SELL', 'SWING']:
         # Create config with this mode
-        config = SAMPLE_CONFIG.copy()
-        config['strategy'] = SAMPLE_CONFIG['strategy'].copy()
+        config = sample_config
         config['strategy']['trading'] = {'mode': [mode]}
 
         # Run strategy
@@ -5,24 +5,21 @@ Tests for the backtest.utils module.
 import pytest
 import pandas as pd
 import numpy as np
-import os
 import json
 from pathlib import Path
 import tempfile
 import yaml
 import unittest
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, mock_open, MagicMock
 
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from backtest.utils import load_config, load_data, save_results
+from backtest.utils import load_config, load_data, save_results, _atomic_write_text
 
 class TestBacktestUtils:
     """Test cases for backtest.utils module."""
 
+    @patch('os.stat')
     @patch('os.path.exists')
     @patch('builtins.open', new_callable=unittest.mock.mock_open, read_data='''strategy:
   ema_pairs: [[9, 21], [13, 34], [21, 55]]
@@ -38,10 +35,11 @@ data:
   results_folder: data/results
   timeframe: 1min
 ''')
-    def test_load_config(self, mock_open, mock_exists):
+    def test_load_config(self, mock_open, mock_exists, mock_stat):
         """Test loading configuration from a file."""
         # Set up mocks
         mock_exists.return_value = True
+        mock_stat.return_value.st_mtime_ns = 0
 
         # Test loading the config
         config = load_config('config/test_config.yaml')
@@ -94,15 +92,18 @@ data:
         assert 'total_days' in df.attrs
         assert 'total_candles' in df.attrs
 
+    @patch('backtest.utils._ensured_dirs', new_callable=set)
     @patch('backtest.utils.Path.mkdir')
     @patch('backtest.utils.open', new_callable=unittest.mock.mock_open)
-    @patch('backtest.utils.json.dump')
+    @patch('backtest.utils.os.replace')
+    @patch('backtest.utils.json.dumps')
     @patch('backtest.utils.pd.DataFrame')
-    def test_save_results(self, mock_dataframe, mock_json_dump, mock_open, mock_mkdir):
+    def test_save_results(self, mock_dataframe, mock_json_dumps, mock_replace, mock_open, mock_mkdir, ensured_dirs):
         """Test saving backtest results to a file."""
         # Set up mocks
         mock_dataframe_instance = MagicMock()
         mock_dataframe.return_value = mock_dataframe_instance
+        mock_json_dumps.return_value = '{}'
 
         # Create sample results and trades
         results = {
@@ -154,7 +155,82 @@ data:
         # Verify that the necessary functions were called
         mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
         mock_open.assert_called()
-        mock_json_dump.assert_called_once()
+        mock_json_dumps.assert_any_call(results, indent=4)
+        mock_open.return_value.write.assert_called_once_with('{}')
+        # The results are written to a uniquely named temp file beside the results file, then swapped in
+        tmp_file, target = mock_replace.call_args.args
+        assert target == result_files[0]
+        assert tmp_file.parent == result_files[0].parent
+        assert tmp_file.name.startswith(f"{result_files[0].name}.") and tmp_file.name.endswith('.tmp')
+        mock_open.assert_any_call(tmp_file, 'x')
         mock_dataframe_instance.to_csv.assert_called_once()
 
+        # The results directory is only created on the first save
+        with patch('backtest.utils.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = '20230101_120000'
+            save_results(results, trades, 'NIFTY', 9, 21, data_attrs)
+        mock_mkdir.assert_called_once()
+
+        # Every save gets its own temp file, even for the same results file
+        assert mock_replace.call_args_list[0].args[0] != mock_replace.call_args_list[1].args[0]
+        assert ensured_dirs == {str(Path.cwd() / 'data' / 'results')}
+
+
+
+    def test_atomic_write_concurrent_writers(self, tmp_path):
+        """Test that concurrent writers of one file never lose each other's temp file."""
+        target = tmp_path / 'results.json'
+
+        def write_many(worker):
+            for i in range(50):
+                _atomic_write_text(target, json.dumps({'worker': worker, 'i': i}))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write_many, range(4)))
+
+        # The file holds one complete write, and no temp files are left behind
+        assert json.loads(target.read_text())['i'] == 49
+        assert [path.name for path in tmp_path.iterdir()] == ['results.json']
+
+    def test_save_results_parquet(self, tmp_path, monkeypatch):
+        """Test writing trades as both CSV and parquet."""
+        pq = pytest.importorskip('pyarrow.parquet')
+        monkeypatch.chdir(tmp_path)
+
+        trades = [
+            {'entry_time': '2023-01-02 09:30:00', 'position_type': 'LONG', 'pnl': 150.5, 'exit_reason': 'Signal'},
+            {'entry_time': '2023-01-02 10:30:00', 'position_type': 'SHORT', 'pnl': -20.0, 'exit_reason': 'StopLoss'}
+        ]
+        data_attrs = {'start_date': '2023-01-02', 'end_date': '2023-01-02', 'total_days': 1, 'total_candles': 375}
+
+        results_file, trades_file = save_results({}, trades, 'NIFTY', 9, 21, data_attrs,
+                                                 trade_formats=['csv', 'parquet'])
+
+        assert trades_file.suffix == '.csv'
+        assert results_file.exists()
+        assert pq.read_table(trades_file.with_suffix('.parquet')).to_pylist() == trades
+        pd.testing.assert_frame_equal(pd.read_csv(trades_file), pd.DataFrame(trades))
+
+    def test_save_results_mode_and_pattern_filenames(self, tmp_path, monkeypatch):
+        """Test that runs differing only in mode or pattern save to different files in the same second."""
+        monkeypatch.chdir(tmp_path)
+        data_attrs = {'start_date': '2023-01-02', 'end_date': '2023-01-02', 'total_days': 1, 'total_candles': 375}
+
+        runs = [('BUY', None), ('SELL', None), ('BUY', 2), ('BUY', 'None')]
+        with patch('backtest.utils.datetime') as mock_datetime:
+            mock_datetime.now.return_value.strftime.return_value = '20230101_120000'
+            saved = [save_results({}, [], 'NIFTY', 9, 21, data_attrs, trading_mode=mode, pattern=pattern)
+                     for mode, pattern in runs]
+
+        assert len({results_file for results_file, _ in saved}) == len(runs)
+        assert len({trades_file for _, trades_file in saved}) == len(runs)
+        assert saved[2][0].name == 'NIFTY_EMA_9_21_BUY_2candle_20230101_120000_results.json'
+        assert saved[3][0].name == 'NIFTY_EMA_9_21_BUY_nopattern_20230101_120000_results.json'
+
+    def test_save_results_unknown_format(self, tmp_path, monkeypatch):
+        """Test that an unknown trade format is rejected."""
+        monkeypatch.chdir(tmp_path)
+        data_attrs = {'start_date': '2023-01-02', 'end_date': '2023-01-02', 'total_days': 1, 'total_candles': 375}
 
+        with pytest.raises(ValueError):
+            save_results({}, [], 'NIFTY', 9, 21, data_attrs, trade_formats=['xlsx'])
@@ -3,12 +3,11 @@ Tests for the configuration validator.
 """
 
 import pytest
-import os
 from pathlib import Path
-import tempfile
 import yaml
 
 from utils.config_validator import validate_config, validate_config_file
+from tests.fixtures import YamlDumper
 
 # Sample valid configuration for testing
 VALID_CONFIG = {
@@ -37,65 +36,44 @@ VALID_CONFIG = {
     }
 }
 
+# Dump the valid configuration to YAML once; tests only read the file
+@pytest.fixture(scope="session")
+def valid_config_path(tmp_path_factory):
+    """Path to a YAML file holding VALID_CONFIG"""
+    path = tmp_path_factory.mktemp("config") / "valid_config.yaml"
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(VALID_CONFIG, f, Dumper=YamlDumper)
+    return path
+
 def test_validate_config_valid():
     """Test that a valid configuration passes validation"""
     assert validate_config(VALID_CONFIG) is True
 
-def test_validate_config_missing_required():
+@pytest.mark.parametrize("missing_key", ["strategy", "backtest", "data"])
+def test_validate_config_missing_required(missing_key):
     """Test that a configuration missing required fields fails validation"""
-    # Missing strategy
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config.pop("strategy")
-    assert validate_config(invalid_config) is False
-
-    # Missing backtest
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config.pop("backtest")
-    assert validate_config(invalid_config) is False
-
-    # Missing data
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config.pop("data")
+    invalid_config = {key: value for key, value in VALID_CONFIG.items() if key != missing_key}
     assert validate_config(invalid_config) is False
 
-def test_validate_config_invalid_values():
+@pytest.mark.parametrize("section,key,value", [
+    ("strategy", "ema_pairs", [[-1, 21]]),           # Negative EMA period
+    ("strategy", "trading", {"mode": ["INVALID"]}),  # Invalid trading mode
+    ("backtest", "initial_capital", -1000),          # Negative initial capital
+])
+def test_validate_config_invalid_values(section, key, value):
     """Test that a configuration with invalid values fails validation"""
-    # Invalid EMA pairs (negative value)
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config["strategy"] = VALID_CONFIG["strategy"].copy()
-    invalid_config["strategy"]["ema_pairs"] = [[-1, 21]]
+    invalid_config = {**VALID_CONFIG, section: {**VALID_CONFIG[section], key: value}}
     assert validate_config(invalid_config) is False
 
-    # Invalid trading mode
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config["strategy"] = VALID_CONFIG["strategy"].copy()
-    invalid_config["strategy"]["trading"] = {"mode": ["INVALID"]}
-    assert validate_config(invalid_config) is False
-
-    # Invalid initial capital (negative)
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config["backtest"] = VALID_CONFIG["backtest"].copy()
-    invalid_config["backtest"]["initial_capital"] = -1000
-    assert validate_config(invalid_config) is False
-
-def test_validate_config_file():
+def test_validate_config_file(valid_config_path, tmp_path):
     """Test validating a configuration file"""
-    # Create a temporary file with valid configuration
-    with tempfile.NamedTemporaryFile(suffix='.yaml', mode='w', delete=False, encoding='utf-8') as temp:
-        yaml.dump(VALID_CONFIG, temp)
-        temp_path = temp.name
-
-    try:
-        # Test valid configuration file
-        assert validate_config_file(temp_path) is True
+    # Test valid configuration file
+    assert validate_config_file(str(valid_config_path)) is True
 
-        # Test non-existent file
-        assert validate_config_file("non_existent_file.yaml") is False
+    # Test non-existent file
+    assert validate_config_file(str(tmp_path / "non_existent_file.yaml")) is False
 
-        # Test invalid configuration file
-        with open(temp_path, 'w') as f:
-            f.write("invalid: yaml: content")
-        assert validate_config_file(temp_path) is False
-    finally:
-        # Clean up
-        os.unlink(temp_path)
+    # Test invalid configuration file
+    invalid_path = tmp_path / "invalid_config.yaml"
+    invalid_path.write_text("invalid: yaml: content", encoding="utf-8")
+    assert validate_config_file(str(invalid_path)) is False
@@ -3,17 +3,13 @@ Tests for the backtest.cross_validate module.
 """
 
 import pytest
-import os
+import argparse
 import json
 from pathlib import Path
 import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from backtest.cross_validate import run_sequential_backtest, run_parallel_validation
 from unittest.mock import patch
 
@@ -606,10 +602,12 @@ class TestCrossValidate:
     def test_main_function(self, mock_parse_args, mock_run_parallel_validation):
         """Test the main function."""
         # Set up mock parse_args
-        mock_args = MagicMock()
-        mock_args.config = 'config/test_config.yaml'
-        mock_args.data = 'data/test_data.csv'
-        mock_args.seed = 42
+        mock_args = MagicMock(spec=argparse.Namespace)
+        mock_args.configure_mock(
+            config='config/test_config.yaml',
+            data='data/test_data.csv',
+            seed=42
+        )
         mock_parse_args.return_value = mock_args
 
         # Import the main function
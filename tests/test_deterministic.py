@@ -3,13 +3,8 @@ Tests for the backtest.deterministic module.
 """
 
 import pytest
-import os
 from unittest.mock import patch, MagicMock
 
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from backtest.deterministic import DeterministicBacktest
 
 class TestDeterministicBacktest:
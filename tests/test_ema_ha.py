@@ -5,48 +5,37 @@ Tests for the EMA Heikin Ashi strategy
 import pytest
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import os
-import sys
-
-# Add parent directory to path to import modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from strategies.ema_ha import EMAHeikinAshiStrategy
 from backtest.utils import load_config
 
-# Create a fixture for test data
-@pytest.fixture
+# Create a fixture for test data, shared by all tests in the session
+@pytest.fixture(scope='session')
 def sample_data():
     """Create sample OHLC data for testing"""
     # Create date range
-    start_date = datetime(2023, 1, 1, 9, 15)
-    dates = [start_date + timedelta(minutes=i) for i in range(1000)]
+    dates = pd.date_range(start='2023-01-01 09:15', periods=1000, freq='1min', name='date')
 
     # Create price data with a trend
     close_prices = np.linspace(100, 120, 1000) + np.sin(np.linspace(0, 20, 1000)) * 5
 
-    # Add some noise
-    close_prices = close_prices + np.random.normal(0, 1, 1000)
+    # Draw all noise in one call: close noise and high/low/open offsets
+    rng = np.random.default_rng(0)
+    noise = rng.standard_normal((1000, 4))
 
     # Create OHLC data
-    high_prices = close_prices + np.random.uniform(0, 2, 1000)
-    low_prices = close_prices - np.random.uniform(0, 2, 1000)
-    open_prices = close_prices - np.random.uniform(-1, 1, 1000)
+    close_prices = close_prices + noise[:, 0]
+    high_prices = close_prices + np.abs(noise[:, 1])
+    low_prices = close_prices - np.abs(noise[:, 2])
+    open_prices = close_prices - noise[:, 3] * 0.5
 
-    # Create DataFrame
-    df = pd.DataFrame({
-        'date': dates,
+    # Create DataFrame indexed by date
+    return pd.DataFrame({
         'open': open_prices,
         'high': high_prices,
         'low': low_prices,
         'close': close_prices
-    })
-
-    # Set date as index
-    df.set_index('date', inplace=True)
-
-    return df
+    }, index=dates)
 
 # Create a fixture for test config
 @pytest.fixture
@@ -74,6 +63,17 @@ def sample_config():
         }
     }
 
+# Create a strategy with only the trading session configured, shared by the module
+@pytest.fixture(scope='module')
+def plain_strategy():
+    """Create a strategy instance for testing the indicator calculations"""
+    return EMAHeikinAshiStrategy(9, 21, {'strategy': {'trading_session': {
+        'market_open': '09:15',
+        'market_entry': '09:30',
+        'force_exit': '15:15',
+        'market_close': '15:30'
+    }}})
+
 def test_strategy_initialization(sample_config):
     """Test strategy initialization"""
     # Test valid initialization
@@ -91,18 +91,11 @@ def test_strategy_initialization(sample_config):
     with pytest.raises(ValueError):
         EMAHeikinAshiStrategy(9, 21, {})
 
-def test_calculate_ema(sample_data):
+def test_calculate_ema(sample_data, plain_strategy):
     """Test EMA calculation"""
-    strategy = EMAHeikinAshiStrategy(9, 21, {'strategy': {'trading_session': {
-        'market_open': '09:15',
-        'market_entry': '09:30',
-        'force_exit': '15:15',
-        'market_close': '15:30'
-    }}})
-
     # Calculate EMA
-    ema9 = strategy.calculate_ema(sample_data['close'], 9)
-    ema21 = strategy.calculate_ema(sample_data['close'], 21)
+    ema9 = plain_strategy.calculate_ema(sample_data['close'], 9)
+    ema21 = plain_strategy.calculate_ema(sample_data['close'], 21)
 
     # Check that EMAs have the correct length
     assert len(ema9) == len(sample_data)
@@ -115,17 +108,20 @@ def test_calculate_ema(sample_data):
     assert abs(ema9.iloc[-1] - sample_data['close'].iloc[-1]) < 5
     assert abs(ema21.iloc[-1] - sample_data['close'].iloc[-1]) < 5
 
-def test_calculate_heikin_ashi(sample_data):
-    """Test Heikin Ashi calculation"""
-    strategy = EMAHeikinAshiStrategy(9, 21, {'strategy': {'trading_session': {
-        'market_open': '09:15',
-        'market_entry': '09:30',
-        'force_exit': '15:15',
-        'market_close': '15:30'
-    }}})
+def test_calculate_ema_matches_pandas(sample_data):
+    """Test that the compiled EMA matches pandas ewm, including NaN gaps"""
+    prices = sample_data['close'].copy()
+    prices.iloc[[0, 10, 11, 500]] = np.nan
+
+    for period in [9, 21, 55]:
+        expected = prices.ewm(span=period, adjust=False).mean()
+        result = EMAHeikinAshiStrategy.calculate_ema(prices, period)
+        pd.testing.assert_series_equal(result, expected)
 
+def test_calculate_heikin_ashi(sample_data, plain_strategy):
+    """Test Heikin Ashi calculation"""
     # Calculate Heikin Ashi
-    ha_open, ha_close = strategy.calculate_heikin_ashi(sample_data)
+    ha_open, ha_close = plain_strategy.calculate_heikin_ashi(sample_data)
 
     # Check that HA series have the correct length
     assert len(ha_open) == len(sample_data)
@@ -134,7 +130,8 @@ def test_calculate_heikin_ashi(sample_data):
     # Check that HA close is the average of OHLC
     expected_ha_close = (sample_data['open'] + sample_data['high'] +
                          sample_data['low'] + sample_data['close']) / 4
-    pd.testing.assert_series_equal(ha_close, expected_ha_close)
+    np.testing.assert_allclose(ha_close.to_numpy(), expected_ha_close.to_numpy(), rtol=1e-12)
+    assert ha_close.index.equals(sample_data.index)
 
     # Check first HA open value
     expected_first_ha_open = (sample_data['open'].iloc[0] + sample_data['close'].iloc[0]) / 2
@@ -145,7 +142,7 @@ def test_generate_signals(sample_data, sample_config):
     strategy = EMAHeikinAshiStrategy(9, 21, sample_config)
 
     # Generate signals
-    df_with_signals = strategy.generate_signals(sample_data.copy())
+    df_with_signals = strategy.generate_signals(sample_data)
 
     # Check that signals column exists
     assert 'Signal' in df_with_signals.columns
@@ -158,15 +155,53 @@ def test_generate_signals(sample_data, sample_config):
     assert 'HA_Open' in df_with_signals.columns
     assert 'HA_Close' in df_with_signals.columns
 
-    # Check that signals are -1, 0, or 1
+    # Check that signals are -1, 0, or 1 stored as int8
     assert df_with_signals['Signal'].isin([-1, 0, 1]).all()
+    assert df_with_signals['Signal'].dtype == np.int8
+
+    # Check that the input frame is left untouched
+    assert list(sample_data.columns) == ['open', 'high', 'low', 'close']
+
+def test_precomputed_indicators_match(sample_data, sample_config):
+    """Test that signals from precomputed indicators match a fresh calculation"""
+    strategy = EMAHeikinAshiStrategy(9, 21, sample_config)
+    precomputed = EMAHeikinAshiStrategy.precompute_indicators(sample_data, [9, 21, 13, 34])
+
+    assert {'HA_Open', 'HA_Close', 'EMA_9', 'EMA_21', 'EMA_13', 'EMA_34'}.issubset(precomputed.columns)
+    assert 'EMA_9' not in sample_data.columns
+
+    expected = strategy.generate_signals(sample_data)
+    result = strategy.generate_signals(precomputed)
+
+    np.testing.assert_array_equal(result['Signal'].to_numpy(), expected['Signal'].to_numpy())
+    np.testing.assert_allclose(result['EMA_Short'].to_numpy(), expected['EMA_Short'].to_numpy(), rtol=1e-12)
+
+@pytest.mark.parametrize('mode', ['BUY', 'SELL', 'SWING'])
+@pytest.mark.parametrize('confirmation_candles', [[None], [2], [3]])
+def test_generate_signals_batch_matches(sample_data, sample_config, mode, confirmation_candles):
+    """Test that batched signals match per-pair signal generation"""
+    config = {**sample_config, 'strategy': {
+        **sample_config['strategy'],
+        'trading': {'mode': [mode]},
+        'ha_patterns': {'enabled': True, 'confirmation_candles': confirmation_candles}
+    }}
+    ema_pairs = config['strategy']['ema_pairs']
+    strategy = EMAHeikinAshiStrategy(*ema_pairs[0], config)
+
+    batch = strategy.generate_signals_batch(sample_data, ema_pairs)
+
+    assert set(batch) == {tuple(pair) for pair in ema_pairs}
+    for ema_short, ema_long in ema_pairs:
+        expected = EMAHeikinAshiStrategy(ema_short, ema_long, config).generate_signals(sample_data)['Signal']
+        assert batch[(ema_short, ema_long)].dtype == np.int8
+        np.testing.assert_array_equal(batch[(ema_short, ema_long)], expected.to_numpy())
 
 def test_backtest(sample_data, sample_config):
     """Test backtest functionality"""
     strategy = EMAHeikinAshiStrategy(9, 21, sample_config)
 
     # Run backtest
-    results, trades = strategy.backtest(sample_data.copy())
+    results, trades = strategy.backtest(sample_data)
 
     # Check that results is a dictionary
     assert isinstance(results, dict)
@@ -195,5 +230,23 @@ def test_backtest(sample_data, sample_config):
         assert 'pnl' in trades[0]
         assert 'exit_reason' in trades[0]
 
+def test_backtest_exit_reasons(sample_config):
+    """Test stop loss, signal reversal and force exit on a hand-made price path"""
+    strategy = EMAHeikinAshiStrategy(9, 21, sample_config)
+    index = pd.to_datetime(['2023-01-02 09:30', '2023-01-02 09:31', '2023-01-02 09:32',
+                            '2023-01-02 09:33', '2023-01-02 09:34', '2023-01-02 15:15'])
+    df = pd.DataFrame({'close': [100.0, 98.5, 99.0, 99.5, 99.0, 98.0]}, index=index)
+    signals = np.array([1, 0, -1, 0, 1, 0], dtype=np.int8)
+
+    results, trades = strategy.backtest(df, initial_capital=10000, signals=signals)
+
+    # Long stopped out at -1.5%, short reversed by a buy signal, new long closed at force exit
+    assert [trade['exit_reason'] for trade in trades] == ['StopLoss', 'Signal', 'ForceExit']
+    assert [trade['position_type'] for trade in trades] == ['LONG', 'SHORT', 'LONG']
+    assert trades[0]['pnl'] == pytest.approx(-150.0)
+    assert trades[1]['entry_time'] == '2023-01-02 09:32:00'
+    assert trades[2]['duration'] == pytest.approx(341.0)
+    assert results['exit_reasons'] == {'StopLoss': 1, 'Signal': 1, 'ForceExit': 1}
+
 if __name__ == "__main__":
     pytest.main(["-xvs", __file__])
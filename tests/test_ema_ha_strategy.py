@@ -5,7 +5,6 @@ Tests for the EMA Heikin Ashi strategy.
 import pytest
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 from pathlib import Path
 import tempfile
 import os
@@ -16,35 +15,32 @@ from strategies.ema_ha import EMAHeikinAshiStrategy
 # Create sample data for testing
 def create_sample_data(periods=100):
     """Create sample market data for testing"""
-    start_date = datetime(2023, 1, 1, 9, 15)
-    dates = [start_date + timedelta(minutes=i) for i in range(periods)]
-
-    # Create a simple uptrend followed by a downtrend
-    close_prices = []
-    for i in range(periods):
-        if i < periods // 2:
-            # Uptrend with some noise
-            price = 100 + i * 0.5 + np.random.normal(0, 0.2)
-        else:
-            # Downtrend with some noise
-            price = 100 + (periods // 2) * 0.5 - (i - periods // 2) * 0.3 + np.random.normal(0, 0.2)
-        close_prices.append(price)
+    dates = pd.date_range(start='2023-01-01 09:15', periods=periods, freq='1min', name='date')
+    rng = np.random.default_rng(0)
+
+    # Create a simple uptrend followed by a downtrend, with some noise
+    i = np.arange(periods)
+    half = periods // 2
+    trend = np.where(i < half, i * 0.5, half * 0.5 - (i - half) * 0.3)
+    close_prices = 100 + trend + rng.normal(0, 0.2, periods)
 
     # Create OHLC data
     data = pd.DataFrame({
-        'date': dates,
         'open': close_prices,
-        'high': [p + np.random.uniform(0.1, 0.5) for p in close_prices],
-        'low': [p - np.random.uniform(0.1, 0.5) for p in close_prices],
+        'high': close_prices + rng.uniform(0.1, 0.5, periods),
+        'low': close_prices - rng.uniform(0.1, 0.5, periods),
         'close': close_prices,
-        'volume': [np.random.randint(1000, 5000) for _ in range(periods)]
-    })
-
-    # Set date as index
-    data.set_index('date', inplace=True)
+        'volume': rng.integers(1000, 5000, periods)
+    }, index=dates)
 
     return data
 
+# Build the sample data once for the whole session; tests only read it
+@pytest.fixture(scope='session')
+def sample_data():
+    """Create sample market data for testing"""
+    return create_sample_data()
+
 # Sample configuration for testing
 SAMPLE_CONFIG = {
     "strategy": {
@@ -78,10 +74,14 @@ SAMPLE_CONFIG = {
     }
 }
 
-def test_strategy_initialization():
-    """Test strategy initialization"""
-    strategy = EMAHeikinAshiStrategy(5, 10, SAMPLE_CONFIG)
+# The strategy keeps no state between calls, so one instance serves the module
+@pytest.fixture(scope='module')
+def strategy():
+    """Create the strategy under test"""
+    return EMAHeikinAshiStrategy(5, 10, SAMPLE_CONFIG)
 
+def test_strategy_initialization(strategy):
+    """Test strategy initialization"""
     assert strategy.ema_short == 5
     assert strategy.ema_long == 10
     assert strategy.trading_mode == "SWING"
@@ -89,13 +89,15 @@ def test_strategy_initialization():
     assert hasattr(strategy, 'market_open')
     assert hasattr(strategy, 'market_close')
 
-def test_calculate_indicators():
-    """Test indicator calculation"""
-    data = create_sample_data()
-    strategy = EMAHeikinAshiStrategy(5, 10, SAMPLE_CONFIG)
+# Generate signals once; the indicator and signal tests only inspect the frame
+@pytest.fixture(scope='module')
+def signals_df(sample_data, strategy):
+    """Generate signals, which internally calculates indicators"""
+    return strategy.generate_signals(sample_data)
 
-    # Generate signals which internally calculates indicators
-    processed_data = strategy.generate_signals(data.copy())
+def test_calculate_indicators(signals_df):
+    """Test indicator calculation"""
+    processed_data = signals_df
 
     # Check that indicators were calculated
     assert 'EMA_Short' in processed_data.columns
@@ -112,13 +114,9 @@ def test_calculate_indicators():
     assert processed_data['EMA_Short'].std() > 0
     assert processed_data['EMA_Long'].std() > 0
 
-def test_generate_signals():
+def test_generate_signals(signals_df):
     """Test signal generation"""
-    data = create_sample_data()
-    strategy = EMAHeikinAshiStrategy(5, 10, SAMPLE_CONFIG)
-
-    # Generate signals
-    signals = strategy.generate_signals(data.copy())
+    signals = signals_df
 
     # Check that signals were generated
     assert 'Signal' in signals.columns
@@ -126,10 +124,9 @@ def test_generate_signals():
     # Check that signals are -1, 0, or 1
     assert set(signals['Signal'].unique()).issubset({-1, 0, 1})
 
-def test_backtest():
+def test_backtest(sample_data, strategy):
     """Test the backtest method"""
-    data = create_sample_data()
-    strategy = EMAHeikinAshiStrategy(5, 10, SAMPLE_CONFIG)
+    data = sample_data
 
     # Run backtest
     results, trades = strategy.backtest(data, initial_capital=10000)
@@ -160,80 +157,40 @@ def test_backtest():
         assert 'position_type' in trades[0]
         assert 'pnl' in trades[0]
 
-def test_different_trading_modes():
-    """Test different trading modes"""
-    data = create_sample_data()
-
-    # Test BUY mode
-    buy_config = SAMPLE_CONFIG.copy()
-    buy_config['strategy'] = SAMPLE_CONFIG['strategy'].copy()
-    buy_config['strategy']['trading'] = {'mode': ['BUY']}
-
-    buy_strategy = EMAHeikinAshiStrategy(5, 10, buy_config)
-    buy_results, buy_trades = buy_strategy.backtest(data, initial_capital=10000)
-
-    # Test SELL mode
-    sell_config = SAMPLE_CONFIG.copy()
-    sell_config['strategy'] = SAMPLE_CONFIG['strategy'].copy()
-    sell_config['strategy']['trading'] = {'mode': ['SELL']}
-
-    sell_strategy = EMAHeikinAshiStrategy(5, 10, sell_config)
-    sell_results, sell_trades = sell_strategy.backtest(data, initial_capital=10000)
-
-    # Check that different modes produce different results
-    if buy_trades and sell_trades:
-        # BUY mode should only have LONG positions
-        assert all(trade['position_type'] == 'LONG' for trade in buy_trades)
-
-        # SELL mode should only have SHORT positions
-        assert all(trade['position_type'] == 'SHORT' for trade in sell_trades)
-
-def test_different_confirmation_candles():
-    """Test different confirmation candle settings"""
-    data = create_sample_data()
-
-    # Test with 2 confirmation candles
-    config_2 = SAMPLE_CONFIG.copy()
-    config_2['strategy'] = SAMPLE_CONFIG['strategy'].copy()
-    config_2['strategy']['ha_patterns'] = {'enabled': True, 'confirmation_candles': [2]}
-
-    strategy_2 = EMAHeikinAshiStrategy(5, 10, config_2)
-    results_2, trades_2 = strategy_2.backtest(data, initial_capital=10000)
-
-    # Test with 3 confirmation candles
-    config_3 = SAMPLE_CONFIG.copy()
-    config_3['strategy'] = SAMPLE_CONFIG['strategy'].copy()
-    config_3['strategy']['ha_patterns'] = {'enabled': True, 'confirmation_candles': [3]}
-
-    strategy_3 = EMAHeikinAshiStrategy(5, 10, config_3)
-    results_3, trades_3 = strategy_3.backtest(data, initial_capital=10000)
-
-    # Check that different settings produce different results
-    # More confirmation candles should generally result in fewer trades
-    if trades_2 and trades_3:
-        assert len(trades_2) != len(trades_3)
-
-def test_disabled_ha_patterns():
-    """Test with disabled HA patterns"""
-    data = create_sample_data()
-
-    # Test with HA patterns enabled
-    config_enabled = SAMPLE_CONFIG.copy()
-    config_enabled['strategy'] = SAMPLE_CONFIG['strategy'].copy()
-    config_enabled['strategy']['ha_patterns'] = {'enabled': True, 'confirmation_candles': [2]}
-
-    strategy_enabled = EMAHeikinAshiStrategy(5, 10, config_enabled)
-    results_enabled, trades_enabled = strategy_enabled.backtest(data, initial_capital=10000)
-
-    # Test with HA patterns disabled
-    config_disabled = SAMPLE_CONFIG.copy()
-    config_disabled['strategy'] = SAMPLE_CONFIG['strategy'].copy()
-    config_disabled['strategy']['ha_patterns'] = {'enabled': False}
-
-    strategy_disabled = EMAHeikinAshiStrategy(5, 10, config_disabled)
-    results_disabled, trades_disabled = strategy_disabled.backtest(data, initial_capital=10000)
+# Strategy variants backtested once per module: (trading mode, HA pattern settings)
+BACKTEST_CASES = {
+    'buy': ('BUY', {'enabled': True, 'confirmation_candles': [2]}),
+    'sell': ('SELL', {'enabled': True, 'confirmation_candles': [2]}),
+    'confirmation_2': ('SWING', {'enabled': True, 'confirmation_candles': [2]}),
+    'confirmation_3': ('SWING', {'enabled': True, 'confirmation_candles': [3]}),
+    'patterns_disabled': ('SWING', {'enabled': False})
+}
 
-    # Check that different settings produce different results
-    # Disabled HA patterns should generally result in more trades
-    if trades_enabled and trades_disabled:
-        assert len(trades_enabled) != len(trades_disabled)
+@pytest.fixture(scope='module')
+def case_trades(sample_data):
+    """Backtest each strategy variant in BACKTEST_CASES once and return its trades"""
+    trades = {}
+    for case, (mode, ha_patterns) in BACKTEST_CASES.items():
+        config = {**SAMPLE_CONFIG, 'strategy': {
+            **SAMPLE_CONFIG['strategy'],
+            'trading': {'mode': [mode]},
+            'ha_patterns': ha_patterns
+        }}
+        strategy = EMAHeikinAshiStrategy(5, 10, config)
+        _, trades[case] = strategy.backtest(sample_data, initial_capital=10000)
+    return trades
+
+@pytest.mark.parametrize('case,position_type', [('buy', 'LONG'), ('sell', 'SHORT')])
+def test_different_trading_modes(case_trades, case, position_type):
+    """Test that BUY mode only opens LONG positions and SELL mode only SHORT ones"""
+    assert all(trade['position_type'] == position_type for trade in case_trades[case])
+
+@pytest.mark.parametrize('case,other_case', [
+    ('confirmation_2', 'confirmation_3'),
+    ('confirmation_2', 'patterns_disabled')
+])
+def test_pattern_settings_change_trades(case_trades, case, other_case):
+    """Test that more confirmation candles or disabled HA patterns change the trades taken"""
+    trades, other_trades = case_trades[case], case_trades[other_case]
+    if trades and other_trades:
+        assert len(trades) != len(other_trades)
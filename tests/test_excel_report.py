@@ -3,67 +3,101 @@ Tests for the Excel report generation module.
 """
 
 import pytest
+import itertools
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
 import tempfile
 import shutil
+from openpyxl import load_workbook
 
-import sys
-import os
+from utils.excel_report import create_consolidated_report, create_excel_report, _group_means, _pattern_labels
 
-# Add the project root directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+EXPECTED_SHEETS = {'Overview', 'Summary', 'Detailed Results', 'Best Performers'}
 
-from utils.excel_report import create_consolidated_report, create_excel_report
+def get_sheet_names(report_path):
+    """Return the sheet names of a workbook without parsing any cells"""
+    workbook = load_workbook(report_path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
 
 def create_sample_results():
     """Create sample backtest results for testing"""
-    # Create sample results for different EMA pairs, trading modes, and patterns
-    all_results = []
-
     # Define parameters to test
     ema_pairs = [(9, 21), (13, 34), (50, 200)]
     trading_modes = ['BUY', 'SELL', 'SWING']
     patterns = ['None', '2', '3']
 
-    # Create results for all combinations
-    for ema_short, ema_long in ema_pairs:
-        for trading_mode in trading_modes:
-            for pattern in patterns:
-                # Create a sample result
-                result = {
-                    'ema_short': ema_short,
-                    'ema_long': ema_long,
-                    'trading_mode': trading_mode,
-                    'pattern_length': pattern,
-                    'total_trades': np.random.randint(50, 200),
-                    'winning_trades': np.random.randint(25, 100),
-                    'losing_trades': np.random.randint(25, 100),
-                    'win_rate': np.random.uniform(0.4, 0.7),
-                    'profit_factor': np.random.uniform(1.2, 2.5),
-                    'total_profit': np.random.uniform(10000, 50000),
-                    'return_pct': np.random.uniform(50, 500),
-                    'max_drawdown_pct': np.random.uniform(5, 20),
-                    'sharpe_ratio': np.random.uniform(0.5, 2.0),
-                    'monthly_returns_avg': np.random.uniform(0.02, 0.1),
-                    'monthly_returns_std': np.random.uniform(0.01, 0.05),
-                    'profitable_months': np.random.randint(8, 12),
-                    'max_monthly_profit': np.random.uniform(0.05, 0.2),
-                    'max_monthly_loss': np.random.uniform(-0.1, -0.02),
-                    'exit_reasons': {
-                        'Signal Reversal': np.random.randint(10, 50),
-                        'Stop Loss': np.random.randint(5, 20),
-                        'Take Profit': np.random.randint(5, 20),
-                        'End of Day': np.random.randint(5, 20)
-                    }
-                }
-
-                all_results.append(result)
-
-    return all_results
+    # One result per combination of EMA pair, trading mode and pattern
+    combinations = list(itertools.product(ema_pairs, trading_modes, patterns))
+    n = len(combinations)
+
+    # Draw each metric for all combinations at once
+    rng = np.random.default_rng(42)
+    metrics = {
+        'total_trades': rng.integers(50, 200, n),
+        'winning_trades': rng.integers(25, 100, n),
+        'losing_trades': rng.integers(25, 100, n),
+        'win_rate': rng.uniform(0.4, 0.7, n),
+        'profit_factor': rng.uniform(1.2, 2.5, n),
+        'total_profit': rng.uniform(10000, 50000, n),
+        'return_pct': rng.uniform(50, 500, n),
+        'max_drawdown_pct': rng.uniform(5, 20, n),
+        'sharpe_ratio': rng.uniform(0.5, 2.0, n),
+        'monthly_returns_avg': rng.uniform(0.02, 0.1, n),
+        'monthly_returns_std': rng.uniform(0.01, 0.05, n),
+        'profitable_months': rng.integers(8, 12, n),
+        'max_monthly_profit': rng.uniform(0.05, 0.2, n),
+        'max_monthly_loss': rng.uniform(-0.1, -0.02, n)
+    }
+    exit_reasons = {
+        'Signal Reversal': rng.integers(10, 50, n),
+        'Stop Loss': rng.integers(5, 20, n),
+        'Take Profit': rng.integers(5, 20, n),
+        'End of Day': rng.integers(5, 20, n)
+    }
 
+    # Convert to Python scalars, one row per combination
+    metric_rows = zip(*(values.tolist() for values in metrics.values()))
+    exit_rows = zip(*(counts.tolist() for counts in exit_reasons.values()))
+
+    return [
+        {
+            'ema_short': ema_short,
+            'ema_long': ema_long,
+            'trading_mode': trading_mode,
+            'pattern_length': pattern,
+            **dict(zip(metrics, metric_row)),
+            'exit_reasons': dict(zip(exit_reasons, exit_row))
+        }
+        for ((ema_short, ema_long), trading_mode, pattern), metric_row, exit_row
+        in zip(combinations, metric_rows, exit_rows)
+    ]
+
+@pytest.mark.parametrize('pattern_lengths,expected', [
+    (['None', 2, 3], ['None', '2-Candle', '3-Candle']),
+    ([None, 2, 3], ['None', '2-Candle', '3-Candle']),
+    (['None', '2', '3'], ['None', '2-Candle', '3-Candle']),
+    ([2, 3, 3], ['2-Candle', '3-Candle', '3-Candle'])
+])
+def test_pattern_labels(pattern_lengths, expected):
+    """Test that pattern labels don't depend on how the pattern lengths were stored"""
+    df = pd.DataFrame({'pattern_length': pattern_lengths})
+    assert _pattern_labels(df).tolist() == expected
+
+def test_group_means():
+    """Test that per-group means match pandas groupby, including NaN values and empty groups"""
+    codes = np.array([0, 1, 0, 2, 1, 0])
+    values = np.array([1.0, 2.0, np.nan, np.nan, 4.0, 5.0])
+
+    expected = pd.Series(values).groupby(codes).mean().to_numpy()
+    np.testing.assert_allclose(_group_means(codes, 3, values), expected)
+    assert np.isnan(_group_means(codes, 3, values)[2])
+
+@pytest.mark.slow
 def test_create_excel_report():
     """Test creating an Excel report"""
     # Create sample results
@@ -80,17 +114,10 @@ def test_create_excel_report():
         # Check that the report was created
         assert os.path.exists(report_path)
 
-        # Check that the report is a valid Excel file
-        try:
-            df = pd.read_excel(report_path, sheet_name=None)
-            assert isinstance(df, dict)
-            assert 'Overview' in df
-            assert 'Summary' in df
-            assert 'Detailed Results' in df
-            assert 'Best Performers' in df
-        except Exception as e:
-            pytest.fail(f"Failed to read Excel report: {e}")
+        # Check that the report is a valid Excel file with the expected sheets
+        assert EXPECTED_SHEETS.issubset(get_sheet_names(report_path))
 
+@pytest.mark.slow
 def test_create_consolidated_report():
     """Test creating a consolidated Excel report"""
     # Create sample results
@@ -138,21 +165,49 @@ def test_create_consolidated_report():
         # Check that the report was created
         assert os.path.exists(report_path)
 
-        # Check that the report is a valid Excel file
-        try:
-            df = pd.read_excel(report_path, sheet_name=None)
-            assert isinstance(df, dict)
-            assert 'Overview' in df
-            assert 'Summary' in df
-            assert 'Detailed Results' in df
-            assert 'Best Performers' in df
-
-            # Check that the overview contains the date range
-            # Just check that the report was created and has the expected sheets
-            assert isinstance(df, dict)
-            assert 'Overview' in df
-            assert 'Summary' in df
-            assert 'Detailed Results' in df
-            assert 'Best Performers' in df
-        except Exception as e:
-            pytest.fail(f"Failed to read Excel report: {e}")
+        # Check that the report is a valid Excel file with the expected sheets
+        assert EXPECTED_SHEETS.issubset(get_sheet_names(report_path))
+
+@pytest.mark.slow
+def test_single_result_report():
+    """Test that a single-result report skips the best performers and comparison sheets"""
+    all_results = create_sample_results()[:1]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, 'test_single_report.xlsx')
+        report_path = create_excel_report(output_file, all_results)
+
+        sheet_names = set(get_sheet_names(report_path))
+        assert {'Overview', 'Summary', 'Detailed Results'}.issubset(sheet_names)
+        assert not sheet_names & {'Best Performers', 'EMA Comparison', 'Mode Comparison', 'Pattern Comparison'}
+
+@pytest.mark.slow
+def test_detailed_parquet_output():
+    """Test that a parquet output format also writes the detailed results as parquet"""
+    pytest.importorskip('pyarrow')
+    all_results = create_sample_results()
+    config = {'output': {'format': ['csv', 'parquet']}}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, 'test_report.xlsx')
+        report_path = create_consolidated_report(all_results, config, output_file)
+
+        parquet_file = os.path.join(temp_dir, 'test_report_detailed.parquet')
+        assert report_path == output_file
+        assert os.path.exists(parquet_file)
+        assert len(pd.read_parquet(parquet_file)) == len(all_results)
+
+@pytest.mark.deep
+def test_excel_report_contents():
+    """Test the full contents of an Excel report (run with -m deep)"""
+    all_results = create_sample_results()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, 'test_report.xlsx')
+        report_path = create_excel_report(output_file, all_results)
+
+        # Parse every sheet and check the detailed results cover all combinations
+        sheets = pd.read_excel(report_path, sheet_name=None)
+        assert EXPECTED_SHEETS.issubset(sheets)
+        assert all(not sheet.empty for sheet in sheets.values())
+        assert len(sheets['Detailed Results']) >= len(all_results)
@@ -3,15 +3,99 @@ Tests for the main module.
 """
 
 import pytest
-import os
+import argparse
 from unittest.mock import patch, MagicMock
-
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from concurrent.futures import ThreadPoolExecutor
 
 from main import parse_arguments, run_strategy, run_all_combinations_analysis, run_comparative_patterns_analysis, run_comparative_analysis
 
+@pytest.fixture(scope='module')
+def sweep_results():
+    """Create run_strategy return values for BUY, SELL and SWING (also used for 2- and 3-candle patterns)."""
+    return [
+        (  # BUY mode / 2-candle pattern
+            [
+                {
+                    'ema_short': 9,
+                    'ema_long': 21,
+                    'total_trades': 50,
+                    'win_rate': 0.6,
+                    'profit_factor': 1.5,
+                    'total_profit': 10000,
+                    'return_pct': 40.0,
+                    'max_drawdown_pct': 15.0,
+                    'sharpe_ratio': 1.2
+                },
+                {
+                    'ema_short': 13,
+                    'ema_long': 34,
+                    'total_trades': 40,
+                    'win_rate': 0.7,
+                    'profit_factor': 2.0,
+                    'total_profit': 15000,
+                    'return_pct': 60.0,
+                    'max_drawdown_pct': 10.0,
+                    'sharpe_ratio': 1.5
+                }
+            ],
+            []  # trades
+        ),
+        (  # SELL mode / 3-candle pattern
+            [
+                {
+                    'ema_short': 9,
+                    'ema_long': 21,
+                    'total_trades': 45,
+                    'win_rate': 0.65,
+                    'profit_factor': 1.6,
+                    'total_profit': 11000,
+                    'return_pct': 44.0,
+                    'max_drawdown_pct': 14.0,
+                    'sharpe_ratio': 1.3
+                },
+                {
+                    'ema_short': 13,
+                    'ema_long': 34,
+                    'total_trades': 35,
+                    'win_rate': 0.75,
+                    'profit_factor': 2.2,
+                    'total_profit': 16000,
+                    'return_pct': 64.0,
+                    'max_drawdown_pct': 9.0,
+                    'sharpe_ratio': 1.6
+                }
+            ],
+            []  # trades
+        ),
+        (  # SWING mode
+            [
+                {
+                    'ema_short': 9,
+                    'ema_long': 21,
+                    'total_trades': 55,
+                    'win_rate': 0.55,
+                    'profit_factor': 1.4,
+                    'total_profit': 9000,
+                    'return_pct': 36.0,
+                    'max_drawdown_pct': 16.0,
+                    'sharpe_ratio': 1.1
+                },
+                {
+                    'ema_short': 13,
+                    'ema_long': 34,
+                    'total_trades': 45,
+                    'win_rate': 0.65,
+                    'profit_factor': 1.8,
+                    'total_profit': 14000,
+                    'return_pct': 56.0,
+                    'max_drawdown_pct': 11.0,
+                    'sharpe_ratio': 1.4
+                }
+            ],
+            []  # trades
+        )
+    ]
+
 class TestMain:
     """Test cases for main module."""
 
@@ -44,21 +128,23 @@ class TestMain:
     def test_parse_arguments(self, mock_parse_args):
         """Test parsing command line arguments."""
         # Set up mock parse_args
-        mock_args = MagicMock()
-        mock_args.config = 'config/test_config.yaml'
-        mock_args.no_config = False
-        mock_args.data = 'data/test_data.csv'
-        mock_args.symbol = 'NIFTY'
-        mock_args.output = 'data/test_results'
-        mock_args.debug = True
-        mock_args.mode = 'BUY'
-        mock_args.candle_pattern = '2'
-        mock_args.compare = False
-        mock_args.compare_patterns = False
-        mock_args.all_combinations = False
-        mock_args.report = False
-        mock_args.execution_mode = 'standard'
-        mock_args.seed = 42
+        mock_args = MagicMock(spec=argparse.Namespace)
+        mock_args.configure_mock(
+            config='config/test_config.yaml',
+            no_config=False,
+            data='data/test_data.csv',
+            symbol='NIFTY',
+            output='data/test_results',
+            debug=True,
+            mode='BUY',
+            candle_pattern='2',
+            compare=False,
+            compare_patterns=False,
+            all_combinations=False,
+            report=False,
+            execution_mode='standard',
+            seed=42
+        )
         mock_parse_args.return_value = mock_args
 
         # Parse arguments
@@ -227,65 +313,10 @@ class TestMain:
         mock_run_parallel.assert_called_once()
 
     @patch('main.run_strategy')
-    def test_run_comparative_patterns_analysis(self, mock_run_strategy, sample_config, sample_data):
+    def test_run_comparative_patterns_analysis(self, mock_run_strategy, sweep_results):
         """Test running comparative patterns analysis."""
         # Set up mock run_strategy
-        mock_run_strategy.side_effect = [
-            (  # Results for pattern 2
-                [
-                    {
-                        'ema_short': 9,
-                        'ema_long': 21,
-                        'total_trades': 50,
-                        'win_rate': 0.6,
-                        'profit_factor': 1.5,
-                        'total_profit': 10000,
-                        'return_pct': 40.0,
-                        'max_drawdown_pct': 15.0,
-                        'sharpe_ratio': 1.2
-                    },
-                    {
-                        'ema_short': 13,
-                        'ema_long': 34,
-                        'total_trades': 40,
-                        'win_rate': 0.7,
-                        'profit_factor': 2.0,
-                        'total_profit': 15000,
-                        'return_pct': 60.0,
-                        'max_drawdown_pct': 10.0,
-                        'sharpe_ratio': 1.5
-                    }
-                ],
-                []  # trades
-            ),
-            (  # Results for pattern 3
-                [
-                    {
-                        'ema_short': 9,
-                        'ema_long': 21,
-                        'total_trades': 45,
-                        'win_rate': 0.65,
-                        'profit_factor': 1.6,
-                        'total_profit': 11000,
-                        'return_pct': 44.0,
-                        'max_drawdown_pct': 14.0,
-                        'sharpe_ratio': 1.3
-                    },
-                    {
-                        'ema_short': 13,
-                        'ema_long': 34,
-                        'total_trades': 35,
-                        'win_rate': 0.75,
-                        'profit_factor': 2.2,
-                        'total_profit': 16000,
-                        'return_pct': 64.0,
-                        'max_drawdown_pct': 9.0,
-                        'sharpe_ratio': 1.6
-                    }
-                ],
-                []  # trades
-            )
-        ]
+        mock_run_strategy.side_effect = sweep_results[:2]
 
         # Run comparative patterns analysis
         results, trades = run_comparative_patterns_analysis(
@@ -293,7 +324,8 @@ class TestMain:
             data_path='data/test_data.csv',
             symbol='NIFTY',
             output_dir='data/test_results',
-            mode='BUY'
+            mode='BUY',
+            sequential=True
         )
 
         # Verify the results
@@ -325,99 +357,18 @@ class TestMain:
         )
 
     @patch('main.run_strategy')
-    def test_run_comparative_analysis(self, mock_run_strategy, sample_config, sample_data):
+    def test_run_comparative_analysis(self, mock_run_strategy, sweep_results):
         """Test running comparative analysis."""
         # Set up mock run_strategy
-        mock_run_strategy.side_effect = [
-            (  # Results for BUY mode
-                [
-                    {
-                        'ema_short': 9,
-                        'ema_long': 21,
-                        'total_trades': 50,
-                        'win_rate': 0.6,
-                        'profit_factor': 1.5,
-                        'total_profit': 10000,
-                        'return_pct': 40.0,
-                        'max_drawdown_pct': 15.0,
-                        'sharpe_ratio': 1.2
-                    },
-                    {
-                        'ema_short': 13,
-                        'ema_long': 34,
-                        'total_trades': 40,
-                        'win_rate': 0.7,
-                        'profit_factor': 2.0,
-                        'total_profit': 15000,
-                        'return_pct': 60.0,
-                        'max_drawdown_pct': 10.0,
-                        'sharpe_ratio': 1.5
-                    }
-                ],
-                []  # trades
-            ),
-            (  # Results for SELL mode
-                [
-                    {
-                        'ema_short': 9,
-                        'ema_long': 21,
-                        'total_trades': 45,
-                        'win_rate': 0.65,
-                        'profit_factor': 1.6,
-                        'total_profit': 11000,
-                        'return_pct': 44.0,
-                        'max_drawdown_pct': 14.0,
-                        'sharpe_ratio': 1.3
-                    },
-                    {
-                        'ema_short': 13,
-                        'ema_long': 34,
-                        'total_trades': 35,
-                        'win_rate': 0.75,
-                        'profit_factor': 2.2,
-                        'total_profit': 16000,
-                        'return_pct': 64.0,
-                        'max_drawdown_pct': 9.0,
-                        'sharpe_ratio': 1.6
-                    }
-                ],
-                []  # trades
-            ),
-            (  # Results for SWING mode
-                [
-                    {
-                        'ema_short': 9,
-                        'ema_long': 21,
-                        'total_trades': 55,
-                        'win_rate': 0.55,
-                        'profit_factor': 1.4,
-                        'total_profit': 9000,
-                        'return_pct': 36.0,
-                        'max_drawdown_pct': 16.0,
-                        'sharpe_ratio': 1.1
-                    },
-                    {
-                        'ema_short': 13,
-                        'ema_long': 34,
-                        'total_trades': 45,
-                        'win_rate': 0.65,
-                        'profit_factor': 1.8,
-                        'total_profit': 14000,
-                        'return_pct': 56.0,
-                        'max_drawdown_pct': 11.0,
-                        'sharpe_ratio': 1.4
-                    }
-                ],
-                []  # trades
-            )
-        ]
+        mock_run_strategy.side_effect = sweep_results
 
         # Run comparative analysis
         results, trades = run_comparative_analysis(
             config_path='config/test_config.yaml',
             data_path='data/test_data.csv',
             symbol='NIFTY',
-            output_dir='data/test_results'
+            output_dir='data/test_results',
+            sequential=True
         )
 
         # Verify the results
@@ -457,3 +408,35 @@ class TestMain:
             mode='SWING',
             candle_pattern=None
         )
+
+    @patch('main.ProcessPoolExecutor', ThreadPoolExecutor)
+    @patch('main.load_data')
+    @patch('main.get_config')
+    @patch('main.run_strategy')
+    def test_run_comparative_analysis_parallel(self, mock_run_strategy, mock_get_config, mock_load_data,
+                                              sample_config, sample_data):
+        """Test that parallel comparative analysis loads data once and shares it with workers."""
+        mock_get_config.return_value = sample_config
+        mock_load_data.return_value = sample_data
+        mock_run_strategy.side_effect = lambda **kwargs: ([{
+            'ema_short': 9, 'ema_long': 21, 'trading_mode': kwargs['mode'], 'total_trades': 10,
+            'win_rate': 0.5, 'profit_factor': 1.2, 'return_pct': 5.0, 'max_drawdown_pct': 2.0
+        }], [])
+
+        results, _ = run_comparative_analysis(
+            config_path='config/test_config.yaml',
+            data_path='data/test_data.csv',
+            symbol='NIFTY',
+            output_dir='data/test_results'
+        )
+
+        # Results are keyed by the mode each job actually ran
+        assert list(results) == ['BUY', 'SELL', 'SWING']
+        for mode, mode_results in results.items():
+            assert mode_results[0]['trading_mode'] == mode
+
+        # Data is loaded once in the parent and passed to every run
+        mock_load_data.assert_called_once_with('data/test_data.csv')
+        assert mock_run_strategy.call_count == 3
+        for call in mock_run_strategy.call_args_list:
+            assert call.kwargs['data'] is sample_data
@@ -3,47 +3,47 @@ Tests for the backtest.parallel module.
 """
 
 import pytest
-import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pandas as pd
 
+import backtest.parallel as parallel
 from backtest.parallel import run_single_backtest, run_parallel_backtests
+from tests.fixtures import create_sample_config, create_sample_data
+
+# Result returned by the mocked deterministic backtest
+MOCK_RESULT = {
+    'ema_short': 9,
+    'ema_long': 21,
+    'total_trades': 50,
+    'win_rate': 0.6,
+    'profit_factor': 1.5,
+    'total_profit': 10000,
+    'return_pct': 40.0,
+    'max_drawdown_pct': 15.0,
+    'sharpe_ratio': 1.2,
+    'trading_mode': 'BUY',
+    'pattern_length': '2'
+}
 
 class TestParallelBacktests:
     """Test cases for parallel backtest functions."""
 
-    @pytest.fixture
+    @pytest.fixture(scope='session')
     def sample_config(self):
-        """Create a sample configuration for testing."""
-        from tests.fixtures import create_sample_config
+        """Create a sample configuration for testing; the tests only pass it through."""
         return create_sample_config()
 
-    @pytest.fixture
+    @pytest.fixture(scope='session')
     def sample_data(self):
-        """Create sample market data for testing."""
-        from tests.fixtures import create_sample_data
+        """Create sample market data for testing; tests that modify it work on a copy."""
         return create_sample_data()
 
     @patch('backtest.deterministic.DeterministicBacktest.run_backtest')
     def test_run_single_backtest(self, mock_run_backtest, sample_config, sample_data):
         """Test running a single backtest."""
         # Set up mock run_backtest
-        mock_run_backtest.return_value = {
-            'ema_short': 9,
-            'ema_long': 21,
-            'total_trades': 50,
-            'win_rate': 0.6,
-            'profit_factor': 1.5,
-            'total_profit': 10000,
-            'return_pct': 40.0,
-            'max_drawdown_pct': 15.0,
-            'sharpe_ratio': 1.2,
-            'trading_mode': 'BUY',
-            'pattern_length': '2'
-        }
+        mock_run_backtest.return_value = MOCK_RESULT
 
         # Create parameters for the backtest
         params = {
@@ -113,49 +113,64 @@ class TestParallelBacktests:
         assert 'error' in result
         assert result['error'] == "Test error"
 
-    @patch('backtest.parallel.ProcessPoolExecutor')
-    def test_run_parallel_backtests(self, mock_executor, sample_config, sample_data):
-        """Test running multiple backtests in parallel."""
-        # Define trading modes and candle patterns
-        trading_modes = ['BUY']
+    def test_shared_data_round_trip(self, sample_config, sample_data):
+        """Test that market data rebuilt from shared memory matches the original."""
+        sample_data = sample_data.copy(deep=False)
+        sample_data.attrs['total_candles'] = len(sample_data)
+        shm, shared = parallel._share_data(sample_data)
+        try:
+            # Only the block name and layout are sent to workers, not the data
+            assert 'data' not in shared
+
+            parallel._attach_shared_data(shared, sample_config)
+            # The worker holds its own copy, so the block can go away underneath it
+            shm.close()
+            shm.unlink()
+            shm = None
+            pd.testing.assert_frame_equal(parallel._shared_data, sample_data)
+            assert parallel._shared_data.attrs == sample_data.attrs
+            assert parallel._shared_config is sample_config
+        finally:
+            parallel._shared_data = None
+            parallel._shared_config = None
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    @pytest.mark.slow
+    def test_run_parallel_backtests(self, sample_config, sample_data):
+        """Test running multiple backtests in parallel on a real process pool."""
+        config = {**sample_config, 'strategy': {**sample_config['strategy'], 'ema_pairs': [[9, 21]]}}
+        trading_modes = ['BUY', 'SELL']
         candle_patterns = ['2']
 
-        # Create a mock result
-        mock_result = {
-            'ema_short': 9,
-            'ema_long': 21,
-            'total_trades': 50,
-            'win_rate': 0.6,
-            'profit_factor': 1.5,
-            'total_profit': 10000,
-            'return_pct': 40.0,
-            'max_drawdown_pct': 15.0,
-            'sharpe_ratio': 1.2,
-            'trading_mode': 'BUY',
-            'pattern_length': '2'
-        }
-
-        # Create a mock for the executor context manager
-        mock_context = MagicMock()
-        mock_executor.return_value.__enter__.return_value = mock_context
-
-        # Create a mock for the future
-        mock_future = MagicMock()
-        mock_future.result.return_value = mock_result
-        mock_context.submit.return_value = mock_future
-
-        # Mock as_completed to return our mock future
-        with patch('backtest.parallel.as_completed', return_value=[mock_future]):
-            # Run parallel backtests
-            results = [mock_result]  # Directly return our mock result
-
-            # Verify the results
-            assert isinstance(results, list)
-            assert len(results) > 0
-
-            # Check that the results have the expected structure
-            for result in results:
-                assert 'ema_short' in result
-                assert 'ema_long' in result
-                assert 'trading_mode' in result
-                assert 'pattern_length' in result
+        # Move the sample candles into the trading session so trades are taken
+        data = sample_data.copy(deep=False)
+        data.index = data.index + pd.Timedelta(hours=9, minutes=20)
+
+        results = run_parallel_backtests(config, data, trading_modes, candle_patterns,
+                                         max_workers=2, seed=42)
+
+        # One result per combination, each matching the same backtest run in this process
+        assert len(results) == 2
+        results_by_mode = {result['trading_mode']: result for result in results}
+        assert set(results_by_mode) == {'BUY', 'SELL'}
+        for mode, result in results_by_mode.items():
+            assert 'error' not in result
+            assert result['total_trades'] > 0
+            assert result['ema_short'] == 9
+            assert result['ema_long'] == 21
+            assert result['pattern_length'] == '2'
+
+            combination_seed = 42 + (hash(f"9_21_{mode}_2") % 1000000)
+            expected = run_single_backtest({
+                'ema_short': 9,
+                'ema_long': 21,
+                'config': config,
+                'data': data,
+                'initial_capital': config['backtest']['initial_capital'],
+                'trading_mode': mode,
+                'pattern': '2',
+                'seed': combination_seed
+            })
+            assert repr(result) == repr(expected)
@@ -6,17 +6,11 @@ import pytest
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import os
 import tempfile
 
-import sys
-import os
-
-# Add the project root directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 import patterns.patterns
 from patterns.patterns import detect_consecutive_candles, apply_ha_pattern_filter
+from strategies.ema_ha import _ha_open_recurrence
 
 def create_sample_data():
     """Create sample data for testing"""
@@ -32,73 +26,75 @@ def create_sample_data():
         'volume': [1000, 1100, 1200, 1300, 1400, 1500, 1600, 1700, 1800, 1900]
     }, index=dates)
 
+    # Heikin Ashi close is the OHLC average of each candle
+    ha_close = ((data['open'] + data['high'] + data['low'] + data['close']) / 4).to_numpy()
+
+    # Heikin Ashi open depends on the previous candle, so use the compiled recurrence
+    ha_open = _ha_open_recurrence(ha_close, (data['open'].iloc[0] + data['close'].iloc[0]) / 2)
+
     # Add Heikin Ashi columns
-    data['HA_Open'] = np.nan
-    data['HA_High'] = np.nan
-    data['HA_Low'] = np.nan
-    data['HA_Close'] = np.nan
-
-    # Calculate first Heikin Ashi candle
-    data.loc[data.index[0], 'HA_Open'] = (data.loc[data.index[0], 'open'] + data.loc[data.index[0], 'close']) / 2
-    data.loc[data.index[0], 'HA_Close'] = (data.loc[data.index[0], 'open'] + data.loc[data.index[0], 'high'] +
-                                          data.loc[data.index[0], 'low'] + data.loc[data.index[0], 'close']) / 4
-    data.loc[data.index[0], 'HA_High'] = data.loc[data.index[0], 'high']
-    data.loc[data.index[0], 'HA_Low'] = data.loc[data.index[0], 'low']
-
-    # Calculate remaining Heikin Ashi candles
-    for i in range(1, len(data)):
-        data.loc[data.index[i], 'HA_Open'] = (data.loc[data.index[i-1], 'HA_Open'] + data.loc[data.index[i-1], 'HA_Close']) / 2
-        data.loc[data.index[i], 'HA_Close'] = (data.loc[data.index[i], 'open'] + data.loc[data.index[i], 'high'] +
-                                              data.loc[data.index[i], 'low'] + data.loc[data.index[i], 'close']) / 4
-        data.loc[data.index[i], 'HA_High'] = max(data.loc[data.index[i], 'high'], data.loc[data.index[i], 'HA_Open'], data.loc[data.index[i], 'HA_Close'])
-        data.loc[data.index[i], 'HA_Low'] = min(data.loc[data.index[i], 'low'], data.loc[data.index[i], 'HA_Open'], data.loc[data.index[i], 'HA_Close'])
+    data['HA_Open'] = ha_open
+    data['HA_High'] = np.maximum.reduce([data['high'].to_numpy(), ha_open, ha_close])
+    data['HA_Low'] = np.minimum.reduce([data['low'].to_numpy(), ha_open, ha_close])
+    data['HA_Close'] = ha_close
 
     return data
 
-def test_detect_consecutive_candles():
+# Expected consecutive-candle flags for the sample data, keyed by (pattern type, length)
+EXPECTED_PATTERNS = {
+    ('bullish', 2): np.array([0, 1, 1, 0, 0, 0, 0, 1, 1, 0], dtype=bool),
+    ('bullish', 3): np.array([0, 0, 1, 0, 0, 0, 0, 0, 1, 0], dtype=bool),
+    ('bearish', 2): np.array([0, 0, 0, 0, 1, 1, 0, 0, 0, 0], dtype=bool),
+    ('bearish', 3): np.array([0, 0, 0, 0, 0, 1, 0, 0, 0, 0], dtype=bool)
+}
+
+def consecutive_from_mask(mask, length):
+    """Flag candles that end a run of at least `length` True values in a boolean mask"""
+    run_counts = np.convolve(mask.astype(np.int8), np.ones(length, dtype=np.int8))[:len(mask)]
+    return run_counts == length
+
+# Build the Heikin Ashi sample data once for the whole session
+@pytest.fixture(scope='session')
+def ha_sample_data():
+    """Create sample data with Heikin Ashi columns for testing"""
+    return create_sample_data()
+
+@pytest.mark.parametrize('pattern_type,length', list(EXPECTED_PATTERNS))
+def test_detect_consecutive_candles(ha_sample_data, pattern_type, length):
     """Test detection of consecutive candles"""
-    # Create sample data
-    data = create_sample_data()
-
-    # Test bullish pattern detection with 2 candles
-    bullish_pattern_2 = detect_consecutive_candles(data, 'bullish', 2)
-    assert isinstance(bullish_pattern_2, pd.Series)
-    assert len(bullish_pattern_2) == len(data)
-
-    # Test bearish pattern detection with 2 candles
-    bearish_pattern_2 = detect_consecutive_candles(data, 'bearish', 2)
-    assert isinstance(bearish_pattern_2, pd.Series)
-    assert len(bearish_pattern_2) == len(data)
-
-    # Test bullish pattern detection with 3 candles
-    bullish_pattern_3 = detect_consecutive_candles(data, 'bullish', 3)
-    assert isinstance(bullish_pattern_3, pd.Series)
-    assert len(bullish_pattern_3) == len(data)
-
-    # Test bearish pattern detection with 3 candles
-    bearish_pattern_3 = detect_consecutive_candles(data, 'bearish', 3)
-    assert isinstance(bearish_pattern_3, pd.Series)
-    assert len(bearish_pattern_3) == len(data)
-
-    # Test invalid pattern type
+    data = ha_sample_data
+    expected = EXPECTED_PATTERNS[(pattern_type, length)]
+
+    pattern = detect_consecutive_candles(data, pattern_type, length)
+    assert isinstance(pattern, pd.Series)
+    np.testing.assert_array_equal(pattern.to_numpy(dtype=bool), expected)
+
+    # The candle direction mask gives the same flags
+    if pattern_type == 'bullish':
+        mask = (data['HA_Close'] > data['HA_Open']).to_numpy()
+    else:
+        mask = (data['HA_Close'] < data['HA_Open']).to_numpy()
+    np.testing.assert_array_equal(consecutive_from_mask(mask, length), expected)
+
+@pytest.mark.parametrize('pattern_type,length', [('invalid', 2), ('bullish', 4)])
+def test_detect_consecutive_candles_invalid(ha_sample_data, pattern_type, length):
+    """Test that an invalid pattern type or length is rejected"""
     with pytest.raises(ValueError):
-        detect_consecutive_candles(data, 'invalid', 2)
+        detect_consecutive_candles(ha_sample_data, pattern_type, length)
 
-    # Test invalid length
-    with pytest.raises(ValueError):
-        detect_consecutive_candles(data, 'bullish', 4)
-
-    # Test error handling with missing columns
-    data_missing_columns = data.drop(columns=['HA_Open', 'HA_Close'])
+def test_detect_consecutive_candles_missing_columns(ha_sample_data):
+    """Test that a frame without Heikin Ashi columns yields no patterns"""
+    # An index-only frame is enough to reach the missing-column path
+    data_missing_columns = pd.DataFrame(index=ha_sample_data.index)
     result = detect_consecutive_candles(data_missing_columns, 'bullish', 2)
     assert isinstance(result, pd.Series)
     assert len(result) == len(data_missing_columns)
     assert not result.any()  # All values should be False
 
-def test_apply_ha_pattern_filter():
+def test_apply_ha_pattern_filter(ha_sample_data):
     """Test applying Heikin Ashi pattern filter"""
-    # Create sample data
-    data = create_sample_data()
+    # The filter adds pattern columns in place, so work on a shallow copy
+    data = ha_sample_data.copy(deep=False)
 
     # Create sample config
     config = {
@@ -114,11 +110,15 @@ def test_apply_ha_pattern_filter():
     filtered_data = apply_ha_pattern_filter(data, config)
     assert 'Bullish_Pattern' in filtered_data.columns
     assert 'Bearish_Pattern' in filtered_data.columns
+    np.testing.assert_array_equal(filtered_data['Bullish_Pattern'].to_numpy(), EXPECTED_PATTERNS[('bullish', 2)])
+    np.testing.assert_array_equal(filtered_data['Bearish_Pattern'].to_numpy(), EXPECTED_PATTERNS[('bearish', 2)])
 
     # Test with specified candle pattern
     filtered_data_3 = apply_ha_pattern_filter(data, config, candle_pattern=3)
     assert 'Bullish_Pattern' in filtered_data_3.columns
     assert 'Bearish_Pattern' in filtered_data_3.columns
+    np.testing.assert_array_equal(filtered_data_3['Bullish_Pattern'].to_numpy(), EXPECTED_PATTERNS[('bullish', 3)])
+    np.testing.assert_array_equal(filtered_data_3['Bearish_Pattern'].to_numpy(), EXPECTED_PATTERNS[('bearish', 3)])
 
     # Test with None candle pattern
     config_none = {
@@ -143,6 +143,19 @@ def test_apply_ha_pattern_filter():
     with pytest.raises(ValueError):
         apply_ha_pattern_filter(data, config, candle_pattern=4)
 
+    # An unsupported length from the config is logged and the data is returned unfiltered
+    config_four = {
+        'strategy': {
+            'ha_patterns': {
+                'enabled': True,
+                'confirmation_candles': [4]
+            }
+        }
+    }
+    filtered_data_four = apply_ha_pattern_filter(ha_sample_data.copy(), config_four)
+    assert 'Bullish_Pattern' not in filtered_data_four.columns
+    assert 'Bearish_Pattern' not in filtered_data_four.columns
+
     # Test with empty confirmation candles
     config_empty = {
         'strategy': {
@@ -164,42 +177,63 @@ def test_apply_ha_pattern_filter():
     assert isinstance(filtered_data_missing, pd.DataFrame)
     assert filtered_data_missing is data  # Should return the original DataFrame
 
-    # Test error handling with missing columns
-    data_missing_columns = data.drop(columns=['HA_Open', 'HA_Close'])
+    # Test error handling with missing columns; an index-only frame is enough to reach that path
+    data_missing_columns = pd.DataFrame(index=data.index)
     result = apply_ha_pattern_filter(data_missing_columns, config)
     assert isinstance(result, pd.DataFrame)
 
     # Test error handling with invalid candle pattern exception propagation
     # Create a mock function that raises a ValueError with the specific message
-    def mock_detect_consecutive_candles_value_error(df, pattern_type, length):
+    def mock_detect_candle_patterns_value_error(df, length):
         raise ValueError("Invalid candle pattern length: 4. Must be 2, 3, or None.")
 
     # Save the original function
-    original_detect = patterns.patterns.detect_consecutive_candles
+    original_detect = patterns.patterns._detect_candle_patterns
 
     try:
         # Replace the function with our mock
-        patterns.patterns.detect_consecutive_candles = mock_detect_consecutive_candles_value_error
+        patterns.patterns._detect_candle_patterns = mock_detect_candle_patterns_value_error
 
         # This should re-raise the ValueError
         with pytest.raises(ValueError, match="Invalid candle pattern length"):
             apply_ha_pattern_filter(data, config)
     finally:
         # Restore the original function
-        patterns.patterns.detect_consecutive_candles = original_detect
+        patterns.patterns._detect_candle_patterns = original_detect
 
     # Test error handling with other exceptions
     # Create a mock function that raises a different exception
-    def mock_detect_consecutive_candles_other_error(df, pattern_type, length):
+    def mock_detect_candle_patterns_other_error(df, length):
         raise KeyError("Some other error")
 
     try:
         # Replace the function with our mock
-        patterns.patterns.detect_consecutive_candles = mock_detect_consecutive_candles_other_error
+        patterns.patterns._detect_candle_patterns = mock_detect_candle_patterns_other_error
 
         # This should catch the exception and return the original DataFrame
         result = apply_ha_pattern_filter(data, config)
         assert result is data  # Should return the original DataFrame
     finally:
         # Restore the original function
-        patterns.patterns.detect_consecutive_candles = original_detect
+        patterns.patterns._detect_candle_patterns = original_detect
+
+def test_patterns_on_ha_only_frame():
+    """Test that the pattern functions work on a frame holding only Heikin Ashi columns"""
+    df = pd.DataFrame({
+        'HA_Open': [1, 2, 3, 4, 5],
+        'HA_Close': [2, 3, 4, 5, 6]
+    })
+
+    result = detect_consecutive_candles(df, 'bullish', 2)
+    assert isinstance(result, pd.Series)
+
+    config = {
+        'strategy': {
+            'ha_patterns': {
+                'enabled': True,
+                'confirmation_candles': [2]
+            }
+        }
+    }
+    filtered_df = apply_ha_pattern_filter(df, config)
+    assert isinstance(filtered_df, pd.DataFrame)
@@ -3,13 +3,9 @@ Tests for the backtest.run module.
 """
 
 import pytest
-import os
+import argparse
 from unittest.mock import patch, MagicMock
 
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from backtest.run import parse_arguments, main
 
 class TestRun:
@@ -19,9 +15,11 @@ class TestRun:
     def test_parse_arguments(self, mock_parse_args):
         """Test parsing command line arguments."""
         # Set up mock parse_args
-        mock_args = MagicMock()
-        mock_args.config = 'config/test_config.yaml'
-        mock_args.data = 'data/test_data.csv'
+        mock_args = MagicMock(spec=argparse.Namespace)
+        mock_args.configure_mock(
+            config='config/test_config.yaml',
+            data='data/test_data.csv'
+        )
         mock_parse_args.return_value = mock_args
         
         # Parse arguments
@@ -36,9 +34,11 @@ class TestRun:
     def test_main(self, mock_run_backtest, mock_parse_arguments):
         """Test the main function."""
         # Set up mock parse_arguments
-        mock_args = MagicMock()
-        mock_args.config = 'config/test_config.yaml'
-        mock_args.data = 'data/test_data.csv'
+        mock_args = MagicMock(spec=argparse.Namespace)
+        mock_args.configure_mock(
+            config='config/test_config.yaml',
+            data='data/test_data.csv'
+        )
         mock_parse_arguments.return_value = mock_args
         
         # Set up mock run_backtest
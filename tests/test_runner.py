@@ -3,15 +3,60 @@ Tests for the backtest.runner module.
 """
 
 import pytest
-import os
-from unittest.mock import patch, MagicMock
-
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from unittest.mock import patch, MagicMock, DEFAULT
 
 from backtest.runner import format_results_table, find_best_pair, analyze_exit_reasons, print_backtest_summary, main
 
+# Canned values returned by the mocked collaborators of main()
+RUNNER_CONFIG = {
+    'strategy': {
+        'ema_pairs': [[9, 21], [13, 34]],
+        'trading': {
+            'mode': ['SWING']
+        },
+        'ha_patterns': {
+            'enabled': True,
+            'confirmation_candles': [2]
+        }
+    },
+    'backtest': {
+        'initial_capital': 25000
+    },
+    'data': {
+        'data_folder': 'data/market_data',
+        'results_folder': 'data/results',
+        'timeframe': '1min'
+    }
+}
+
+DATA_ATTRS = {
+    'start_date': '2023-01-01 09:15:00',
+    'end_date': '2023-01-31 15:30:00',
+    'total_days': 21,
+    'total_candles': 8400
+}
+
+BACKTEST_RESULT = {
+    'ema_short': 9,
+    'ema_long': 21,
+    'total_trades': 50,
+    'win_rate': 0.6,
+    'profit_factor': 1.5,
+    'total_profit': 10000,
+    'return_pct': 40.0,
+    'max_drawdown_pct': 15.0,
+    'monthly_returns_avg': 3.0,
+    'monthly_returns_std': 2.0
+}
+
+BEST_PAIR = {
+    'ema_pair': '9/21',
+    'return_pct': 40.0,
+    'sharpe': 1.5,
+    'win_rate': 0.6,
+    'profit_factor': 1.5
+}
+
 class TestRunner:
     """Test cases for backtest.runner module."""
     
@@ -90,11 +135,13 @@ class TestRunner:
         best_pair = find_best_pair(sample_results)
         
         # Verify the best pair
-        assert best_pair['ema_pair'] == '13/34'
-        assert best_pair['return_pct'] == 60.0
-        assert best_pair['sharpe'] == 4.0 / 1.5
-        assert best_pair['win_rate'] == 0.7
-        assert best_pair['profit_factor'] == 2.0
+        assert best_pair == {
+            'ema_pair': '13/34',
+            'return_pct': 60.0,
+            'sharpe': 4.0 / 1.5,
+            'win_rate': 0.7,
+            'profit_factor': 2.0
+        }
     
     def test_analyze_exit_reasons(self, sample_trades):
         """Test analyzing trade exit reasons."""
@@ -114,102 +161,47 @@ class TestRunner:
         # Verify that print was called
         assert mock_print.call_count > 0
     
-    @patch('backtest.runner.load_config')
-    @patch('backtest.runner.load_data')
-    @patch('backtest.runner.EMAHeikinAshiStrategy')
-    @patch('backtest.runner.save_results')
-    @patch('backtest.runner.format_results_table')
-    @patch('backtest.runner.find_best_pair')
-    @patch('builtins.print')
-    def test_main(self, mock_print, mock_find_best_pair, mock_format_results_table, 
-                 mock_save_results, mock_strategy, mock_load_data, mock_load_config):
+    @pytest.fixture
+    def runner_mocks(self):
+        """Patch the collaborators of backtest.runner.main and preset their canned returns."""
+        with patch.multiple('backtest.runner', load_config=DEFAULT, load_data=DEFAULT,
+                            EMAHeikinAshiStrategy=DEFAULT, save_results=DEFAULT,
+                            format_results_table=DEFAULT, find_best_pair=DEFAULT) as mocks, \
+                patch('builtins.print') as mock_print:
+            mocks['load_config'].return_value = RUNNER_CONFIG
+            mocks['load_data'].return_value = MagicMock(attrs=DATA_ATTRS)
+            mocks['EMAHeikinAshiStrategy'].return_value.backtest.return_value = (BACKTEST_RESULT, [])
+            mocks['format_results_table'].return_value = "Formatted table"
+            mocks['find_best_pair'].return_value = BEST_PAIR
+            mocks['print'] = mock_print
+            yield mocks
+
+    def test_main(self, runner_mocks):
         """Test the main function."""
-        # Set up mock load_config
-        mock_load_config.return_value = {
-            'strategy': {
-                'ema_pairs': [[9, 21], [13, 34]],
-                'trading': {
-                    'mode': ['SWING']
-                },
-                'ha_patterns': {
-                    'enabled': True,
-                    'confirmation_candles': [2]
-                }
-            },
-            'backtest': {
-                'initial_capital': 25000
-            },
-            'data': {
-                'data_folder': 'data/market_data',
-                'results_folder': 'data/results',
-                'timeframe': '1min'
-            }
-        }
-        
-        # Set up mock load_data
-        mock_data = MagicMock()
-        mock_data.attrs = {
-            'start_date': '2023-01-01 09:15:00',
-            'end_date': '2023-01-31 15:30:00',
-            'total_days': 21,
-            'total_candles': 8400
-        }
-        mock_load_data.return_value = mock_data
-        
-        # Set up mock strategy
-        mock_strategy_instance = MagicMock()
-        mock_strategy_instance.backtest.return_value = (
-            {
-                'ema_short': 9,
-                'ema_long': 21,
-                'total_trades': 50,
-                'win_rate': 0.6,
-                'profit_factor': 1.5,
-                'total_profit': 10000,
-                'return_pct': 40.0,
-                'max_drawdown_pct': 15.0,
-                'monthly_returns_avg': 3.0,
-                'monthly_returns_std': 2.0
-            },
-            []  # trades
-        )
-        mock_strategy.return_value = mock_strategy_instance
-        
-        # Set up mock format_results_table
-        mock_format_results_table.return_value = "Formatted table"
-        
-        # Set up mock find_best_pair
-        mock_find_best_pair.return_value = {
-            'ema_pair': '9/21',
-            'return_pct': 40.0,
-            'sharpe': 1.5,
-            'win_rate': 0.6,
-            'profit_factor': 1.5
-        }
-        
         # Run main
         main()
-        
+
         # Verify that load_config was called
-        mock_load_config.assert_called_once()
-        
+        runner_mocks['load_config'].assert_called_once()
+
         # Verify that load_data was called
-        mock_load_data.assert_called_once()
-        
+        runner_mocks['load_data'].assert_called_once()
+
         # Verify that the strategy was initialized for each EMA pair
+        mock_strategy = runner_mocks['EMAHeikinAshiStrategy']
         assert mock_strategy.call_count == 2
-        
+
         # Verify that backtest was called for each EMA pair
-        assert mock_strategy_instance.backtest.call_count == 2
-        
+        assert mock_strategy.return_value.backtest.call_count == 2
+
         # Verify that save_results was called for each EMA pair
-        assert mock_save_results.call_count == 2
-        
+        assert runner_mocks['save_results'].call_count == 2
+
         # Verify that format_results_table was called
-        mock_format_results_table.assert_called_once()
-        
+        runner_mocks['format_results_table'].assert_called_once()
+
         # Verify that find_best_pair was called
-        mock_find_best_pair.assert_called_once()
-        
+        runner_mocks['find_best_pair'].assert_called_once()
+
         # Verify that print was called multiple times
-        assert mock_print.call_count > 0
+        assert runner_mocks['print'].call_count > 0
@@ -4,17 +4,21 @@ Tests for the utility functions.
 
 import pytest
 import os
-import tempfile
 import pandas as pd
+import numpy as np
 import yaml
+import json
 from pathlib import Path
 from datetime import datetime
 
-from backtest.utils import load_config, load_data, save_results, calculate_performance_metrics
+from backtest.utils import (load_config, load_data, save_results, calculate_performance_metrics,
+                           windowed_max_drawdown)
+from utils import config_utils, load_config as load_utils_config
+from tests.fixtures import YamlDumper
 
-def test_load_config():
+def test_load_config(tmp_path):
     """Test loading configuration from a YAML file"""
-    # Create a temporary config file
+    # Keep the config file and every folder it names inside this test's own directory
     config = {
         "strategy": {
             "ema_pairs": [[9, 21], [13, 34]],
@@ -22,39 +26,132 @@ def test_load_config():
         },
         "backtest": {"initial_capital": 100000},
         "data": {
-            "data_folder": "data/market_data",
-            "results_folder": "data/results",
+            "data_folder": str(tmp_path / "market_data"),
+            "results_folder": str(tmp_path / "results"),
             "timeframe": "1min"
         },
         "logging": {"level": "INFO"}
     }
 
-    with tempfile.NamedTemporaryFile(suffix='.yaml', mode='w', delete=False, encoding='utf-8') as temp:
-        yaml.dump(config, temp, default_flow_style=False)
-        temp_path = temp.name
+    config_path = tmp_path / "config.yaml"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        yaml.dump(config, f, Dumper=YamlDumper, default_flow_style=False)
 
-    try:
-        # Test loading the config
-        loaded_config = load_config(temp_path)
+    # Test loading the config
+    loaded_config = load_config(str(config_path))
 
-        # Check that the loaded config matches the original
-        assert loaded_config["strategy"]["ema_pairs"] == config["strategy"]["ema_pairs"]
-        assert loaded_config["backtest"]["initial_capital"] == config["backtest"]["initial_capital"]
-        assert loaded_config["data"]["timeframe"] == config["data"]["timeframe"]
+    # Check that the loaded config matches the original
+    assert loaded_config["strategy"]["ema_pairs"] == config["strategy"]["ema_pairs"]
+    assert loaded_config["backtest"]["initial_capital"] == config["backtest"]["initial_capital"]
+    assert loaded_config["data"] == config["data"]
 
-        # Check that directories were created
-        assert os.path.exists(config["data"]["data_folder"])
-        assert os.path.exists(config["data"]["results_folder"])
+    # Test loading a non-existent file
+    with pytest.raises(FileNotFoundError):
+        load_config(str(tmp_path / "non_existent_file.yaml"))
 
-        # Test loading a non-existent file
-        with pytest.raises(FileNotFoundError):
-            load_config("non_existent_file.yaml")
-    finally:
-        # Clean up temporary file only
-        os.unlink(temp_path)
-        # Don't remove data directories as they may contain actual data
+def test_get_config_value_follows_config_cache(monkeypatch):
+    """Test that key lookups follow the cached config even when it is replaced directly"""
+    monkeypatch.setattr(config_utils, '_config_cache', {'data': {'symbol': 'NIFTY'}})
+    assert config_utils.get_config_value('data.symbol') == 'NIFTY'
 
-def test_load_data():
+    # Resetting the cache between calls must not serve the previous config's values
+    monkeypatch.setattr(config_utils, '_config_cache', {'data': {'symbol': 'BANKNIFTY'}})
+    assert config_utils.get_config_value('data.symbol') == 'BANKNIFTY'
+    assert config_utils.get_config_value('data.timeframe', '1min') == '1min'
+
+    # A patched get_config is used even though the lookup map was never built for it
+    monkeypatch.setattr(config_utils, '_flat_cache', None)
+    monkeypatch.setattr(config_utils, 'get_config', lambda: {'backtest': {'initial_capital': 50000}})
+    assert config_utils.get_initial_capital() == 50000
+
+def test_load_config_cache(tmp_path):
+    """Test that repeated loads share one parse but still pick up file edits"""
+    config = {
+        "strategy": {"ema_pairs": [[9, 21]]},
+        "backtest": {"initial_capital": 100000},
+        "data": {"timeframe": "1min"}
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config, Dumper=YamlDumper), encoding='utf-8')
+
+    # Each call returns its own copy, so mutating one does not leak into the next
+    first = load_config(str(config_path))
+    first["strategy"]["ema_pairs"].append([13, 34])
+    assert load_config(str(config_path)) == config
+
+    # A newer modification time invalidates the cached parse
+    config["backtest"]["initial_capital"] = 50000
+    config_path.write_text(yaml.dump(config, Dumper=YamlDumper), encoding='utf-8')
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_config(str(config_path))["backtest"]["initial_capital"] == 50000
+
+def test_load_config_json_sidecar(tmp_path):
+    """Test that the JSON sidecar is written, reused, and ignored unless it matches the YAML exactly"""
+    config = {
+        "strategy": {"ema_pairs": [[9, 21]]},
+        "backtest": {"initial_capital": 100000},
+        "data": {"timeframe": "1min"}
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config, Dumper=YamlDumper), encoding='utf-8')
+    sidecar_path = tmp_path / "config.yaml.cache.json"
+
+    def write_sidecar(sidecar_config, mtime_ns, size):
+        sidecar_path.write_text(json.dumps({
+            "yaml_mtime_ns": mtime_ns, "yaml_size": size, "config": sidecar_config
+        }), encoding='utf-8')
+
+    # The first load writes the sidecar, stamped with the YAML's modification time and size
+    assert load_config(str(config_path)) == config
+    stat = config_path.stat()
+    assert json.loads(sidecar_path.read_text(encoding='utf-8')) == {
+        "yaml_mtime_ns": stat.st_mtime_ns, "yaml_size": stat.st_size, "config": config
+    }
+    assert list(tmp_path.glob("*.tmp")) == []
+
+    # A sidecar stamped with the YAML's exact modification time and size is read instead of the YAML
+    sidecar = {**config, "backtest": {"initial_capital": 1}}
+    yaml_mtime_ns = stat.st_mtime_ns + 1_000_000_000
+    os.utime(config_path, ns=(yaml_mtime_ns, yaml_mtime_ns))
+    write_sidecar(sidecar, yaml_mtime_ns, stat.st_size)
+    assert load_config(str(config_path))["backtest"]["initial_capital"] == 1
+
+    # A sidecar recorded for a different size is ignored even when the modification time matches
+    yaml_mtime_ns += 1_000_000_000
+    os.utime(config_path, ns=(yaml_mtime_ns, yaml_mtime_ns))
+    write_sidecar(sidecar, yaml_mtime_ns, stat.st_size + 1)
+    assert load_config(str(config_path)) == config
+
+    # An older YAML restored under a newer sidecar is parsed again and the sidecar rewritten
+    write_sidecar(sidecar, yaml_mtime_ns, stat.st_size)
+    restored_mtime_ns = yaml_mtime_ns - 5_000_000_000
+    os.utime(config_path, ns=(restored_mtime_ns, restored_mtime_ns))
+    os.utime(sidecar_path, ns=(yaml_mtime_ns, yaml_mtime_ns))
+    assert load_config(str(config_path)) == config
+    assert json.loads(sidecar_path.read_text(encoding='utf-8'))["yaml_mtime_ns"] == restored_mtime_ns
+
+def test_utils_load_config_requires_only_folders(tmp_path):
+    """Test that utils.load_config accepts a config with just the data and results folders"""
+    config = {
+        "data": {
+            "data_folder": str(tmp_path / "data"),
+            "results_folder": str(tmp_path / "results")
+        }
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config, Dumper=YamlDumper), encoding='utf-8')
+
+    assert load_utils_config(str(config_path)) == config
+    assert (tmp_path / "data").is_dir()
+    assert (tmp_path / "results").is_dir()
+
+    # Missing folder keys are still reported as ValueError
+    config_path.write_text(yaml.dump({"data": {}}, Dumper=YamlDumper), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_utils_config(str(config_path))
+
+def test_load_data(tmp_path):
     """Test loading market data from a CSV file"""
     # Create a temporary CSV file with market data
     data = pd.DataFrame({
@@ -66,32 +163,27 @@ def test_load_data():
         'volume': [1000, 1100, 1200, 1300, 1400]
     })
 
-    with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as temp:
-        data.to_csv(temp.name, index=False)
-        temp_path = temp.name
-
-    try:
-        # Test loading the data
-        loaded_data = load_data(temp_path)
-
-        # Check that the loaded data matches the original
-        assert len(loaded_data) == len(data)
-        assert 'date' not in loaded_data.columns  # date should be the index
-        assert loaded_data.index.name == 'date'
-        assert loaded_data['close'].iloc[0] == 102
-
-        # Check that attributes were set
-        assert 'start_date' in loaded_data.attrs
-        assert 'end_date' in loaded_data.attrs
-        assert 'total_days' in loaded_data.attrs
-        assert 'total_candles' in loaded_data.attrs
-
-        # Test loading a non-existent file
-        with pytest.raises(FileNotFoundError):
-            load_data("non_existent_file.csv")
-    finally:
-        # Clean up
-        os.unlink(temp_path)
+    temp_path = tmp_path / 'market_data.csv'
+    data.to_csv(temp_path, index=False)
+
+    # Test loading the data
+    loaded_data = load_data(str(temp_path))
+
+    # Check that the loaded data matches the original
+    assert len(loaded_data) == len(data)
+    assert 'date' not in loaded_data.columns  # date should be the index
+    assert loaded_data.index.name == 'date'
+    assert loaded_data['close'].iloc[0] == 102
+
+    # Check that attributes were set
+    assert 'start_date' in loaded_data.attrs
+    assert 'end_date' in loaded_data.attrs
+    assert 'total_days' in loaded_data.attrs
+    assert 'total_candles' in loaded_data.attrs
+
+    # Test loading a non-existent file
+    with pytest.raises(FileNotFoundError):
+        load_data(str(tmp_path / "non_existent_file.csv"))
 
 def test_calculate_performance_metrics():
     """Test calculating performance metrics from trades"""
@@ -116,8 +208,40 @@ def test_calculate_performance_metrics():
     assert metrics['profit_factor'] == 3.75  # 3000 / 800 (gross profit / gross loss)
     assert metrics['return_pct'] == 22.0
     assert metrics['avg_trade_duration'] == 60
+    assert metrics['max_drawdown_pct'] == pytest.approx(500 / 11000 * 100)  # 11000 peak down to 10500
+
+    # Passing the pnl values precomputed as an array gives the same metrics
+    pnl_array = np.array([trade['pnl'] for trade in trades], dtype=np.float64)
+    assert calculate_performance_metrics(trades, initial_capital, pnl_array=pnl_array) == metrics
+
+    # A plain list of integer pnls is coerced to float64 the same way
+    list_metrics = calculate_performance_metrics(trades, initial_capital, pnl_array=[1000, -500, 2000, -300])
+    assert list_metrics == metrics
+    assert isinstance(list_metrics['total_profit'], float)
+
+    # A pnl array that doesn't line up with the trades is rejected
+    with pytest.raises(ValueError):
+        calculate_performance_metrics(trades, initial_capital, pnl_array=pnl_array[:3])
 
     # Test with empty trades list
     empty_metrics = calculate_performance_metrics([], initial_capital)
     assert empty_metrics['total_trades'] == 0
     assert empty_metrics['win_rate'] == 0
+
+@pytest.mark.parametrize('window', [1, 5, 20, 1000])
+def test_windowed_max_drawdown(window):
+    """Test the windowed drawdown against a rolling max over the same window"""
+    equity = 10000 + np.cumsum(np.random.default_rng(0).normal(0, 100, 300))
+
+    window_max = pd.Series(equity).rolling(window + 1, min_periods=1).max().to_numpy()
+    expected = ((window_max - equity) / window_max).max() * 100
+
+    assert windowed_max_drawdown(equity, window) == pytest.approx(expected)
+
+    # A window covering the whole curve gives the full-history drawdown
+    if window >= len(equity):
+        running_max = np.maximum.accumulate(equity)
+        assert windowed_max_drawdown(equity, window) == pytest.approx(((running_max - equity) / running_max).max() * 100)
+
+    with pytest.raises(ValueError):
+        windowed_max_drawdown(equity, 0)
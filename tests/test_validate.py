@@ -3,15 +3,10 @@ Tests for the backtest.validate module.
 """
 
 import pytest
-import os
 from pathlib import Path
 import tempfile
 from unittest.mock import patch, MagicMock
 
-# Add the project root directory to the Python path
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from backtest.validate import run_single_test, validate_results
 from unittest.mock import patch
 
@@ -37,21 +32,19 @@ class TestValidate:
     def test_run_single_test(self, mock_strategy, sample_config, sample_data):
         """Test running a single test."""
         # Set up mock strategy
+        backtest_result = {
+            'ema_short': 13,
+            'ema_long': 34,
+            'total_trades': 50,
+            'win_rate': 0.6,
+            'profit_factor': 1.5,
+            'total_profit': 10000,
+            'return_pct': 40.0,
+            'max_drawdown_pct': 15.0,
+            'sharpe_ratio': 1.2
+        }
         mock_strategy_instance = MagicMock()
-        mock_strategy_instance.backtest.return_value = (
-            {
-                'ema_short': 13,
-                'ema_long': 34,
-                'total_trades': 50,
-                'win_rate': 0.6,
-                'profit_factor': 1.5,
-                'total_profit': 10000,
-                'return_pct': 40.0,
-                'max_drawdown_pct': 15.0,
-                'sharpe_ratio': 1.2
-            },
-            []  # trades
-        )
+        mock_strategy_instance.backtest.return_value = (backtest_result, [])  # no trades
         mock_strategy.return_value = mock_strategy_instance
 
         # Run a single test
@@ -65,18 +58,9 @@ class TestValidate:
             seed=42
         )
 
-        # Verify the result
-        assert result['ema_short'] == 13
-        assert result['ema_long'] == 34
-        assert result['total_trades'] == 50
-        assert result['win_rate'] == 0.6
-        assert result['profit_factor'] == 1.5
-        assert result['total_profit'] == 10000
-        assert result['return_pct'] == 40.0
-        assert result['max_drawdown_pct'] == 15.0
-        assert result['sharpe_ratio'] == 1.2
-        assert result['trading_mode'] == 'BUY'
-        assert result['pattern_length'] == 'None'
+        # Verify the result carries the backtest metrics plus the test parameters
+        expected = {**backtest_result, 'trading_mode': 'BUY', 'pattern_length': 'None'}
+        assert expected.items() <= result.items()
 
         # Verify that the strategy was initialized
         mock_strategy.assert_called_once()
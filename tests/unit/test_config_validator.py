@@ -3,18 +3,12 @@ Tests for the configuration validator.
 """
 
 import pytest
-import os
 from pathlib import Path
 import tempfile
 import yaml
 
-import os
-import sys
-
-# Add parent directory to path to import modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
 from utils.config_validator import validate_config
+from tests.fixtures import YamlDumper
 
 # Sample valid configuration for testing
 VALID_CONFIG = {
@@ -43,59 +37,42 @@ VALID_CONFIG = {
     }
 }
 
+# Dump the valid configuration to YAML once; tests only read the file
+@pytest.fixture(scope="session")
+def valid_config_path(tmp_path_factory):
+    """Path to a YAML file holding VALID_CONFIG"""
+    path = tmp_path_factory.mktemp("config") / "valid_config.yaml"
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(VALID_CONFIG, f, Dumper=YamlDumper)
+    return path
+
 def test_validate_config_valid():
     """Test that a valid configuration passes validation"""
     assert validate_config(VALID_CONFIG) is True
 
-def test_validate_config_missing_required():
+@pytest.mark.parametrize("missing_key", ["strategy", "backtest", "data"])
+def test_validate_config_missing_required(missing_key):
     """Test that a configuration missing required fields fails validation"""
-    # Missing strategy
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config.pop("strategy")
-    assert validate_config(invalid_config) is False
-
-    # Missing backtest
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config.pop("backtest")
-    assert validate_config(invalid_config) is False
-
-    # Missing data
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config.pop("data")
+    invalid_config = {key: value for key, value in VALID_CONFIG.items() if key != missing_key}
     assert validate_config(invalid_config) is False
 
-def test_validate_config_invalid_values():
+@pytest.mark.parametrize("section,key,value", [
+    ("strategy", "ema_pairs", [[-1, 21]]),           # Negative EMA period
+    ("strategy", "trading", {"mode": ["INVALID"]}),  # Invalid trading mode
+    ("backtest", "initial_capital", -1000),          # Negative initial capital
+])
+def test_validate_config_invalid_values(section, key, value):
     """Test that a configuration with invalid values fails validation"""
-    # Invalid EMA pairs (negative value)
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config["strategy"] = VALID_CONFIG["strategy"].copy()
-    invalid_config["strategy"]["ema_pairs"] = [[-1, 21]]
-    assert validate_config(invalid_config) is False
-
-    # Invalid trading mode
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config["strategy"] = VALID_CONFIG["strategy"].copy()
-    invalid_config["strategy"]["trading"] = {"mode": ["INVALID"]}
+    invalid_config = {**VALID_CONFIG, section: {**VALID_CONFIG[section], key: value}}
     assert validate_config(invalid_config) is False
 
-    # Invalid initial capital (negative)
-    invalid_config = VALID_CONFIG.copy()
-    invalid_config["backtest"] = VALID_CONFIG["backtest"].copy()
-    invalid_config["backtest"]["initial_capital"] = -1000
-    assert validate_config(invalid_config) is False
-
-def test_validate_config_file_functionality(tmp_path):
+def test_validate_config_file_functionality(valid_config_path, tmp_path):
     """Test validating a configuration file functionality"""
-    # Create a temporary valid config file
-    valid_config_path = tmp_path / "valid_config.yaml"
-    with open(valid_config_path, "w") as f:
-        yaml.dump(VALID_CONFIG, f)
-
     # Create a temporary invalid config file with missing required fields
     invalid_config = {}
     invalid_config_path = tmp_path / "invalid_config.yaml"
     with open(invalid_config_path, "w") as f:
-        yaml.dump(invalid_config, f)
+        yaml.dump(invalid_config, f, Dumper=YamlDumper)
 
     # Create a simple validate_config_file function for testing
     def validate_config_file(config_path):
@@ -3,16 +3,19 @@ Utility functions for the EMA Heikin Ashi strategy.
 """
 
 import yaml
+import numpy as np
 import pandas as pd
 import os
 import json
-from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List, Tuple, Optional
 
 def load_config(config_path: str) -> Dict[str, Any]:
     """
     Load configuration from YAML file
+
+    Only the data and results folders are required; unlike backtest.utils.load_config,
+    the strategy and backtest sections are not checked.
     
     Args:
         config_path: Path to configuration file
@@ -20,17 +23,19 @@ def load_config(config_path: str) -> Dict[str, Any]:
     Returns:
         Configuration dictionary
     """
+    # Share backtest.utils' mtime-keyed cache, so the file is parsed once per process
+    from backtest.utils import _read_config_file
+
     try:
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = _read_config_file(config_path)
         
         # Create output directories if they don't exist
         os.makedirs(config['data']['data_folder'], exist_ok=True)
         os.makedirs(config['data']['results_folder'], exist_ok=True)
         
         return config
-    except Exception as e:
-        raise ValueError(f"Error loading configuration: {e}")
+    except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Error loading configuration: {e}") from e
 
 def load_data(data_path: str) -> pd.DataFrame:
     """
@@ -57,8 +62,8 @@ def load_data(data_path: str) -> pd.DataFrame:
         df.attrs['data_loaded'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         return df
-    except Exception as e:
-        raise ValueError(f"Error loading market data: {e}")
+    except (OSError, KeyError, ValueError) as e:
+        raise ValueError(f"Error loading market data: {e}") from e
 
 def save_results(results: Dict[str, Any], trades: List[Dict[str, Any]], 
                 symbol: str, ema_short: int, ema_long: int, data_attrs: Dict[str, Any]) -> None:
@@ -77,9 +82,9 @@ def save_results(results: Dict[str, Any], trades: List[Dict[str, Any]],
         # Create timestamp for filenames
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # Create results directory if it doesn't exist
-        results_dir = Path(results.get('results_dir', 'data/results'))
-        results_dir.mkdir(parents=True, exist_ok=True)
+        # Create results directory if it doesn't exist, once per process
+        from backtest.utils import ensure_dir
+        results_dir = ensure_dir(results.get('results_dir', 'data/results'))
         
         # Save results to JSON
         results_file = results_dir / f"{symbol}_EMA_{ema_short}_{ema_long}_{timestamp}_results.json"
@@ -97,8 +102,8 @@ def save_results(results: Dict[str, Any], trades: List[Dict[str, Any]],
         trades_df.to_csv(trades_file, index=False)
         
         return results_file, trades_file
-    except Exception as e:
-        raise ValueError(f"Error saving results: {e}")
+    except (OSError, TypeError, ValueError) as e:
+        raise ValueError(f"Error saving results: {e}") from e
 
 def calculate_performance_metrics(trades: List[Dict[str, Any]], initial_capital: float) -> Dict[str, Any]:
     """
@@ -111,44 +116,47 @@ def calculate_performance_metrics(trades: List[Dict[str, Any]], initial_capital:
     Returns:
         Dictionary with performance metrics
     """
+    # Extract the pnl values once and work on them as an array
     try:
-        # Calculate basic metrics
-        total_trades = len(trades)
-        winning_trades = sum(1 for trade in trades if trade['pnl'] > 0)
-        losing_trades = total_trades - winning_trades
-        
-        win_rate = winning_trades / total_trades if total_trades > 0 else 0
-        
-        # Calculate profit metrics
-        total_profit = sum(trade['pnl'] for trade in trades)
-        winning_profit = sum(trade['pnl'] for trade in trades if trade['pnl'] > 0)
-        losing_profit = sum(trade['pnl'] for trade in trades if trade['pnl'] <= 0)
-        
-        profit_factor = abs(winning_profit / losing_profit) if losing_profit != 0 else float('inf')
-        
-        # Calculate return metrics
-        return_pct = (total_profit / initial_capital) * 100
-        
-        # Calculate drawdown
-        equity_curve = [initial_capital]
-        for trade in trades:
-            equity_curve.append(equity_curve[-1] + trade['pnl'])
-        
-        running_max = pd.Series(equity_curve).cummax()
-        drawdowns = (running_max - equity_curve) / running_max * 100
-        max_drawdown = drawdowns.max()
-        
-        return {
-            'total_trades': total_trades,
-            'winning_trades': winning_trades,
-            'losing_trades': losing_trades,
-            'win_rate': win_rate,
-            'total_profit': total_profit,
-            'winning_profit': winning_profit,
-            'losing_profit': losing_profit,
-            'profit_factor': profit_factor,
-            'return_pct': return_pct,
-            'max_drawdown_pct': max_drawdown
-        }
-    except Exception as e:
-        raise ValueError(f"Error calculating performance metrics: {e}")
+        pnl = np.fromiter((float(trade['pnl']) for trade in trades), dtype=np.float64, count=len(trades))
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Error calculating performance metrics: {e}") from e
+    wins = pnl > 0
+
+    # Calculate basic metrics
+    total_trades = len(trades)
+    winning_trades = int(wins.sum())
+    losing_trades = total_trades - winning_trades
+    
+    win_rate = winning_trades / total_trades if total_trades > 0 else 0
+    
+    # Calculate profit metrics
+    total_profit = float(pnl.sum())
+    winning_profit = float(pnl[wins].sum())
+    losing_profit = float(pnl[~wins].sum())
+    
+    profit_factor = abs(winning_profit / losing_profit) if losing_profit != 0 else float('inf')
+    
+    # Calculate return metrics
+    return_pct = (total_profit / initial_capital) * 100
+    
+    # Calculate drawdown
+    equity_curve = np.cumsum(np.concatenate(([initial_capital], pnl)))
+    running_max = np.maximum.accumulate(equity_curve)
+    # A non-positive peak has no meaningful drawdown percentage; report 0 there
+    drawdowns = np.divide(running_max - equity_curve, running_max,
+                          out=np.zeros_like(running_max), where=running_max > 0) * 100
+    max_drawdown = float(drawdowns.max())
+    
+    return {
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'losing_trades': losing_trades,
+        'win_rate': win_rate,
+        'total_profit': total_profit,
+        'winning_profit': winning_profit,
+        'losing_profit': losing_profit,
+        'profit_factor': profit_factor,
+        'return_pct': return_pct,
+        'max_drawdown_pct': max_drawdown
+    }
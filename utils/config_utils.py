@@ -5,7 +5,7 @@ This module provides functions to access configuration values with fallbacks to
 """
 
 import logging
-from typing import Any, Dict, List, Union, Optional
+from typing import Any, Dict, Iterator, List, Tuple, Union, Optional
 from pathlib import Path
 from utils import constants
 from backtest.utils import load_config
@@ -17,6 +17,27 @@ logger = setup_logger(name="config_utils", log_level=logging.INFO)
 # Global configuration cache
 _config_cache = None
 
+# Every dot-separated key path in the cached configuration, mapped to its value, and the
+# config dict it was built from; rebuilt whenever get_config returns a different dict
+_flat_cache = None
+_flat_source = None
+
+def _flatten(config: Dict[str, Any], prefix: str = '') -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (key_path, value) for every key reachable through nested dicts
+
+    Dict-valued keys are yielded as well as leaves, so a section such as
+    'strategy.trading_session' can be looked up as a whole.
+    """
+    for key, value in config.items():
+        # Only string keys without dots can be addressed by a dot-separated path
+        if not isinstance(key, str) or '.' in key:
+            continue
+        key_path = f"{prefix}{key}"
+        yield key_path, value
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{key_path}.")
+
 def get_config(config_path: str = constants.DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
     """
     Load configuration from yaml file with caching.
@@ -51,19 +72,18 @@ def get_config_value(key_path: str, default_value: Any = None) -> Any:
     Returns:
         The configuration value or the default value if not found
     """
+    global _flat_cache, _flat_source
+
     config = get_config()
-    keys = key_path.split('.')
-
-    # Navigate through the config dictionary
-    current = config
-    for key in keys:
-        if isinstance(current, dict) and key in current:
-            current = current[key]
-        else:
-            logger.debug(f"Config key '{key_path}' not found, using default: {default_value}")
-            return default_value
-
-    return current
+    if _flat_cache is None or _flat_source is not config:
+        _flat_cache = dict(_flatten(config))
+        _flat_source = config
+
+    if key_path in _flat_cache:
+        return _flat_cache[key_path]
+
+    logger.debug(f"Config key '{key_path}' not found, using default: {default_value}")
+    return default_value
 
 # Specific getter functions for commonly used values
 
@@ -6,7 +6,6 @@ Validates the configuration file against a schema.
 import logging
 from typing import Dict, Any, List, Optional, Union
 import jsonschema
-from jsonschema import validate
 from pathlib import Path
 
 from utils.logger import setup_logger
@@ -83,10 +82,26 @@ CONFIG_SCHEMA = {
                 "level": {"type": "string", "enum": ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]},
                 "file": {"type": "string"}
             }
+        },
+        "output": {
+            "type": "object",
+            "properties": {
+                "format": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": ["csv", "parquet"]},
+                    "minItems": 1,
+                    "uniqueItems": True
+                }
+            }
         }
     }
 }
 
+# Check the schema and build its validator once, instead of on every validate() call
+_validator_class = jsonschema.validators.validator_for(CONFIG_SCHEMA)
+_validator_class.check_schema(CONFIG_SCHEMA)
+_CONFIG_VALIDATOR = _validator_class(CONFIG_SCHEMA)
+
 def validate_config(config: Dict[str, Any]) -> bool:
     """
     Validate the configuration against the schema.
@@ -97,14 +112,15 @@ def validate_config(config: Dict[str, Any]) -> bool:
     Returns:
         True if the configuration is valid, False otherwise
     """
-    try:
-        validate(instance=config, schema=CONFIG_SCHEMA)
-        logger.info("Configuration validation successful")
-        return True
-    except jsonschema.exceptions.ValidationError as e:
-        logger.error(f"Configuration validation failed: {e}")
+    # Report the most relevant error, as jsonschema.validate would
+    error = jsonschema.exceptions.best_match(_CONFIG_VALIDATOR.iter_errors(config))
+    if error is not None:
+        logger.error(f"Configuration validation failed: {error}")
         return False
 
+    logger.info("Configuration validation successful")
+    return True
+
 def validate_config_file(config_path: Union[str, Path]) -> bool:
     """
     Validate a configuration file against the schema.
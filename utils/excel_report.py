@@ -7,16 +7,109 @@ from backtest results across different configurations.
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import logging
 from datetime import datetime
 from utils.logger import setup_logger
-from utils.config_utils import get_config_value, get_backtest_date_range, get_symbol, get_market_session_times, get_risk_management, get_initial_capital
+from utils.config_utils import get_config, get_config_value, get_backtest_date_range, get_symbol, get_market_session_times, get_risk_management, get_initial_capital
 
 # Set up logger
 logger = setup_logger(name="excel_report", log_level=logging.INFO)
 
+# Write every string as plain text, skipping xlsxwriter's per-string URL and formula checks
+XLSX_WRITER_OPTIONS = {
+    'strings_to_numbers': False,
+    'strings_to_formulas': False,
+    'strings_to_urls': False
+}
+
+# Result keys read by the report sheets
+REPORT_COLUMNS = [
+    'ema_short', 'ema_long', 'trading_mode', 'pattern_length', 'total_trades', 'winning_trades',
+    'win_rate', 'profit_factor', 'total_profit', 'return_pct', 'max_drawdown_pct', 'sharpe_ratio',
+    'monthly_returns_avg', 'monthly_returns_std', 'profitable_months', 'max_monthly_profit',
+    'max_monthly_loss', 'exit_reasons'
+]
+
+def _ema_pair_labels(df: pd.DataFrame) -> pd.Series:
+    """Return 'short/long' EMA pair labels for each result row"""
+    return df['ema_short'].astype(str) + '/' + df['ema_long'].astype(str)
+
+def _pattern_labels(df: pd.DataFrame) -> pd.Series:
+    """Return 'N-Candle' pattern labels for each result row, or 'None' when no pattern was used"""
+    if 'pattern_length' not in df.columns:
+        return pd.Series('None', index=df.index)
+
+    # A sweep's pattern lengths share one dtype, so pick the formatting once for the whole column
+    pattern_lengths = df['pattern_length']
+    if pd.api.types.is_numeric_dtype(pattern_lengths):
+        # Integer lengths, with NaN wherever a result had no pattern
+        missing = pattern_lengths.isna().to_numpy()
+        labels = pattern_lengths.fillna(0).astype(np.int64).astype(str)
+    else:
+        # Lengths mixed with the 'None' option (as a string or a real None)
+        missing = (pattern_lengths.isna() | (pattern_lengths == 'None')).to_numpy()
+        labels = pattern_lengths.astype(str)
+
+    return pd.Series(np.where(missing, 'None', labels + '-Candle'), index=df.index)
+
+def _create_formats(workbook) -> Dict[str, Any]:
+    """Add the cell formats shared by all report sheets to the workbook, once"""
+    return {
+        'header': workbook.add_format({'bold': True, 'bg_color': '#D7E4BC', 'border': 1}),
+        'title': workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center', 'valign': 'vcenter'}),
+        'num': workbook.add_format({'num_format': '#,##0'}),
+        'pct': workbook.add_format({'num_format': '0.0%'}),
+        'decimal': workbook.add_format({'num_format': '0.00'}),
+        'money': workbook.add_format({'num_format': '₹#,##0.00'}),
+        'dashboard_title': workbook.add_format({
+            'bold': True, 'font_size': 18, 'align': 'center', 'valign': 'vcenter',
+            'bg_color': '#D7E4BC', 'border': 1
+        }),
+        'section': workbook.add_format({
+            'bold': True, 'font_size': 14, 'align': 'left', 'valign': 'vcenter',
+            'bg_color': '#E6F2D3', 'border': 1
+        }),
+        'table_header': workbook.add_format({'bold': True, 'bg_color': '#D7E4BC'})
+    }
+
+def _set_header_widths(worksheet, columns: pd.Index):
+    """Size each column to fit its header (at least 12 wide), one set_column call per run of equal widths"""
+    widths = [max(len(col) + 2, 12) for col in columns]
+    start = 0
+    for end in range(1, len(widths) + 1):
+        if end == len(widths) or widths[end] != widths[start]:
+            worksheet.set_column(start, end - 1, widths[start])
+            start = end
+
+def _write_table_columns(worksheet, first_row: int, first_col: int, table: pd.DataFrame):
+    """Write a table one write_column call per column, leaving missing values as blank cells"""
+    values = table.astype(object).where(table.notna(), None)
+    for offset, column in enumerate(values.columns):
+        worksheet.write_column(first_row, first_col + offset, values[column].tolist())
+
+def _group_means(codes: np.ndarray, n_groups: int, values: np.ndarray) -> np.ndarray:
+    """Mean of values per group code, skipping NaN like groupby().mean(); groups with no values get NaN"""
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n_groups)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    return np.divide(sums, counts, out=np.full(n_groups, np.nan), where=counts > 0)
+
+def _results_frame(all_results: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Build the results DataFrame shared by the sheet builders, with its 'EMA Pair' and 'Pattern' labels"""
+    # Only materialize the columns the sheets read; keys a result lacks become NaN
+    df = pd.DataFrame.from_records(all_results, columns=REPORT_COLUMNS)
+    df['EMA Pair'] = _ema_pair_labels(df)
+    df['Pattern'] = _pattern_labels(df)
+    return df
+
+def _column(df: pd.DataFrame, name: str, default: Any = 0) -> pd.Series:
+    """Return a results column with missing values set to default, or all default when the column is absent"""
+    if name not in df.columns:
+        return pd.Series(default, index=df.index)
+    return df[name].fillna(default)
+
 def create_consolidated_report(all_results: List[Dict[str, Any]],
                               config: Dict[str, Any],
                               output_file: str = None) -> str:
@@ -34,23 +127,24 @@ def create_consolidated_report(all_results: List[Dict[str, Any]],
     try:
         # Validate results to ensure they have all required keys
         valid_results = []
-        required_keys = ['ema_short', 'ema_long', 'trading_mode', 'pattern_length', 'total_trades',
-                        'win_rate', 'profit_factor', 'total_profit', 'return_pct', 'max_drawdown_pct']
+        required_keys = frozenset(['ema_short', 'ema_long', 'trading_mode', 'pattern_length', 'total_trades',
+                                   'win_rate', 'profit_factor', 'total_profit', 'return_pct', 'max_drawdown_pct'])
 
         for result in all_results:
-            if all(key in result for key in required_keys):
+            missing_keys = required_keys - result.keys()
+            if not missing_keys:
                 valid_results.append(result)
             else:
-                missing_keys = [key for key in required_keys if key not in result]
-                logger.warning(f"Skipping result with missing keys: {missing_keys}. Result: {result}")
+                logger.warning(f"Skipping result with missing keys: {sorted(missing_keys)}. Result: {result}")
 
         # If no valid results, log warning and return
         if not valid_results:
             logger.warning("No valid results found for Excel report generation")
             return output_file if output_file else "No report generated"
 
-        # Use valid results for report generation
+        # Use valid results for report generation, as one DataFrame shared by the sheets
         all_results = valid_results
+        df_all = _results_frame(all_results)
 
         # Create a pandas Excel writer
         if not output_file:
@@ -60,29 +154,37 @@ def create_consolidated_report(all_results: List[Dict[str, Any]],
             output_file = f"{output_dir}/consolidated_report_{timestamp}.xlsx"
 
         # Create Excel writer
-        writer = pd.ExcelWriter(output_file, engine='xlsxwriter')
+        # Not using xlsxwriter's constant_memory mode: pandas writes cells column by
+        # column, which loses cells once constant_memory has flushed a row
+        writer = pd.ExcelWriter(output_file, engine='xlsxwriter',
+                                engine_kwargs={'options': XLSX_WRITER_OPTIONS})
+        formats = _create_formats(writer.book)
 
         # Generate overview sheet
-        _create_overview_sheet(writer, config, all_results)
+        _create_overview_sheet(writer, formats, config, all_results)
 
         # Generate summary sheet
-        _create_summary_sheet(writer, all_results)
+        _create_summary_sheet(writer, formats, df_all)
 
         # Generate detailed results sheet
-        _create_detailed_results_sheet(writer, all_results)
+        df_results = _create_detailed_results_sheet(writer, formats, df_all)
 
-        # Generate best performers sheet
-        _create_best_performers_sheet(writer, all_results)
+        # Best performers and comparisons only repeat a single result, so skip them for one
+        if len(df_all) > 1:
+            # Generate best performers sheet
+            _create_best_performers_sheet(writer, formats, df_all)
 
-        # Generate comparison sheets
-        _create_ema_comparison_sheet(writer, all_results)
-        _create_mode_comparison_sheet(writer, all_results)
-        _create_pattern_comparison_sheet(writer, all_results)
+            # Generate comparison sheets
+            _create_ema_comparison_sheet(writer, formats, df_all)
+            _create_mode_comparison_sheet(writer, formats, df_all)
+            _create_pattern_comparison_sheet(writer, formats, df_all)
+        else:
+            logger.info("Single result: skipping best performers and comparison sheets")
 
         # Re-enable dashboard sheet with improved error handling
         try:
             logger.info("Attempting to create dashboard sheet with improved error handling")
-            _create_dashboard_sheet(writer, all_results)
+            _create_dashboard_sheet(writer, formats, df_all)
             logger.info("Dashboard sheet created successfully")
         except Exception as e:
             logger.error(f"Error creating dashboard sheet, skipping: {e}")
@@ -91,6 +193,11 @@ def create_consolidated_report(all_results: List[Dict[str, Any]],
         writer.close()
 
         logger.info(f"Consolidated report saved to {output_file}")
+
+        # Also write the detailed results as parquet for consumers that don't need Excel
+        if 'parquet' in config.get('output', {}).get('format', []):
+            _save_detailed_parquet(df_results, output_file)
+
         return output_file
 
     except Exception as e:
@@ -103,7 +210,31 @@ def create_consolidated_report(all_results: List[Dict[str, Any]],
             pass
         raise
 
-def _create_overview_sheet(writer: pd.ExcelWriter, config: Dict[str, Any], all_results: List[Dict[str, Any]] = None):
+def _save_detailed_parquet(df_results: pd.DataFrame, output_file: str) -> Optional[str]:
+    """
+    Write the detailed results next to the Excel report as zstd-compressed parquet
+
+    A failure is logged rather than raised, since the Excel report has already been saved.
+
+    Args:
+        df_results: Detailed results sheet DataFrame
+        output_file: Path of the Excel report
+
+    Returns:
+        Path to the parquet file, or None if it could not be written
+    """
+    parquet_file = f"{os.path.splitext(output_file)[0]}_detailed.parquet"
+    try:
+        df_results.to_parquet(parquet_file, compression='zstd', index=False)
+    except (ImportError, OSError, ValueError) as e:
+        logger.error(f"Error saving detailed results as parquet, skipping: {e}")
+        return None
+
+    logger.info(f"Detailed results saved to {parquet_file}")
+    return parquet_file
+
+def _create_overview_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], config: Dict[str, Any],
+                           all_results: List[Dict[str, Any]] = None):
     """Create overview sheet with backtest configuration details"""
     try:
         # Get symbol from config
@@ -177,112 +308,60 @@ def _create_overview_sheet(writer: pd.ExcelWriter, config: Dict[str, Any], all_r
             ]
         }
 
-        # Create DataFrame
-        df_overview = pd.DataFrame(overview_data)
-
-        # Write to Excel
-        df_overview.to_excel(writer, sheet_name='Overview', index=False)
-
-        # Get workbook and worksheet objects
-        workbook = writer.book
-        worksheet = writer.sheets['Overview']
-
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
-
-        # Format header row
-        for col_num, value in enumerate(df_overview.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+        # Write the title, header row and parameter/value columns directly
+        worksheet = writer.book.add_worksheet('Overview')
+        header_format = formats['header']
 
         # Adjust column widths
         worksheet.set_column('A:A', 20)
         worksheet.set_column('B:B', 25)
 
         # Add title
-        title_format = workbook.add_format({
-            'bold': True,
-            'font_size': 16,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-        worksheet.merge_range('A1:B1', 'Backtest Configuration', title_format)
-        worksheet.write_string(1, 0, 'Parameter', header_format)
-        worksheet.write_string(1, 1, 'Value', header_format)
-
-        # Shift data down by 1 row
-        for i in range(len(df_overview)):
-            worksheet.write_string(i+2, 0, df_overview.iloc[i, 0])
-            worksheet.write_string(i+2, 1, df_overview.iloc[i, 1])
+        worksheet.merge_range('A1:B1', 'Backtest Configuration', formats['title'])
+        worksheet.write_row(1, 0, list(overview_data), header_format)
+        worksheet.write_column(2, 0, overview_data['Parameter'])
+        worksheet.write_column(2, 1, overview_data['Value'])
 
     except Exception as e:
         logger.error(f"Error creating overview sheet: {e}")
         raise
 
-def _create_summary_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, Any]]):
+def _create_summary_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], df_all: pd.DataFrame):
     """Create summary sheet with aggregated results"""
     try:
-        # Extract relevant data for summary
-        summary_data = []
-
-        for result in all_results:
-            ema_pair = f"{result['ema_short']}/{result['ema_long']}"
-            trading_mode = result.get('trading_mode', 'SWING')
-
-            # Determine pattern type
-            pattern_info = "None"
-            if 'pattern_length' in result:
-                pattern_length = result['pattern_length']
-                if isinstance(pattern_length, str):
-                    pattern_info = f"{pattern_length}-Candle" if pattern_length != 'None' else "None"
-                else:
-                    pattern_info = f"{pattern_length}-Candle"
-
-            summary_data.append({
-                'EMA Pair': ema_pair,
-                'Trading Mode': trading_mode,
-                'Pattern': pattern_info,
-                'Trades': result['total_trades'],
-                'Win Rate': result['win_rate'] * 100,
-                'Profit Factor': result['profit_factor'],
-                'Total Profit': result['total_profit'],
-                'Return %': result['return_pct'],
-                'Max Drawdown %': result['max_drawdown_pct'],
-                'Sharpe Ratio': result.get('sharpe_ratio', 0)
-            })
-
-        # Create DataFrame
-        df_summary = pd.DataFrame(summary_data)
+        # Select and scale the summary columns
+        df_summary = pd.DataFrame({
+            'EMA Pair': df_all['EMA Pair'],
+            'Trading Mode': _column(df_all, 'trading_mode', 'SWING'),
+            'Pattern': df_all['Pattern'],
+            'Trades': df_all['total_trades'],
+            'Win Rate': df_all['win_rate'] * 100,
+            'Profit Factor': df_all['profit_factor'],
+            'Total Profit': df_all['total_profit'],
+            'Return %': df_all['return_pct'],
+            'Max Drawdown %': df_all['max_drawdown_pct'],
+            'Sharpe Ratio': _column(df_all, 'sharpe_ratio')
+        })
 
         # Sort by Return % descending
         df_summary = df_summary.sort_values('Return %', ascending=False)
 
-        # Write to Excel
-        df_summary.to_excel(writer, sheet_name='Summary', index=False)
+        # Write the data rows below the header row
+        df_summary.to_excel(writer, sheet_name='Summary', index=False, header=False, startrow=1)
 
-        # Get workbook and worksheet objects
-        workbook = writer.book
+        # Get worksheet object
         worksheet = writer.sheets['Summary']
 
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
+        header_format = formats['header']
 
-        # Format header row
-        for col_num, value in enumerate(df_summary.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+        # Write the header row
+        worksheet.write_row(0, 0, df_summary.columns.tolist(), header_format)
 
-        # Add number formats
-        num_format = workbook.add_format({'num_format': '#,##0'})
-        pct_format = workbook.add_format({'num_format': '0.0%'})
-        decimal_format = workbook.add_format({'num_format': '0.00'})
-        money_format = workbook.add_format({'num_format': '₹#,##0.00'})
+        # Number formats
+        num_format = formats['num']
+        pct_format = formats['pct']
+        decimal_format = formats['decimal']
+        money_format = formats['money']
 
         # Apply formats to columns
         worksheet.set_column('A:A', 10)  # EMA Pair
@@ -296,230 +375,130 @@ def _create_summary_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, An
         worksheet.set_column('I:I', 15, pct_format)  # Max Drawdown %
         worksheet.set_column('J:J', 12, decimal_format)  # Sharpe Ratio
 
-        # Apply formats to cells directly
-        for i, row in enumerate(df_summary.values, start=1):
-            # Apply formats to numeric columns
-            worksheet.write_number(i, 3, row[3])  # Trades
-            worksheet.write_number(i, 4, row[4] / 100)  # Win Rate as decimal
-            worksheet.write_number(i, 5, row[5])  # Profit Factor
-            worksheet.write_number(i, 6, row[6])  # Total Profit
-            worksheet.write_number(i, 7, row[7] / 100)  # Return % as decimal
-            worksheet.write_number(i, 8, row[8] / 100)  # Max Drawdown % as decimal
-            worksheet.write_number(i, 9, row[9])  # Sharpe Ratio
+        # Rewrite the numeric columns a column at a time, percentages as decimals
+        worksheet.write_column(1, 3, df_summary['Trades'].tolist())
+        worksheet.write_column(1, 4, (df_summary['Win Rate'] / 100).tolist())
+        worksheet.write_column(1, 5, df_summary['Profit Factor'].tolist())
+        worksheet.write_column(1, 6, df_summary['Total Profit'].tolist())
+        worksheet.write_column(1, 7, (df_summary['Return %'] / 100).tolist())
+        worksheet.write_column(1, 8, (df_summary['Max Drawdown %'] / 100).tolist())
+        worksheet.write_column(1, 9, df_summary['Sharpe Ratio'].tolist())
 
     except Exception as e:
         logger.error(f"Error creating summary sheet: {e}")
         raise
 
-def _create_detailed_results_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, Any]]):
-    """Create detailed results sheet with all metrics"""
+def _create_detailed_results_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], df_all: pd.DataFrame) -> pd.DataFrame:
+    """Create detailed results sheet with all metrics, returning the sheet's DataFrame"""
     try:
-        # Extract all results data
-        results_data = []
-
-        for result in all_results:
-            ema_pair = f"{result['ema_short']}/{result['ema_long']}"
-            trading_mode = result.get('trading_mode', 'SWING')
-
-            # Determine pattern type
-            pattern_info = "None"
-            if 'pattern_length' in result:
-                pattern_length = result['pattern_length']
-                if isinstance(pattern_length, str):
-                    pattern_info = f"{pattern_length}-Candle" if pattern_length != 'None' else "None"
-                else:
-                    pattern_info = f"{pattern_length}-Candle"
-
-            # Extract exit reasons
-            exit_reasons = result.get('exit_reasons', {})
-            signal_exits = exit_reasons.get('Signal', 0)
-            trailing_stop_exits = exit_reasons.get('TrailingStop', 0)
-            stop_loss_exits = exit_reasons.get('StopLoss', 0)
-            force_exits = exit_reasons.get('ForceExit', 0)
-
-            # Calculate exit percentages
-            total_trades = result['total_trades']
-            signal_exits_pct = signal_exits / total_trades * 100 if total_trades > 0 else 0
-            trailing_stop_exits_pct = trailing_stop_exits / total_trades * 100 if total_trades > 0 else 0
-            stop_loss_exits_pct = stop_loss_exits / total_trades * 100 if total_trades > 0 else 0
-            force_exits_pct = force_exits / total_trades * 100 if total_trades > 0 else 0
-
-            # Add to results data
-            results_data.append({
-                'EMA Pair': ema_pair,
-                'Trading Mode': trading_mode,
-                'Pattern': pattern_info,
-                'Total Trades': total_trades,
-                'Winning Trades': result.get('winning_trades', 0),
-                'Win Rate %': result['win_rate'] * 100,
-                'Profit Factor': result['profit_factor'],
-                'Total Profit': result['total_profit'],
-                'Return %': result['return_pct'],
-                'Max Drawdown %': result['max_drawdown_pct'],
-                'Sharpe Ratio': result.get('sharpe_ratio', 0),
-                'Monthly Returns Avg': result.get('monthly_returns_avg', 0) * 100,
-                'Monthly Returns Std': result.get('monthly_returns_std', 0) * 100,
-                'Profitable Months': result.get('profitable_months', 0),
-                'Max Monthly Profit %': result.get('max_monthly_profit', 0) * 100,
-                'Max Monthly Loss %': result.get('max_monthly_loss', 0) * 100,
-                'Signal Exits': signal_exits,
-                'Signal Exits %': signal_exits_pct,
-                'Trailing Stop Exits': trailing_stop_exits,
-                'Trailing Stop Exits %': trailing_stop_exits_pct,
-                'Stop Loss Exits': stop_loss_exits,
-                'Stop Loss Exits %': stop_loss_exits_pct,
-                'Force Exits': force_exits,
-                'Force Exits %': force_exits_pct
-            })
-
-        # Create DataFrame
-        df_results = pd.DataFrame(results_data)
+        # Count each exit reason per result, one column per reason
+        exit_reason_names = ['Signal', 'TrailingStop', 'StopLoss', 'ForceExit']
+        exit_reasons = df_all['exit_reasons'].tolist()
+        counts = np.array([[reasons.get(reason, 0) for reason in exit_reason_names]
+                           if isinstance(reasons, dict) else [0] * len(exit_reason_names)
+                           for reasons in exit_reasons]).reshape(len(df_all), len(exit_reason_names))
+
+        # Exit percentages of total trades in one array op, 0 for results without trades
+        total_trades = df_all['total_trades']
+        totals = total_trades.to_numpy()[:, None]
+        exit_pcts = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0) * 100
+        exit_counts = {reason: (counts[:, i], exit_pcts[:, i]) for i, reason in enumerate(exit_reason_names)}
+
+        # Select and scale the detailed columns
+        df_results = pd.DataFrame({
+            'EMA Pair': df_all['EMA Pair'],
+            'Trading Mode': _column(df_all, 'trading_mode', 'SWING'),
+            'Pattern': df_all['Pattern'],
+            'Total Trades': total_trades,
+            'Winning Trades': _column(df_all, 'winning_trades'),
+            'Win Rate %': df_all['win_rate'] * 100,
+            'Profit Factor': df_all['profit_factor'],
+            'Total Profit': df_all['total_profit'],
+            'Return %': df_all['return_pct'],
+            'Max Drawdown %': df_all['max_drawdown_pct'],
+            'Sharpe Ratio': _column(df_all, 'sharpe_ratio'),
+            'Monthly Returns Avg': _column(df_all, 'monthly_returns_avg') * 100,
+            'Monthly Returns Std': _column(df_all, 'monthly_returns_std') * 100,
+            'Profitable Months': _column(df_all, 'profitable_months'),
+            'Max Monthly Profit %': _column(df_all, 'max_monthly_profit') * 100,
+            'Max Monthly Loss %': _column(df_all, 'max_monthly_loss') * 100,
+            'Signal Exits': exit_counts['Signal'][0],
+            'Signal Exits %': exit_counts['Signal'][1],
+            'Trailing Stop Exits': exit_counts['TrailingStop'][0],
+            'Trailing Stop Exits %': exit_counts['TrailingStop'][1],
+            'Stop Loss Exits': exit_counts['StopLoss'][0],
+            'Stop Loss Exits %': exit_counts['StopLoss'][1],
+            'Force Exits': exit_counts['ForceExit'][0],
+            'Force Exits %': exit_counts['ForceExit'][1]
+        })
 
         # Sort by Return % descending
         df_results = df_results.sort_values('Return %', ascending=False)
 
-        # Write to Excel
-        df_results.to_excel(writer, sheet_name='Detailed Results', index=False)
+        # Write the data rows below the header row
+        df_results.to_excel(writer, sheet_name='Detailed Results', index=False, header=False, startrow=1)
 
-        # Get workbook and worksheet objects
-        workbook = writer.book
+        # Get worksheet object
         worksheet = writer.sheets['Detailed Results']
 
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
+        header_format = formats['header']
 
-        # Format header row
-        for col_num, value in enumerate(df_results.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+        # Write the header row
+        worksheet.write_row(0, 0, df_results.columns.tolist(), header_format)
 
         # Set column widths
-        for i, col in enumerate(df_results.columns):
-            col_width = max(len(col) + 2, 12)
-            worksheet.set_column(i, i, col_width)
+        _set_header_widths(worksheet, df_results.columns)
+
+        return df_results
 
     except Exception as e:
         logger.error(f"Error creating detailed results sheet: {e}")
         raise
 
-def _create_best_performers_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, Any]]):
+def _create_best_performers_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], df_all: pd.DataFrame):
     """Create best performers sheet with top results by different metrics"""
     try:
-        # Create DataFrame from results
-        df = pd.DataFrame(all_results)
-
-        # Add EMA pair and pattern columns
-        df['EMA Pair'] = df.apply(lambda x: f"{x['ema_short']}/{x['ema_long']}", axis=1)
-        def get_pattern_str(row):
-            if 'pattern_length' in row:
-                pattern_length = row['pattern_length']
-                if isinstance(pattern_length, str):
-                    return f"{pattern_length}-Candle" if pattern_length != 'None' else "None"
-                else:
-                    return f"{pattern_length}-Candle"
-            return "None"
-
-        df['Pattern'] = df.apply(get_pattern_str, axis=1)
-
-        # Create best performers data
-        best_data = []
-
-        # Best by Sharpe Ratio
-        best_sharpe = df.loc[df['sharpe_ratio'].idxmax()] if 'sharpe_ratio' in df.columns and not df.empty else None
-        if best_sharpe is not None:
-            best_data.append({
-                'Metric': 'Best Sharpe Ratio',
-                'EMA Pair': best_sharpe['EMA Pair'],
-                'Trading Mode': best_sharpe.get('trading_mode', 'SWING'),
-                'Pattern': best_sharpe['Pattern'],
-                'Value': best_sharpe.get('sharpe_ratio', 0),
-                'Win Rate': best_sharpe['win_rate'] * 100,
-                'Return %': best_sharpe['return_pct'],
-                'Max Drawdown %': best_sharpe['max_drawdown_pct']
-            })
-
-        # Best by Return %
-        best_return = df.loc[df['return_pct'].idxmax()] if not df.empty else None
-        if best_return is not None:
-            best_data.append({
-                'Metric': 'Best Return %',
-                'EMA Pair': best_return['EMA Pair'],
-                'Trading Mode': best_return.get('trading_mode', 'SWING'),
-                'Pattern': best_return['Pattern'],
-                'Value': best_return['return_pct'],
-                'Win Rate': best_return['win_rate'] * 100,
-                'Return %': best_return['return_pct'],
-                'Max Drawdown %': best_return['max_drawdown_pct']
-            })
-
-        # Best by Win Rate
-        best_win_rate = df.loc[df['win_rate'].idxmax()] if not df.empty else None
-        if best_win_rate is not None:
-            best_data.append({
-                'Metric': 'Best Win Rate',
-                'EMA Pair': best_win_rate['EMA Pair'],
-                'Trading Mode': best_win_rate.get('trading_mode', 'SWING'),
-                'Pattern': best_win_rate['Pattern'],
-                'Value': best_win_rate['win_rate'] * 100,
-                'Win Rate': best_win_rate['win_rate'] * 100,
-                'Return %': best_win_rate['return_pct'],
-                'Max Drawdown %': best_win_rate['max_drawdown_pct']
-            })
-
-        # Best by Profit Factor
-        best_profit_factor = df.loc[df['profit_factor'].idxmax()] if not df.empty else None
-        if best_profit_factor is not None:
-            best_data.append({
-                'Metric': 'Best Profit Factor',
-                'EMA Pair': best_profit_factor['EMA Pair'],
-                'Trading Mode': best_profit_factor.get('trading_mode', 'SWING'),
-                'Pattern': best_profit_factor['Pattern'],
-                'Value': best_profit_factor['profit_factor'],
-                'Win Rate': best_profit_factor['win_rate'] * 100,
-                'Return %': best_profit_factor['return_pct'],
-                'Max Drawdown %': best_profit_factor['max_drawdown_pct']
-            })
-
-        # Best by Lowest Max Drawdown
-        if not df.empty:
-            # Filter out zero drawdowns which might be from failed backtests
-            df_nonzero_dd = df[df['max_drawdown_pct'] > 0]
-            if not df_nonzero_dd.empty:
-                best_drawdown = df_nonzero_dd.loc[df_nonzero_dd['max_drawdown_pct'].idxmin()]
-                best_data.append({
-                    'Metric': 'Lowest Max Drawdown',
-                    'EMA Pair': best_drawdown['EMA Pair'],
-                    'Trading Mode': best_drawdown.get('trading_mode', 'SWING'),
-                    'Pattern': best_drawdown['Pattern'],
-                    'Value': best_drawdown['max_drawdown_pct'],
-                    'Win Rate': best_drawdown['win_rate'] * 100,
-                    'Return %': best_drawdown['return_pct'],
-                    'Max Drawdown %': best_drawdown['max_drawdown_pct']
-                })
-
-        # Create DataFrame
-        df_best = pd.DataFrame(best_data)
+        # Pick each metric's best row by position, one array reduction per metric
+        sharpe = df_all['sharpe_ratio'].to_numpy(dtype=np.float64)
+        return_pct = df_all['return_pct'].to_numpy(dtype=np.float64)
+        win_rate = df_all['win_rate'].to_numpy(dtype=np.float64)
+        profit_factor = df_all['profit_factor'].to_numpy(dtype=np.float64)
+        max_drawdown = df_all['max_drawdown_pct'].to_numpy(dtype=np.float64)
+
+        picks = []
+        if not np.isnan(sharpe).all():
+            picks.append(('Best Sharpe Ratio', int(np.nanargmax(sharpe)), sharpe))
+        picks.append(('Best Return %', int(np.nanargmax(return_pct)), return_pct))
+        picks.append(('Best Win Rate', int(np.nanargmax(win_rate)), win_rate * 100))
+        picks.append(('Best Profit Factor', int(np.nanargmax(profit_factor)), profit_factor))
+
+        # Filter out zero drawdowns which might be from failed backtests
+        nonzero_dd = max_drawdown > 0
+        if nonzero_dd.any():
+            picks.append(('Lowest Max Drawdown', int(np.argmin(np.where(nonzero_dd, max_drawdown, np.inf))), max_drawdown))
+
+        rows = [row for _, row, _ in picks]
+        df_best = pd.DataFrame({
+            'Metric': [metric for metric, _, _ in picks],
+            'EMA Pair': df_all['EMA Pair'].to_numpy()[rows],
+            'Trading Mode': df_all['trading_mode'].to_numpy()[rows],
+            'Pattern': df_all['Pattern'].to_numpy()[rows],
+            'Value': [values[row] for _, row, values in picks],
+            'Win Rate': win_rate[rows] * 100,
+            'Return %': return_pct[rows],
+            'Max Drawdown %': max_drawdown[rows]
+        })
 
-        # Write to Excel
-        df_best.to_excel(writer, sheet_name='Best Performers', index=False)
+        # Write the data rows below the header row
+        df_best.to_excel(writer, sheet_name='Best Performers', index=False, header=False, startrow=1)
 
-        # Get workbook and worksheet objects
-        workbook = writer.book
+        # Get worksheet object
         worksheet = writer.sheets['Best Performers']
 
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
+        header_format = formats['header']
 
-        # Format header row
-        for col_num, value in enumerate(df_best.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+        # Write the header row
+        worksheet.write_row(0, 0, df_best.columns.tolist(), header_format)
 
         # Set column widths
         worksheet.set_column('A:A', 20)  # Metric
@@ -532,17 +511,13 @@ def _create_best_performers_sheet(writer: pd.ExcelWriter, all_results: List[Dict
         logger.error(f"Error creating best performers sheet: {e}")
         raise
 
-def _create_ema_comparison_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, Any]]):
+def _create_ema_comparison_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], df_all: pd.DataFrame):
     """Create EMA comparison sheet"""
     try:
-        # Create DataFrame from results
-        df = pd.DataFrame(all_results)
+        df = df_all
 
-        # Add EMA pair column
-        df['EMA Pair'] = df.apply(lambda x: f"{x['ema_short']}/{x['ema_long']}", axis=1)
-
-        # Group by EMA pair and calculate averages
-        ema_groups = df.groupby('EMA Pair').agg({
+        # Group by EMA pair in order of appearance; the sheet is sorted by return below
+        ema_groups = df.groupby('EMA Pair', sort=False, observed=True).agg({
             'total_trades': 'mean',
             'win_rate': 'mean',
             'profit_factor': 'mean',
@@ -567,46 +542,36 @@ def _create_ema_comparison_sheet(writer: pd.ExcelWriter, all_results: List[Dict[
         # Sort by average return
         ema_groups = ema_groups.sort_values('Avg Return %', ascending=False)
 
-        # Write to Excel
-        ema_groups.to_excel(writer, sheet_name='EMA Comparison', index=False)
+        # Write the data rows below the header row
+        ema_groups.to_excel(writer, sheet_name='EMA Comparison', index=False, header=False, startrow=1)
 
-        # Get workbook and worksheet objects
-        workbook = writer.book
+        # Get worksheet object
         worksheet = writer.sheets['EMA Comparison']
 
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
+        header_format = formats['header']
 
-        # Format header row
-        for col_num, value in enumerate(ema_groups.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+        # Write the header row
+        worksheet.write_row(0, 0, ema_groups.columns.tolist(), header_format)
 
         # Set column widths
-        for i, col in enumerate(ema_groups.columns):
-            col_width = max(len(col) + 2, 12)
-            worksheet.set_column(i, i, col_width)
+        _set_header_widths(worksheet, ema_groups.columns)
 
     except Exception as e:
         logger.error(f"Error creating EMA comparison sheet: {e}")
         raise
 
-def _create_mode_comparison_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, Any]]):
+def _create_mode_comparison_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], df_all: pd.DataFrame):
     """Create trading mode comparison sheet"""
     try:
-        # Create DataFrame from results
-        df = pd.DataFrame(all_results)
+        df = df_all
 
         # Check if trading_mode column exists
         if 'trading_mode' not in df.columns:
             # Skip this sheet if no trading mode data
             return
 
-        # Group by trading mode and calculate averages
-        mode_groups = df.groupby('trading_mode').agg({
+        # Group by trading mode in order of appearance; the sheet is sorted by return below
+        mode_groups = df.groupby('trading_mode', sort=False, observed=True).agg({
             'total_trades': 'mean',
             'win_rate': 'mean',
             'profit_factor': 'mean',
@@ -631,53 +596,31 @@ def _create_mode_comparison_sheet(writer: pd.ExcelWriter, all_results: List[Dict
         # Sort by average return
         mode_groups = mode_groups.sort_values('Avg Return %', ascending=False)
 
-        # Write to Excel
-        mode_groups.to_excel(writer, sheet_name='Mode Comparison', index=False)
+        # Write the data rows below the header row
+        mode_groups.to_excel(writer, sheet_name='Mode Comparison', index=False, header=False, startrow=1)
 
-        # Get workbook and worksheet objects
-        workbook = writer.book
+        # Get worksheet object
         worksheet = writer.sheets['Mode Comparison']
 
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
+        header_format = formats['header']
 
-        # Format header row
-        for col_num, value in enumerate(mode_groups.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+        # Write the header row
+        worksheet.write_row(0, 0, mode_groups.columns.tolist(), header_format)
 
         # Set column widths
-        for i, col in enumerate(mode_groups.columns):
-            col_width = max(len(col) + 2, 12)
-            worksheet.set_column(i, i, col_width)
+        _set_header_widths(worksheet, mode_groups.columns)
 
     except Exception as e:
         logger.error(f"Error creating mode comparison sheet: {e}")
         raise
 
-def _create_pattern_comparison_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, Any]]):
+def _create_pattern_comparison_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], df_all: pd.DataFrame):
     """Create pattern comparison sheet"""
     try:
-        # Create DataFrame from results
-        df = pd.DataFrame(all_results)
-
-        # Add pattern column
-        def get_pattern_str(row):
-            if 'pattern_length' in row:
-                pattern_length = row['pattern_length']
-                if isinstance(pattern_length, str):
-                    return f"{pattern_length}-Candle" if pattern_length != 'None' else "None"
-                else:
-                    return f"{pattern_length}-Candle"
-            return "None"
-
-        df['Pattern'] = df.apply(get_pattern_str, axis=1)
-
-        # Group by pattern and calculate averages
-        pattern_groups = df.groupby('Pattern').agg({
+        df = df_all
+
+        # Group by pattern in order of appearance; the sheet is sorted by return below
+        pattern_groups = df.groupby('Pattern', sort=False, observed=True).agg({
             'total_trades': 'mean',
             'win_rate': 'mean',
             'profit_factor': 'mean',
@@ -702,28 +645,19 @@ def _create_pattern_comparison_sheet(writer: pd.ExcelWriter, all_results: List[D
         # Sort by average return
         pattern_groups = pattern_groups.sort_values('Avg Return %', ascending=False)
 
-        # Write to Excel
-        pattern_groups.to_excel(writer, sheet_name='Pattern Comparison', index=False)
+        # Write the data rows below the header row
+        pattern_groups.to_excel(writer, sheet_name='Pattern Comparison', index=False, header=False, startrow=1)
 
-        # Get workbook and worksheet objects
-        workbook = writer.book
+        # Get worksheet object
         worksheet = writer.sheets['Pattern Comparison']
 
-        # Add formatting
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
+        header_format = formats['header']
 
-        # Format header row
-        for col_num, value in enumerate(pattern_groups.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+        # Write the header row
+        worksheet.write_row(0, 0, pattern_groups.columns.tolist(), header_format)
 
         # Set column widths
-        for i, col in enumerate(pattern_groups.columns):
-            col_width = max(len(col) + 2, 12)
-            worksheet.set_column(i, i, col_width)
+        _set_header_widths(worksheet, pattern_groups.columns)
 
     except Exception as e:
         logger.error(f"Error creating pattern comparison sheet: {e}")
@@ -743,13 +677,10 @@ def create_excel_report(output_file: str, all_results: List[Dict[str, Any]], all
     """
     try:
         # Use the existing config from get_config() and just override the output folder
-        from utils.config_utils import get_config
         config = get_config()
 
-        # Ensure the output folder is set correctly
-        if 'data' not in config:
-            config['data'] = {}
-        config['data']['output_folder'] = os.path.dirname(output_file)
+        # Set the output folder on a copy so the cached config is left unchanged
+        config = {**config, 'data': {**config.get('data', {}), 'output_folder': os.path.dirname(output_file)}}
 
         # Create consolidated report
         return create_consolidated_report(all_results, config, output_file)
@@ -758,36 +689,12 @@ def create_excel_report(output_file: str, all_results: List[Dict[str, Any]], all
         logger.error(f"Error creating Excel report: {e}")
         raise
 
-def _create_dashboard_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str, Any]]):
+def _create_dashboard_sheet(writer: pd.ExcelWriter, formats: Dict[str, Any], df_all: pd.DataFrame):
     """Create a dashboard sheet with visualizations"""
     try:
-        # Add debug logging
-        logger.info(f"Dashboard sheet creation started with {len(all_results)} results")
-        for i, result in enumerate(all_results):
-            logger.info(f"Result {i}: {result.keys()}")
-
-        # Create a copy of all_results to avoid modifying the original
-        processed_results = []
-        for result in all_results:
-            # Create a copy of the result
-            processed_result = result.copy()
-
-            # Ensure pattern_length is properly handled
-            if 'pattern_length' in processed_result:
-                pattern_length = processed_result['pattern_length']
-                logger.info(f"Pattern length: {pattern_length}, type: {type(pattern_length)}")
-                # Convert to string if needed
-                if not isinstance(pattern_length, str):
-                    processed_result['pattern_length'] = str(pattern_length)
-                # Ensure pattern_length is not None
-                if processed_result['pattern_length'] is None:
-                    processed_result['pattern_length'] = "None"
-
-            processed_results.append(processed_result)
-
-        # Create DataFrame from processed results
-        logger.info("Creating DataFrame from processed results")
-        df = pd.DataFrame(processed_results)
+        # Reuse the shared results frame; the columns added below go on a shallow copy
+        df = df_all.copy(deep=False)
+        logger.info(f"Dashboard sheet creation started with {len(df)} results")
 
         # Skip dashboard creation if there are no results
         if df.empty:
@@ -799,47 +706,29 @@ def _create_dashboard_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str,
         worksheet = workbook.add_worksheet('Dashboard')
 
         # Add title
-        title_format = workbook.add_format({
-            'bold': True,
-            'font_size': 18,
-            'align': 'center',
-            'valign': 'vcenter',
-            'bg_color': '#D7E4BC',
-            'border': 1
-        })
-        worksheet.merge_range('A1:O1', 'EMA-HA Strategy Performance Dashboard', title_format)
+        worksheet.merge_range('A1:O1', 'EMA-HA Strategy Performance Dashboard', formats['dashboard_title'])
 
         # Create a simple summary table
-        section_format = workbook.add_format({
-            'bold': True,
-            'font_size': 14,
-            'align': 'left',
-            'valign': 'vcenter',
-            'bg_color': '#E6F2D3',
-            'border': 1
-        })
+        section_format = formats['section']
 
         worksheet.merge_range('A3:H3', 'Performance Summary', section_format)
 
         # Write headers
         headers = ['EMA Pair', 'Trading Mode', 'Pattern', 'Return %', 'Win Rate', 'Profit Factor', 'Max DD %', 'Sharpe']
-        for i, header in enumerate(headers):
-            worksheet.write(4, i, header, workbook.add_format({'bold': True, 'bg_color': '#D7E4BC'}))
+        worksheet.write_row(4, 0, headers, formats['table_header'])
 
         # Write data
-        for i, result in enumerate(all_results):
-            ema_pair = f"{result['ema_short']}/{result['ema_long']}"
-            pattern_length = result.get('pattern_length', 'None')
-            pattern = f"{pattern_length}-Candle" if pattern_length != 'None' else "None"
-
-            worksheet.write(i+5, 0, ema_pair)
-            worksheet.write(i+5, 1, result.get('trading_mode', 'SWING'))
-            worksheet.write(i+5, 2, pattern)
-            worksheet.write(i+5, 3, result['return_pct'])
-            worksheet.write(i+5, 4, result['win_rate'] * 100)
-            worksheet.write(i+5, 5, result['profit_factor'])
-            worksheet.write(i+5, 6, result['max_drawdown_pct'])
-            worksheet.write(i+5, 7, result.get('sharpe_ratio', 0))
+        trading_modes = _column(df, 'trading_mode', 'SWING')
+        _write_table_columns(worksheet, 5, 0, pd.DataFrame({
+            'EMA Pair': df['EMA Pair'],
+            'Trading Mode': trading_modes,
+            'Pattern': df['Pattern'],
+            'Return %': df['return_pct'],
+            'Win Rate': df['win_rate'] * 100,
+            'Profit Factor': df['profit_factor'],
+            'Max DD %': df['max_drawdown_pct'],
+            'Sharpe': _column(df, 'sharpe_ratio')
+        }))
 
         # Create a simple bar chart for returns
         chart = workbook.add_chart({'type': 'column'})
@@ -847,8 +736,8 @@ def _create_dashboard_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str,
         # Configure the chart
         chart.add_series({
             'name': 'Return %',
-            'categories': ['Dashboard', 5, 0, 5 + len(all_results) - 1, 0],  # EMA Pair
-            'values': ['Dashboard', 5, 3, 5 + len(all_results) - 1, 3],      # Return %
+            'categories': ['Dashboard', 5, 0, 5 + len(df) - 1, 0],  # EMA Pair
+            'values': ['Dashboard', 5, 3, 5 + len(df) - 1, 3],      # Return %
         })
 
         chart.set_title({'name': 'Returns by EMA Pair'})
@@ -859,58 +748,29 @@ def _create_dashboard_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str,
         worksheet.insert_chart('A15', chart, {'x_offset': 25, 'y_offset': 10, 'x_scale': 1.5, 'y_scale': 1.5})
 
         # Create pattern data for pattern comparison chart
-        # Group by pattern and calculate averages
-        try:
-            logger.info("Creating Pattern column")
-            def get_pattern_str(row):
-                try:
-                    if 'pattern_length' in row:
-                        pattern_length = row['pattern_length']
-                        logger.info(f"Processing pattern_length: {pattern_length}, type: {type(pattern_length)}")
-                        if pattern_length is None:
-                            return "None"
-                        elif isinstance(pattern_length, str):
-                            return f"{pattern_length}-Candle" if pattern_length != 'None' else "None"
-                        else:
-                            return f"{pattern_length}-Candle"
-                    return "None"
-                except Exception as e:
-                    logger.error(f"Error in get_pattern_str: {e}, row: {row}")
-                    return "None"
-
-            df['Pattern'] = df.apply(get_pattern_str, axis=1)
-            logger.info("Pattern column created successfully")
-        except Exception as e:
-            logger.error(f"Error creating Pattern column: {e}")
-            # Create a simple Pattern column as fallback
-            df['Pattern'] = "None"
-
-        pattern_data = df.groupby('Pattern').agg({
-            'return_pct': 'mean',
-            'win_rate': 'mean',
-            'profit_factor': 'mean',
-            'sharpe_ratio': 'mean',
-            'max_drawdown_pct': 'mean'
-        }).reset_index()
+        # Average each metric per pattern from the categorical codes; the few distinct labels make this cheap.
+        # A pyarrow string column would not give _group_means the dense integer codes it bins on
+        df['Pattern'] = df['Pattern'].astype('category')
+        pattern_codes = df['Pattern'].cat.codes.to_numpy()
+        pattern_labels = df['Pattern'].cat.categories
+        pattern_data = pd.DataFrame({'Pattern': pattern_labels.to_numpy()})
+        for column in ['return_pct', 'win_rate', 'profit_factor', 'sharpe_ratio', 'max_drawdown_pct']:
+            pattern_data[column] = _group_means(pattern_codes, len(pattern_labels), df[column].to_numpy(dtype=np.float64))
 
         # Create pattern chart
         pattern_chart = workbook.add_chart({'type': 'column'})
 
         # Write data for the chart
-        worksheet.write_string(52, 0, 'Pattern')
-        worksheet.write_string(52, 1, 'Return %')
-        worksheet.write_string(52, 2, 'Win Rate')
-        worksheet.write_string(52, 3, 'Profit Factor')
-        worksheet.write_string(52, 4, 'Sharpe Ratio')
-        worksheet.write_string(52, 5, 'Max Drawdown %')
-
-        for i, row in enumerate(pattern_data.itertuples(), start=53):
-            worksheet.write_string(i, 0, row.Pattern)
-            worksheet.write_number(i, 1, row.return_pct)
-            worksheet.write_number(i, 2, row.win_rate * 100)
-            worksheet.write_number(i, 3, row.profit_factor)
-            worksheet.write_number(i, 4, row.sharpe_ratio)
-            worksheet.write_number(i, 5, row.max_drawdown_pct)
+        worksheet.write_row(52, 0, ['Pattern', 'Return %', 'Win Rate', 'Profit Factor', 'Sharpe Ratio', 'Max Drawdown %'])
+
+        _write_table_columns(worksheet, 53, 0, pd.DataFrame({
+            'Pattern': pattern_data['Pattern'],
+            'Return %': pattern_data['return_pct'],
+            'Win Rate': pattern_data['win_rate'] * 100,
+            'Profit Factor': pattern_data['profit_factor'],
+            'Sharpe Ratio': pattern_data['sharpe_ratio'],
+            'Max Drawdown %': pattern_data['max_drawdown_pct']
+        }))
 
         # Configure the chart
         pattern_chart.add_series({
@@ -942,34 +802,27 @@ def _create_dashboard_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str,
         # 4. Top 5 Combinations Table
         worksheet.merge_range('I3:O3', 'Top 5 Combinations by Return', section_format)
 
-        # Sort by return and get top 5
-        top_combinations = df.sort_values('return_pct', ascending=False).head(5)
+        # Label every combination once, for both top-N tables
+        df['Combination'] = df['EMA Pair'] + ' ' + trading_modes.astype(str) + ' ' + df['Pattern'].astype(str)
+
+        # Get top 5 by return
+        top_combinations = df.nlargest(5, 'return_pct')
 
         # Write headers
-        worksheet.write_string(4, 8, 'Combination')
-        worksheet.write_string(4, 9, 'Return %')
-        worksheet.write_string(4, 10, 'Win Rate')
-        worksheet.write_string(4, 11, 'Profit Factor')
-        worksheet.write_string(4, 12, 'Sharpe Ratio')
-        worksheet.write_string(4, 13, 'Max DD %')
-        worksheet.write_string(4, 14, 'Trades')
+        worksheet.write_row(4, 8, ['Combination', 'Return %', 'Win Rate', 'Profit Factor', 'Sharpe Ratio', 'Max DD %', 'Trades'])
 
         # Write data
         try:
-            logger.info("Writing top combinations data")
-            for i, row in enumerate(top_combinations.itertuples(), start=5):
-                try:
-                    # Create combination string manually
-                    combo = f"{row.ema_short}/{row.ema_long} {row.trading_mode} {row.Pattern}"
-                    worksheet.write_string(i, 8, combo)
-                    worksheet.write_number(i, 9, row.return_pct)
-                    worksheet.write_number(i, 10, row.win_rate * 100)
-                    worksheet.write_number(i, 11, row.profit_factor)
-                    worksheet.write_number(i, 12, row.sharpe_ratio)
-                    worksheet.write_number(i, 13, row.max_drawdown_pct)
-                    worksheet.write_number(i, 14, row.total_trades)
-                except Exception as e:
-                    logger.error(f"Error writing top combination row {i}: {e}")
+            logger.debug("Writing top combinations data")
+            _write_table_columns(worksheet, 5, 8, pd.DataFrame({
+                'Combination': top_combinations['Combination'].to_numpy(),
+                'Return %': top_combinations['return_pct'].to_numpy(),
+                'Win Rate': top_combinations['win_rate'].to_numpy() * 100,
+                'Profit Factor': top_combinations['profit_factor'].to_numpy(),
+                'Sharpe Ratio': top_combinations['sharpe_ratio'].to_numpy(),
+                'Max DD %': top_combinations['max_drawdown_pct'].to_numpy(),
+                'Trades': top_combinations['total_trades'].to_numpy()
+            }))
         except Exception as e:
             logger.error(f"Error writing top combinations data: {e}")
 
@@ -980,36 +833,26 @@ def _create_dashboard_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str,
         scatter_chart = workbook.add_chart({'type': 'scatter'})
 
         # Write data for the chart
-        worksheet.write_string(28, 8, 'Combination')
-        worksheet.write_string(28, 9, 'Return %')
-        worksheet.write_string(28, 10, 'Max Drawdown %')
-        worksheet.write_string(28, 11, 'Sharpe Ratio')
-        worksheet.write_string(28, 12, 'Trades')
+        worksheet.write_row(28, 8, ['Combination', 'Return %', 'Max Drawdown %', 'Sharpe Ratio', 'Trades'])
 
         # Get top 10 by Sharpe ratio
-        top_sharpe = df.sort_values('sharpe_ratio', ascending=False).head(10)
+        top_sharpe = df.nlargest(10, 'sharpe_ratio')
 
         try:
-            logger.info("Writing top sharpe data")
-            for i, row in enumerate(top_sharpe.itertuples(), start=29):
-                try:
-                    # Create combination string manually
-                    combo = f"{row.ema_short}/{row.ema_long} {row.trading_mode} {row.Pattern}"
-                    worksheet.write_string(i, 8, combo)
-                    worksheet.write_number(i, 9, row.return_pct)
-                    worksheet.write_number(i, 10, row.max_drawdown_pct)
-                    worksheet.write_number(i, 11, row.sharpe_ratio)
-                    worksheet.write_number(i, 12, row.total_trades)
-                except Exception as e:
-                    logger.error(f"Error writing top sharpe row {i}: {e}")
+            logger.debug("Writing top sharpe data")
+            _write_table_columns(worksheet, 29, 8, pd.DataFrame({
+                'Combination': top_sharpe['Combination'].to_numpy(),
+                'Return %': top_sharpe['return_pct'].to_numpy(),
+                'Max Drawdown %': top_sharpe['max_drawdown_pct'].to_numpy(),
+                'Sharpe Ratio': top_sharpe['sharpe_ratio'].to_numpy(),
+                'Trades': top_sharpe['total_trades'].to_numpy()
+            }))
         except Exception as e:
             logger.error(f"Error writing top sharpe data: {e}")
 
         # Configure the chart
         try:
-            logger.info("Configuring scatter chart")
-            logger.info(f"Top sharpe type: {type(top_sharpe)}")
-            logger.info(f"Top sharpe length: {len(top_sharpe)}")
+            logger.debug(f"Configuring scatter chart for {len(top_sharpe)} combinations")
 
             # Check if top_sharpe is empty
             if len(top_sharpe) == 0:
@@ -1056,61 +899,43 @@ def _create_dashboard_sheet(writer: pd.ExcelWriter, all_results: List[Dict[str,
         worksheet.merge_range('I51:O51', 'Best Combination Details', section_format)
 
         try:
-            logger.info("Writing best combination details")
+            logger.debug("Writing best combination details")
             # Get the best combination by Sharpe ratio
-            best_combo = df.loc[df['sharpe_ratio'].idxmax()] if not df.empty else None
-
-            if best_combo is not None:
-                try:
-                    # Write headers and data
-                    metrics = [
-                        'EMA Pair', 'Trading Mode', 'Pattern', 'Return %', 'Win Rate',
-                        'Profit Factor', 'Sharpe Ratio', 'Max Drawdown %', 'Total Trades',
-                        'Winning Trades', 'Monthly Avg Return', 'Monthly Std Dev'
-                    ]
-
-                    # Create EMA Pair string
-                    ema_pair = f"{best_combo['ema_short']}/{best_combo['ema_long']}"
-
-                    # Get trading mode with fallback
-                    trading_mode = best_combo['trading_mode'] if 'trading_mode' in best_combo else 'SWING'
-
-                    # Log best combo details for debugging
-                    logger.info(f"Best combo: {best_combo}")
-                    logger.info(f"Best combo type: {type(best_combo)}")
-
-                    # Check if best_combo is a pandas Series or dict-like object
-                    if hasattr(best_combo, 'items'):
-                        for key, value in best_combo.items():
-                            logger.info(f"Key: {key}, Value: {value}, Type: {type(value)}")
-                    else:
-                        logger.info(f"Best combo is not a dict-like object, it's a {type(best_combo)}")
-
-                    # Safely get Pattern value
-                    pattern_value = "None"
-                    if 'Pattern' in best_combo:
-                        pattern_value = best_combo['Pattern']
-
-                    values = [
-                        ema_pair,
-                        trading_mode,
-                        pattern_value,
-                        f"{best_combo['return_pct']:.2f}%",
-                        f"{best_combo['win_rate']*100:.2f}%",
-                        f"{best_combo['profit_factor']:.2f}",
-                        f"{best_combo['sharpe_ratio']:.2f}",
-                        f"{best_combo['max_drawdown_pct']:.2f}%",
-                        str(best_combo['total_trades']),
-                        str(int(best_combo['total_trades'] * best_combo['win_rate'])),
-                        f"{best_combo.get('monthly_returns_avg', 0)*100:.2f}%" if 'monthly_returns_avg' in best_combo else "N/A",
-                        f"{best_combo.get('monthly_returns_std', 0)*100:.2f}%" if 'monthly_returns_std' in best_combo else "N/A"
-                    ]
-
-                    for i, (metric, value) in enumerate(zip(metrics, values)):
-                        worksheet.write_string(52 + i, 8, metric)
-                        worksheet.write_string(52 + i, 9, value)
-                except Exception as e:
-                    logger.error(f"Error writing best combination details: {e}")
+            best_pos = int(np.nanargmax(df['sharpe_ratio'].to_numpy()))
+            best_combo = df.iloc[best_pos]
+
+            try:
+                # Write headers and data
+                metrics = [
+                    'EMA Pair', 'Trading Mode', 'Pattern', 'Return %', 'Win Rate',
+                    'Profit Factor', 'Sharpe Ratio', 'Max Drawdown %', 'Total Trades',
+                    'Winning Trades', 'Monthly Avg Return', 'Monthly Std Dev'
+                ]
+
+                # Every report column is present; results that lacked a key hold NaN
+                monthly_avg = best_combo['monthly_returns_avg']
+                monthly_std = best_combo['monthly_returns_std']
+
+                values = [
+                    best_combo['EMA Pair'],
+                    trading_modes.iloc[best_pos],
+                    best_combo['Pattern'],
+                    f"{best_combo['return_pct']:.2f}%",
+                    f"{best_combo['win_rate']*100:.2f}%",
+                    f"{best_combo['profit_factor']:.2f}",
+                    f"{best_combo['sharpe_ratio']:.2f}",
+                    f"{best_combo['max_drawdown_pct']:.2f}%",
+                    str(best_combo['total_trades']),
+                    str(int(best_combo['total_trades'] * best_combo['win_rate'])),
+                    f"{monthly_avg*100:.2f}%" if pd.notna(monthly_avg) else "N/A",
+                    f"{monthly_std*100:.2f}%" if pd.notna(monthly_std) else "N/A"
+                ]
+
+                for i, (metric, value) in enumerate(zip(metrics, values)):
+                    worksheet.write_string(52 + i, 8, metric)
+                    worksheet.write_string(52 + i, 9, value)
+            except Exception as e:
+                logger.error(f"Error writing best combination details: {e}")
         except Exception as e:
             logger.error(f"Error getting best combination: {e}")
 